@@ -0,0 +1,27 @@
+"""Add refresh signals to company
+
+Revision ID: 0677f94f3ce3
+Revises: ecdfe661da2a
+Create Date: 2026-10-18 13:02:44.915203
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0677f94f3ce3"
+down_revision = "ecdfe661da2a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("company", sa.Column("people_count", sa.Integer, nullable=True))
+    op.add_column("company", sa.Column("checked_at", sa.DateTime, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("company", "checked_at")
+    op.drop_column("company", "people_count")
@@ -0,0 +1,27 @@
+"""Add worker to job
+
+Revision ID: 193227a47e97
+Revises: f0d2526c5f93
+Create Date: 2026-10-18 11:04:52.118530
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "193227a47e97"
+down_revision = "f0d2526c5f93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("job", sa.Column("worker", sa.VARCHAR(), nullable=True))
+    op.create_index("ix_job_worker", "job", ["worker"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_worker", "job")
+    op.drop_column("job", "worker")
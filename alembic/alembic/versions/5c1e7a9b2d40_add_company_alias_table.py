@@ -0,0 +1,37 @@
+"""Add company alias table
+
+Revision ID: 5c1e7a9b2d40
+Revises: 0677f94f3ce3
+Create Date: 2026-10-18 15:21:07.318522
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1e7a9b2d40"
+down_revision = "0677f94f3ce3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_alias",
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, onupdate=sa.func.now()),
+        sa.Column("symbol", sa.VARCHAR(), primary_key=True, nullable=False),
+        sa.Column("name", sa.VARCHAR(), nullable=False),
+        sa.Column("urn_id", sa.Integer, nullable=False),
+    )
+    op.create_index("ix_company_alias_name", "company_alias", ["name"])
+    # `name` is the universalName slug, this is the name stocks are listed by.
+    op.add_column("company", sa.Column("display_name", sa.VARCHAR(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("company", "display_name")
+    op.drop_index("ix_company_alias_name", "company_alias")
+    op.drop_table("company_alias")
@@ -0,0 +1,29 @@
+"""Add priority to job
+
+Revision ID: 9e4b2f6c8a13
+Revises: 5c1e7a9b2d40
+Create Date: 2026-10-18 16:40:52.604117
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "9e4b2f6c8a13"
+down_revision = "5c1e7a9b2d40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "job", sa.Column("priority", sa.Float, nullable=False, server_default="0")
+    )
+    op.create_index("ix_job_kind_state_priority", "job", ["kind", "state", "priority"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_kind_state_priority", "job")
+    op.drop_column("job", "priority")
@@ -0,0 +1,40 @@
+"""Add raw payload table
+
+Revision ID: c3a8d5e1f274
+Revises: 9e4b2f6c8a13
+Create Date: 2026-10-18 18:12:36.480219
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c3a8d5e1f274"
+down_revision = "9e4b2f6c8a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "raw_payload",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement="auto"),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, onupdate=sa.func.now()),
+        sa.Column("endpoint", sa.VARCHAR(), nullable=False),
+        sa.Column("key", sa.VARCHAR(), nullable=False),
+        sa.Column("meta", postgresql.JSONB(), nullable=False),
+        # zlib compressed JSON, see `archive.compress`.
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+    )
+    # Already compressed, so Postgres shouldn't try again.
+    op.execute("ALTER TABLE raw_payload ALTER COLUMN payload SET STORAGE EXTERNAL")
+    op.create_index("ix_raw_payload_endpoint_key", "raw_payload", ["endpoint", "key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_raw_payload_endpoint_key", "raw_payload")
+    op.drop_table("raw_payload")
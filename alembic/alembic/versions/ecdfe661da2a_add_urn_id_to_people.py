@@ -0,0 +1,27 @@
+"""Add urn_id to people
+
+Revision ID: ecdfe661da2a
+Revises: 193227a47e97
+Create Date: 2026-10-18 12:21:07.630981
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "ecdfe661da2a"
+down_revision = "193227a47e97"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("people", sa.Column("urn_id", sa.VARCHAR(), nullable=True))
+    op.create_index("ix_people_urn_id", "people", ["urn_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_people_urn_id", "people")
+    op.drop_column("people", "urn_id")
@@ -0,0 +1,41 @@
+"""Add job table
+
+Revision ID: f0d2526c5f93
+Revises: 8696e1942b9a
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f0d2526c5f93"
+down_revision = "8696e1942b9a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement="auto"),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, onupdate=sa.func.now()),
+        sa.Column("kind", sa.VARCHAR(), nullable=False),
+        sa.Column("key", sa.VARCHAR(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("state", sa.VARCHAR(), nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("lease_until", sa.DateTime, nullable=True),
+        sa.Column("error", sa.VARCHAR(), nullable=True),
+        sa.UniqueConstraint("kind", "key"),
+    )
+    op.create_index("ix_job_kind_state", "job", ["kind", "state"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_job_kind_state", "job")
+    op.drop_table("job")
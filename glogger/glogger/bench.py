@@ -0,0 +1,182 @@
+import argparse
+import logging
+import os
+import threading
+import time
+
+from glogger.logger import get_logger
+from glogger.logger import LoggerFormatter
+from glogger.logger import paint_level
+from glogger.logger import paint_name
+from glogger.logger import PlainFormatter
+
+
+def profile(i: int) -> dict:
+    """A payload about the size of a crawled LinkedIn profile."""
+    return {
+        "firstName": f"first-{i}",
+        "lastName": f"last-{i}",
+        "geoCountryName": "United States",
+        "education": [
+            {"schoolName": f"school-{j}", "degree": "BSc", "timePeriod": {"year": j}}
+            for j in range(3)
+        ],
+        "experience": [
+            {"companyName": f"company-{j}", "title": "Engineer", "timePeriod": {}}
+            for j in range(6)
+        ],
+    }
+
+
+def crawl_loop(
+    logger: logging.Logger, records: int, threads: int, latency: float
+) -> float:
+    """
+    Log like `threads` crawl workers do, each waiting `latency` seconds for a
+    request before logging its response. Returns their time in seconds.
+    """
+    payloads = [profile(i) for i in range(100)]
+
+    def work(worker: int) -> None:
+        for i in range(worker, records, threads):
+            time.sleep(latency)
+            logger.info("Getting info of %s", i)
+            logger.debug("data:\n%s", payloads[i % len(payloads)])
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def bench_async(args: argparse.Namespace) -> None:
+    modes = (("sync", False, "block"), ("async", True, "block"), ("drop", True, "drop"))
+    for label, async_mode, overflow in modes:
+        logger = get_logger(
+            f"bench-{label}",
+            logging.DEBUG,
+            async_mode=async_mode,
+            queue_size=args.queue_size,
+            overflow=overflow,
+        )
+        logger.propagate = False
+        start = time.perf_counter()
+        hot = crawl_loop(logger, args.records, args.threads, args.latency)
+        dropped = 0
+        for handler in logger.handlers:
+            listener = getattr(handler, "listener", None)
+            if listener is not None:
+                listener.flush()
+                dropped += handler.dropped
+        total = time.perf_counter() - start
+        print(
+            f"{label + ':':7} crawl threads {hot:.2f}s "
+            f"({args.records / hot:,.0f} profiles/s), "
+            f"written after {total:.2f}s, {dropped} dropped"
+        )
+
+
+class LegacyFormatter(LoggerFormatter):
+    """The formatter before names and levels were painted once, for comparison."""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        return logging.Formatter.formatTime(self, record, datefmt)
+
+    def format(self, record: logging.LogRecord) -> str:
+        time = self.formatTime(record, self.datefmt)
+        split_3 = self.splitter * 3
+        log_text = (
+            f"{split_3}[{time}]{split_3}[{record.levelname}]".ljust(
+                self.level_just, self.splitter
+            )
+            + f"{split_3}[{record.name}]{split_3}".ljust(self.name_just, self.splitter)
+            + f" {record.getMessage()} :: ({record.filename}:"
+            + (f"{record.lineno}", record.funcName)[self.show_func]
+            + ")"
+        )
+        if record.levelno >= self.emphasize_from:
+            return paint_level.__wrapped__(record.levelno, log_text)
+        return log_text.replace(
+            record.levelname, paint_level.__wrapped__(record.levelno, record.levelname)
+        ).replace(record.name, paint_name.__wrapped__(record.name))
+
+
+def bench_formatter(args: argparse.Namespace) -> None:
+    levels = [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR]
+    records = [
+        logging.LogRecord(
+            f"crawler-{i % 12}",
+            levels[i % len(levels)],
+            "crawler.py",
+            i,
+            "Found %d people (%d so far)",
+            (i, 10 * i),
+            None,
+        )
+        for i in range(args.records)
+    ]
+    legacy = LegacyFormatter(" ")
+    colored = LoggerFormatter(" ")
+    plain = PlainFormatter(" ")
+    for record in records:
+        assert colored.format(record) == legacy.format(record), "output must not change"
+    base = None
+    for label, formatter in (
+        ("legacy", legacy),
+        ("colored", colored),
+        ("plain", plain),
+    ):
+        start = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(
+            f"{label + ':':9} {len(records) / elapsed:,.0f} records/s, "
+            f"{base / elapsed:.1f}x"
+        )
+
+
+def bench_sampling(args: argparse.Namespace) -> None:
+    modes = (
+        ("all", {}),
+        ("1 in 10", {"sample": 10}),
+        ("100/s", {"rate": 100}),
+    )
+    for label, kwargs in modes:
+        logger = get_logger(f"bench-{label}", logging.DEBUG, **kwargs)
+        logger.propagate = False
+        file_handler = logger.handlers[0]
+        start = time.perf_counter()
+        crawl_loop(logger, args.records, args.threads, args.latency)
+        elapsed = time.perf_counter() - start
+        file_handler.flush()
+        print(
+            f"{label + ':':8} {elapsed:.2f}s ({args.records / elapsed:,.0f} "
+            f"profiles/s), {os.path.getsize(file_handler.baseFilename) / 1e6:.1f}MB"
+        )
+
+
+BENCHMARKS = {
+    "async": bench_async,
+    "formatter": bench_formatter,
+    "sampling": bench_sampling,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run glogger benchmarks")
+    parser.add_argument("benchmark", choices=list(BENCHMARKS))
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.001, help="Per request")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
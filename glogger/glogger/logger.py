@@ -1,8 +1,18 @@
+import atexit
+import gzip
+import io
+import json
 import logging
 import os
+import queue
+import shutil
+import threading
+import time
 import zlib
+from functools import lru_cache
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from logging.handlers import RotatingFileHandler
-from time import time
 
 
 reset = "\x1b[0m"
@@ -41,10 +51,12 @@ COLORS = [
 ]
 
 
+@lru_cache(maxsize=None)
 def paint_level(level: int, text: str) -> str:
     return f"{FORMATS[level]}{text}{reset}"
 
 
+@lru_cache(maxsize=1024)
 def paint_name(text: str) -> str:
     color = (
         "\u001b[38;5;" + str(COLORS[zlib.adler32(text.encode()) % len(COLORS)]) + "m"
@@ -55,6 +67,7 @@ def paint_name(text: str) -> str:
 class LoggerFormatter(logging.Formatter):
     name_just = 20
     level_just = 40
+    colored = True
 
     def __init__(
         self,
@@ -77,24 +90,269 @@ class LoggerFormatter(logging.Formatter):
         self.splitter = splitter
         self.show_func = show_func
         self.emphasize_from = emphasize_from
+        self._time_cache: tuple[tuple | None, str] = (None, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        """`logging.Formatter.formatTime`, with the seconds formatted once."""
+        key = (int(record.created), datefmt)
+        cached_key, text = self._time_cache
+        if key != cached_key:
+            text = time.strftime(
+                datefmt or self.default_time_format, self.converter(record.created)
+            )
+            self._time_cache = (key, text)
+        if datefmt:
+            return text
+        return self.default_msec_format % (text, record.msecs)
 
     def format(self, record: logging.LogRecord) -> str:
-        time = self.formatTime(record, self.datefmt)
         split_3 = self.splitter * 3
+        level, name = record.levelname, record.name
+        head = f"{split_3}[{self.formatTime(record, self.datefmt)}]{split_3}["
+        # Padding as `ljust` would add to the uncolored text.
+        level_pad = self.splitter * (self.level_just - len(head) - len(level) - 1)
+        name_pad = self.splitter * (self.name_just - 2 * len(split_3) - len(name) - 2)
+        tail = (
+            f" {record.getMessage()} :: ({record.filename}:"
+            f"{record.funcName if self.show_func else record.lineno})"
+        )
+        if self.colored and record.levelno < self.emphasize_from:
+            level = paint_level(record.levelno, level)
+            name = paint_name(name)
         log_text = (
-            f"{split_3}[{time}]{split_3}[{record.levelname}]".ljust(
-                self.level_just, self.splitter
-            )
-            + f"{split_3}[{record.name}]{split_3}".ljust(self.name_just, self.splitter)
-            + f" {record.getMessage()} :: ({record.filename}:"
-            + (f"{record.lineno}", record.funcName)[self.show_func]
-            + ")"
+            f"{head}{level}]{level_pad}{split_3}[{name}]{split_3}{name_pad}{tail}"
+        )
+        if self.colored and record.levelno >= self.emphasize_from:
+            return f"{FORMATS[record.levelno]}{log_text}{reset}"
+        return log_text
+
+
+class PlainFormatter(LoggerFormatter):
+    """`LoggerFormatter` without colors, for files."""
+
+    colored = False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, for `glogger.reader`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "file": record.filename,
+            "line": record.lineno,
+            "func": record.funcName,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def level_number(name: str) -> int:
+    """The number of a level name or number, 0 for an unknown one."""
+    if name.isdigit():
+        return int(name)
+    number = logging.getLevelName(name.upper())
+    return number if isinstance(number, int) else 0
+
+
+def open_compressed(path: str, mode: str = "rt"):
+    """Open a log file, `.gz` and `.zst` ones decompressed while streaming."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    if path.endswith(".zst"):
+        import zstandard
+
+        if "w" in mode:
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(raw) if "t" in mode else raw
+    return open(path, mode)
+
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    A `RotatingFileHandler` whose backups are compressed, with `"gzip"` or
+    `"zstd"` (needs the `zstandard` package), on a background thread.
+
+    A rollover only renames the full file; it is compressed while logging goes on,
+    and the next rollover waits for that before shifting the backups.
+    """
+
+    def __init__(self, filename: str, compression: str = "gzip", **kwargs):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {list(COMPRESSIONS)}")
+        if compression == "zstd":
+            import zstandard  # noqa: F401
+        super().__init__(filename, **kwargs)
+        self.suffix = COMPRESSIONS[compression]
+        self._compressing: threading.Thread | None = None
+        atexit.register(self.wait)
+
+    def namer(self, name: str) -> str:
+        return name + self.suffix
+
+    def rotator(self, source: str, dest: str) -> None:
+        pending = f"{dest}.pending"
+        os.rename(source, pending)
+        self._compressing = threading.Thread(
+            target=self._compress, args=(pending, dest), name="log-compress"
         )
-        if record.levelno >= self.emphasize_from:
-            return paint_level(record.levelno, log_text)
-        return log_text.replace(
-            record.levelname, paint_level(record.levelno, record.levelname)
-        ).replace(record.name, paint_name(record.name))
+        self._compressing.start()
+
+    def _compress(self, source: str, dest: str) -> None:
+        with open(source, "rb") as src, open_compressed(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def wait(self) -> None:
+        """Wait for the backup being compressed, if any."""
+        if self._compressing is not None:
+            self._compressing.join()
+
+    def doRollover(self) -> None:
+        self.wait()
+        super().doRollover()
+
+
+class Lazy:
+    """
+    A logging argument rendered as `func(*args, **kwargs)` only when its record is
+    first formatted, so a record dropped by a level or filter costs nothing to
+    render.
+
+    `logger.debug("data:\n%s", Lazy(json.dumps, profile, indent=2))`
+    """
+
+    __slots__ = ("func", "args", "kwargs", "text")
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.text: str | None = None
+
+    def __str__(self) -> str:
+        if self.text is None:
+            self.text = str(self.func(*self.args, **self.kwargs))
+        return self.text
+
+
+class SampleFilter(logging.Filter):
+    """
+    Lets 1 in `every` records of each call site through. Records above
+    `max_level` always pass.
+    """
+
+    def __init__(self, every: int, max_level: int = logging.DEBUG):
+        super().__init__()
+        self.every = every
+        self.max_level = max_level
+        self.counts: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            count = self.counts.get(site, 0)
+            self.counts[site] = count + 1
+        return count % self.every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `rate` records per second of each call site through, in bursts
+    of up to `burst`. Records above `max_level` always pass. The first record let
+    through after some were dropped says how many.
+    """
+
+    def __init__(
+        self, rate: float, burst: float | None = None, max_level: int = logging.DEBUG
+    ):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.max_level = max_level
+        # Call site -> tokens, last refill, records dropped since one passed.
+        self.sites: dict[tuple[str, int], tuple[float, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            now = time.monotonic()
+            tokens, last, dropped = self.sites.get(site, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.sites[site] = (tokens, now, dropped + 1)
+                return False
+            self.sites[site] = (tokens - 1, now, 0)
+        if dropped:
+            record.msg = f"{record.msg} (+{dropped} suppressed)"
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records over to an `AsyncListener` thread, which formats and writes them.
+
+    Records are queued unformatted, so their arguments should not be mutated after
+    the logging call. When the queue is full the record either waits for room
+    (`overflow="block"`) or is dropped and counted in `dropped` (`"drop"`).
+    """
+
+    def __init__(self, queue: queue.Queue, overflow: str = "block"):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"overflow must be 'block' or 'drop', not {overflow!r}")
+        super().__init__(queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncListener(QueueListener):
+    """A `QueueListener` that can be flushed and drains its queue on exit."""
+
+    def __init__(self, queue: queue.Queue, *handlers: logging.Handler):
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        atexit.register(self.stop)
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        self.queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
 
 
 def get_logger(
@@ -103,15 +361,47 @@ def get_logger(
     split: str = " ",
     show_func: bool = False,
     emphasize_from: int = logging.ERROR,
+    async_mode: bool | None = None,
+    queue_size: int = 10000,
+    overflow: str = "block",
+    json_mode: bool | None = None,
+    compression: str | None = None,
+    sample: int | None = None,
+    rate: float | None = None,
 ) -> logging.Logger:
+    """
+    Args:
+        async_mode: format and write records on a background thread, through a
+                    queue of `queue_size` records, see `BoundedQueueHandler`.
+                    Defaults to the `G_ASYNC` environment variable
+
+        overflow: what a full queue does to a record, `"block"` or `"drop"`
+
+        json_mode: write the log file as JSON lines (`.jsonl`), see
+                   `glogger.reader`. Defaults to the `G_JSON` environment variable
+
+        compression: compress rotated log files, `"gzip"` or `"zstd"`.
+                     Defaults to the `G_COMPRESS` environment variable
+
+        sample: only log 1 in `sample` DEBUG records of each call site, see
+                `SampleFilter`. Defaults to the `G_SAMPLE` environment variable
+
+        rate: only log `rate` DEBUG records per second of each call site, see
+              `RateLimitFilter`. Defaults to the `G_RATE` environment variable
+    """
     import os
 
     log_folder: str = f"/var/tmp/logs/{os.getcwd().split('/')[-1]}"
-    log_location: str = f"{log_folder}/{int(time())}.log"
+    if json_mode is None:
+        json_mode = os.getenv("G_JSON", "") not in ("", "0")
+    if compression is None:
+        compression = os.getenv("G_COMPRESS") or None
+    extension = "jsonl" if json_mode else "log"
+    log_location: str = f"{log_folder}/{int(time.time())}.{extension}"
 
     os.makedirs(log_folder, exist_ok=True)
     lev_tmp = os.getenv("G_LEVEL")
-    lev_tmp = int(lev_tmp) if lev_tmp else None
+    lev_tmp = level_number(lev_tmp) if lev_tmp else None
     if level is logging.NOTSET:
         level = (lev_tmp, logging.INFO)[lev_tmp is None]  # type: ignore
 
@@ -119,15 +409,41 @@ def get_logger(
     stdout_h.setLevel(level)
     stdout_h.setFormatter(LoggerFormatter(split, show_func, emphasize_from))
 
-    log_handler = RotatingFileHandler(
-        log_location, maxBytes=50 * 1024 * 1024, backupCount=5
-    )
+    rotation = {"maxBytes": 50 * 1024 * 1024, "backupCount": 5}
+    if compression:
+        log_handler = CompressingRotatingFileHandler(
+            log_location, compression, **rotation
+        )
+    else:
+        log_handler = RotatingFileHandler(log_location, **rotation)
     log_handler.setLevel(level)
-    log_handler.setFormatter(LoggerFormatter(split, show_func, emphasize_from))
+    if json_mode:
+        log_handler.setFormatter(JsonFormatter())
+    else:
+        log_handler.setFormatter(PlainFormatter(split, show_func, emphasize_from))
+
+    if async_mode is None:
+        async_mode = os.getenv("G_ASYNC", "") not in ("", "0")
+
+    if sample is None:
+        sample = int(os.getenv("G_SAMPLE", "1"))
+    if rate is None and os.getenv("G_RATE"):
+        rate = float(os.environ["G_RATE"])
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(log_handler)
-    logger.addHandler(stdout_h)
+    if sample > 1:
+        logger.addFilter(SampleFilter(sample))
+    if rate is not None:
+        logger.addFilter(RateLimitFilter(rate))
+    if async_mode:
+        queue_h = BoundedQueueHandler(queue.Queue(queue_size), overflow)
+        queue_h.setLevel(level)
+        queue_h.listener = AsyncListener(queue_h.queue, log_handler, stdout_h)
+        queue_h.listener.start()
+        logger.addHandler(queue_h)
+    else:
+        logger.addHandler(log_handler)
+        logger.addHandler(stdout_h)
 
     return logger
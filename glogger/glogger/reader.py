@@ -0,0 +1,98 @@
+import argparse
+import json
+import logging
+import sys
+from collections.abc import Iterator
+from datetime import datetime
+
+from glogger.logger import level_number
+from glogger.logger import open_compressed
+
+
+def read(
+    paths: list[str],
+    logger: str | None = None,
+    level: int = logging.NOTSET,
+    since: float | None = None,
+    until: float | None = None,
+) -> Iterator[dict]:
+    """
+    Stream the entries of JSON lines log files (see `JsonFormatter`), compressed
+    or not, one line at a time.
+
+    Args:
+        logger: only entries of this logger and its children
+
+        level: only entries of at least this level
+
+        since, until: only entries logged in this range of epoch seconds
+    """
+    for path in paths:
+        with open_compressed(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if logger and not (
+                    entry["logger"] == logger
+                    or entry["logger"].startswith(logger + ".")
+                ):
+                    continue
+                if level and level_number(entry["level"]) < level:
+                    continue
+                if since is not None and entry["ts"] < since:
+                    continue
+                if until is not None and entry["ts"] >= until:
+                    continue
+                yield entry
+
+
+def timestamp(text: str) -> float:
+    return datetime.fromisoformat(text).timestamp()
+
+
+def level(text: str) -> int:
+    number = level_number(text)
+    if not number and text.upper() not in ("0", "NOTSET"):
+        raise argparse.ArgumentTypeError(f"unknown level {text!r}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter JSON lines logs")
+    parser.add_argument("paths", nargs="+", help=".jsonl, .jsonl.N.gz or .zst files")
+    parser.add_argument("--logger", type=str)
+    parser.add_argument(
+        "--level", type=level, default=logging.NOTSET, help="Name or number"
+    )
+    parser.add_argument(
+        "--since", type=timestamp, help="ISO date, e.g. 2022-11-20T10:00"
+    )
+    parser.add_argument("--until", type=timestamp, help="ISO date")
+    parser.add_argument(
+        "--text", action="store_true", help="Print `time level logger message` lines"
+    )
+    args = parser.parse_args()
+    entries = read(
+        args.paths,
+        args.logger,
+        args.level,
+        args.since,
+        args.until,
+    )
+    try:
+        for entry in entries:
+            if args.text:
+                print(
+                    f"{entry['time']} {entry['level']:8} {entry['logger']}: "
+                    f"{entry['message']}"
+                )
+            else:
+                print(json.dumps(entry))
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
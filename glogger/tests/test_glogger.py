@@ -1,8 +1,18 @@
+import argparse
+import json
 import logging
 import os
+import queue
+import re
+import sys
+import threading
+import time
+
+import pytest
 
 import glogger as glogging
 from glogger import __version__
+from glogger import reader
 
 
 def test_version():
@@ -33,3 +43,280 @@ def test_env_log_level():
     logger.debug("tried to assign <g> as gender but could not accomplish")
     logger.debug("gender must be one of ['male','female']")
     logger.critical("your gender is not accepted!")
+
+
+def test_async_mode_writes_off_thread():
+    logger = glogging.getLogger("async", logging.DEBUG, async_mode=True)
+    (handler,) = logger.handlers
+    assert isinstance(handler, glogging.logger.BoundedQueueHandler)
+    logger.debug("profile %s", {"firstName": "g"})
+    handler.listener.flush()
+    with open(handler.listener.handlers[0].baseFilename) as f:
+        assert "profile {'firstName': 'g'}" in f.read()
+
+
+def test_async_mode_from_env(monkeypatch):
+    monkeypatch.setenv("G_ASYNC", "1")
+    logger = glogging.getLogger("async_env", logging.DEBUG)
+    assert isinstance(logger.handlers[0], glogging.logger.BoundedQueueHandler)
+    logger.handlers[0].listener.stop()
+
+
+def test_async_drop_policy_counts_dropped():
+    handler = glogging.logger.BoundedQueueHandler(queue.Queue(1), overflow="drop")
+    for i in range(3):
+        handler.handle(logging.makeLogRecord({"msg": f"record {i}"}))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().msg == "record 0"
+
+
+def test_async_listener_drains_on_stop():
+    logger = glogging.getLogger("async_stop", logging.DEBUG, async_mode=True)
+    (handler,) = logger.handlers
+    for i in range(100):
+        logger.info("drained %d", i)
+    handler.listener.stop()
+    with open(handler.listener.handlers[0].baseFilename) as f:
+        assert "drained 99" in f.read()
+
+
+def test_async_overflow_is_validated():
+    with pytest.raises(ValueError):
+        glogging.logger.BoundedQueueHandler(queue.Queue(), overflow="spill")
+
+
+def make_record(level: int = logging.INFO, name: str = "crawler") -> logging.LogRecord:
+    record = logging.LogRecord(name, level, "crawler.py", 42, "found %d", (3,), None)
+    record.created = 1666000000.5
+    record.msecs = 500
+    return record
+
+
+def test_plain_formatter_layout():
+    formatter = glogging.logger.PlainFormatter("=")
+    text = formatter.format(make_record())
+    assert "\x1b" not in text
+    stamp = formatter.formatTime(make_record())
+    assert text == f"===[{stamp}]===[INFO]".ljust(40, "=") + (
+        "===[crawler]===".ljust(20, "=") + " found 3 :: (crawler.py:42)"
+    )
+
+
+def test_colored_formatter_paints_level_and_name_only():
+    formatter = glogging.logger.LoggerFormatter("=")
+    record = make_record(name="INFO")
+    text = formatter.format(record)
+    assert text.count(glogging.logger.paint_level(logging.INFO, "INFO")) == 1
+    assert glogging.logger.paint_name("INFO") in text
+    plain = glogging.logger.PlainFormatter("=").format(record)
+    assert re.sub("\x1b\\[[0-9;]*m", "", text) == plain
+
+
+def test_colored_formatter_emphasizes_errors():
+    formatter = glogging.logger.LoggerFormatter("=", show_func=True)
+    record = make_record(logging.ERROR)
+    record.funcName = "find_company"
+    text = formatter.format(record)
+    assert text.startswith(glogging.logger.FORMATS[logging.ERROR])
+    assert text.endswith("(crawler.py:find_company)\x1b[0m")
+
+
+def test_format_time_is_cached_per_second():
+    formatter = glogging.logger.PlainFormatter("=")
+    record = make_record()
+    expected = logging.Formatter().formatTime(record)
+    assert formatter.formatTime(record) == expected
+    record.msecs = 900
+    assert formatter.formatTime(record) == expected[:-3] + "900"
+    assert formatter.formatTime(record, "%H") == time.strftime(
+        "%H", time.localtime(record.created)
+    )
+
+
+def test_json_formatter():
+    try:
+        raise KeyError("urn")
+    except KeyError:
+        record = make_record(logging.ERROR)
+        record.exc_info = sys.exc_info()
+    entry = json.loads(glogging.logger.JsonFormatter().format(record))
+    assert entry["ts"] == record.created
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "crawler"
+    assert entry["message"] == "found 3"
+    assert "KeyError" in entry["exc"]
+
+
+def test_compressed_rotation(tmp_path):
+    handler = glogging.logger.CompressingRotatingFileHandler(
+        str(tmp_path / "crawl.jsonl"), maxBytes=2000, backupCount=3
+    )
+    handler.setFormatter(glogging.logger.JsonFormatter())
+    for i in range(100):
+        record = make_record()
+        record.args = (i,)
+        handler.handle(record)
+    handler.wait()
+    handler.close()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == [
+        "crawl.jsonl",
+        "crawl.jsonl.1.gz",
+        "crawl.jsonl.2.gz",
+        "crawl.jsonl.3.gz",
+    ]
+    paths = [str(tmp_path / name) for name in reversed(names)]
+    found = [entry["message"] for entry in reader.read(paths)]
+    assert found[-1] == "found 99"
+    assert found == sorted(found, key=lambda x: int(x.split()[1]))
+
+
+def test_reader_filters(tmp_path):
+    path = tmp_path / "crawl.jsonl"
+    formatter = glogging.logger.JsonFormatter()
+    with open(path, "w") as f:
+        for i, (name, level) in enumerate(
+            [
+                ("crawler", logging.DEBUG),
+                ("crawler.engine", logging.WARNING),
+                ("crawlers", logging.ERROR),
+                ("main", logging.INFO),
+            ]
+        ):
+            record = make_record(level, name)
+            record.created += i
+            f.write(formatter.format(record) + "\n")
+        f.write("not json\n")
+        record = make_record(logging.INFO, "custom")
+        record.levelname = "NOTICE"
+        f.write(formatter.format(record) + "\n")
+
+    def loggers(**kwargs) -> list[str]:
+        return [entry["logger"] for entry in reader.read([str(path)], **kwargs)]
+
+    assert loggers() == ["crawler", "crawler.engine", "crawlers", "main", "custom"]
+    assert loggers(logger="crawler") == ["crawler", "crawler.engine"]
+    assert loggers(level=logging.WARNING) == ["crawler.engine", "crawlers"]
+    start = make_record().created
+    assert loggers(since=start + 1, until=start + 3) == ["crawler.engine", "crawlers"]
+
+
+def test_reader_levels():
+    assert reader.level("warning") == logging.WARNING
+    assert reader.level("15") == 15
+    assert reader.level("NOTSET") == logging.NOTSET
+    with pytest.raises(argparse.ArgumentTypeError):
+        reader.level("LOUD")
+    assert reader.level_number("NOTICE") == 0
+
+
+def test_json_mode_writes_jsonl():
+    logger = glogging.getLogger("json", logging.DEBUG, json_mode=True)
+    handler = logger.handlers[0]
+    assert handler.baseFilename.endswith(".jsonl")
+    logger.info("json %s", "line")
+    handler.flush()
+    entries = reader.read([handler.baseFilename], logger="json")
+    assert any(entry["message"] == "json line" for entry in entries)
+
+
+def make_site_record(level: int, line: int) -> logging.LogRecord:
+    return logging.LogRecord("crawler", level, "crawler.py", line, "edu", (), None)
+
+
+def test_sample_filter_per_call_site():
+    sample = glogging.logger.SampleFilter(3)
+    first = [sample.filter(make_site_record(logging.DEBUG, 1)) for _ in range(7)]
+    second = [sample.filter(make_site_record(logging.DEBUG, 2)) for _ in range(2)]
+    assert first == [True, False, False, True, False, False, True]
+    assert second == [True, False]
+    assert all(sample.filter(make_site_record(logging.INFO, 1)) for _ in range(3))
+
+
+def test_rate_limit_filter(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(glogging.logger.time, "monotonic", lambda: now[0])
+    limit = glogging.logger.RateLimitFilter(rate=2, burst=2)
+    records = [make_site_record(logging.DEBUG, 1) for _ in range(5)]
+    assert [limit.filter(record) for record in records] == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert limit.filter(make_site_record(logging.WARNING, 1))
+    now[0] += 0.5
+    record = make_site_record(logging.DEBUG, 1)
+    assert limit.filter(record)
+    assert record.getMessage() == "edu (+3 suppressed)"
+    assert not limit.filter(make_site_record(logging.DEBUG, 1))
+
+
+def test_lazy_payload_skipped_when_filtered():
+    rendered = []
+
+    def render(payload):
+        rendered.append(payload)
+        return f"rendered {payload}"
+
+    logger = glogging.getLogger("lazy", logging.DEBUG, sample=2, json_mode=True)
+    for i in range(4):
+        logger.debug("data: %s", glogging.logger.Lazy(render, i))
+    assert rendered == [0, 2]
+    logger.handlers[0].flush()
+    entries = reader.read([logger.handlers[0].baseFilename], logger="lazy")
+    assert [entry["message"] for entry in entries] == [
+        "data: rendered 0",
+        "data: rendered 2",
+    ]
+
+
+def test_sampling_from_env(monkeypatch):
+    monkeypatch.setenv("G_SAMPLE", "10")
+    monkeypatch.setenv("G_RATE", "5")
+    logger = glogging.getLogger("sampled", logging.DEBUG)
+    kinds = sorted(type(f).__name__ for f in logger.filters)
+    assert kinds == ["RateLimitFilter", "SampleFilter"]
+
+
+def filter_from_threads(log_filter: logging.Filter, threads: int, records: int):
+    """How many of `records` DEBUG records of one site per thread passed."""
+    passed = []
+    barrier = threading.Barrier(threads)
+
+    def log():
+        barrier.wait()
+        passed.append(
+            sum(
+                log_filter.filter(make_site_record(logging.DEBUG, 1))
+                for _ in range(records)
+            )
+        )
+
+    workers = [threading.Thread(target=log) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(passed)
+
+
+def test_filters_shared_by_threads(monkeypatch):
+    sys.setswitchinterval(1e-6)
+    try:
+        sample = glogging.logger.SampleFilter(3)
+        assert filter_from_threads(sample, threads=8, records=3000) == 8000
+        assert sample.counts == {("crawler.py", 1): 24000}
+        monkeypatch.setattr(glogging.logger.time, "monotonic", lambda: 100.0)
+        limit = glogging.logger.RateLimitFilter(rate=1, burst=50)
+        assert filter_from_threads(limit, threads=8, records=3000) == 50
+    finally:
+        sys.setswitchinterval(0.005)
+
+
+def test_level_from_env(monkeypatch):
+    monkeypatch.setenv("G_LEVEL", "warning")
+    assert glogging.getLogger("env_name").level == logging.WARNING
+    monkeypatch.setenv("G_LEVEL", "10")
+    assert glogging.getLogger("env_number").level == logging.DEBUG
@@ -0,0 +1,374 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from linkedin_api import Linkedin
+from requests import Response
+from requests.cookies import cookiejar_from_dict
+
+from glogger import getLogger as get_logger
+from linkedin import metrics
+
+logger = get_logger("accounts")
+
+THROTTLE = "throttle"
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+_transient_errors = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    json.JSONDecodeError,
+)
+
+
+class ThrottledError(Exception):
+    pass
+
+
+def raise_on_throttle(response: Response, *args, **kwargs) -> None:
+    # LinkedIn answers 999 to clients it takes for bots.
+    if response.status_code in (429, 999):
+        raise ThrottledError(response.url)
+    if response.status_code >= 500:
+        response.raise_for_status()
+
+
+def watch_throttle(api: Linkedin) -> Linkedin:
+    """Make `api` raise on throttled and server error responses, see `classify`."""
+    hooks = api.client.session.hooks["response"]
+    if raise_on_throttle not in hooks:
+        hooks.append(raise_on_throttle)
+    return api
+
+
+def cookie_api(li_at: str, jsessionid: str) -> Linkedin:
+    cookies = cookiejar_from_dict(
+        {
+            "liap": "true",
+            "li_at": li_at,
+            "JSESSIONID": jsessionid,
+        }
+    )
+    return watch_throttle(Linkedin("", "", cookies=cookies))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: tokens added per second
+
+            capacity: maximum number of tokens, i.e. the allowed burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self.refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+def classify(error: Exception) -> str:
+    """
+    Whether a failed call was throttled, may succeed if retried, or will fail
+    again however often it is retried.
+    """
+    if isinstance(error, ThrottledError):
+        return THROTTLE
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        if response is not None and response.status_code >= 500:
+            return TRANSIENT
+        return PERMANENT
+    if isinstance(error, _transient_errors):
+        return TRANSIENT
+    return PERMANENT
+
+
+class Backoff:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, base: float = 1, cap: float = 60):
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+
+class AIMD:
+    """
+    Concurrency limit of an account, found additive-increase/multiplicative-
+    decrease like TCP congestion control.
+
+    Every call answered within `latency_target` seconds grows the limit by
+    `1 / limit`, about one more call per round-trip of the current window. A
+    throttled, failed or slow call multiplies it by `decrease`.
+    """
+
+    def __init__(
+        self,
+        initial: float = 2,
+        minimum: float = 1,
+        maximum: float = 8,
+        decrease: float = 0.5,
+        latency_target: float = 5,
+    ):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_target = latency_target
+
+    def update(self, outcome: str | None, latency: float) -> None:
+        """
+        Args:
+            outcome: the `classify`-ed error, `None` on success
+        """
+        if outcome in (THROTTLE, TRANSIENT) or latency > self.latency_target:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class CircuitBreaker:
+    """
+    Pauses an account for `cooldown` seconds once `error_rate` of its last
+    `window` calls were throttled or failed transiently.
+
+    When the pause ends a single failure opens it again, a success closes it.
+    """
+
+    def __init__(
+        self, window: int = 20, error_rate: float = 0.5, cooldown: float = 120
+    ):
+        self.window = window
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.outcomes: deque = deque(maxlen=window)
+        self.open_until = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def wait_time(self, now: float) -> float:
+        return max(0.0, self.open_until - now)
+
+    def record(self, failed: bool, now: float) -> bool:
+        """Returns whether the breaker just opened."""
+        if self.probing:
+            self.probing = False
+            if not failed:
+                return False
+            return self._open(now)
+        self.outcomes.append(failed)
+        if len(self.outcomes) < self.window:
+            return False
+        if sum(self.outcomes) < self.error_rate * self.window:
+            return False
+        return self._open(now)
+
+    def _open(self, now: float) -> bool:
+        self.open_until = now + self.cooldown
+        self.outcomes.clear()
+        self.probing = True
+        self.trips += 1
+        return True
+
+
+class Account:
+    def __init__(
+        self,
+        name: str,
+        api: Linkedin,
+        bucket: TokenBucket,
+        limiter: AIMD | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.name = name
+        self.api = api
+        self.bucket = bucket
+        self.limiter = limiter or AIMD()
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+        self.requests = 0
+        self.throttles = 0
+        self.errors = 0
+        self.streak = 0
+        self.cooldown_until = 0.0
+
+    def wait_time(self, now: float) -> float:
+        return max(
+            self.cooldown_until - now,
+            self.breaker.wait_time(now),
+            self.bucket.wait_time(),
+        )
+
+    def ready(self, now: float) -> bool:
+        return self.wait_time(now) == 0 and self.in_flight < self.limiter.limit
+
+
+class AccountPool:
+    """
+    Spreads LinkedIn calls over several accounts.
+
+    Each account has its own token bucket and concurrency limit (`AIMD`). An
+    account that gets throttled (`ThrottledError`, see `watch_throttle`) is cooled
+    down, `cooldown` seconds doubling with every throttle in a row, while the call
+    is retried on another one. An account whose error rate spikes is paused by its
+    `CircuitBreaker`. Calls go to the least-loaded account that is ready, so
+    throughput grows with the number of accounts.
+
+    Throttled and transient errors (see `classify`) are retried up to `retries`
+    times, transient ones after an exponential `backoff`; permanent ones are raised
+    right away.
+    """
+
+    def __init__(
+        self,
+        accounts: list[Account],
+        cooldown: float = 300,
+        retries: int = 3,
+        backoff: Backoff | None = None,
+    ):
+        if not accounts:
+            raise ValueError("AccountPool needs at least one account")
+        self.accounts = accounts
+        self.cooldown = cooldown
+        self.retries = retries
+        self.backoff = backoff or Backoff()
+        self._cond = threading.Condition()
+
+    def _acquire(self) -> Account:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [a for a in self.accounts if a.ready(now)]
+                if ready:
+                    account = min(ready, key=lambda a: (a.in_flight, a.requests))
+                    account.bucket.take()
+                    account.in_flight += 1
+                    account.requests += 1
+                    return account
+                # Accounts only waiting for a call to finish are notified.
+                waits = [a.wait_time(now) for a in self.accounts]
+                self._cond.wait(min([w for w in waits if w > 0], default=None))
+
+    def _release(self, account: Account, outcome: str | None, latency: float) -> None:
+        with self._cond:
+            now = time.monotonic()
+            account.in_flight -= 1
+            account.limiter.update(outcome, latency)
+            failed = outcome in (THROTTLE, TRANSIENT)
+            if outcome == TRANSIENT:
+                account.errors += 1
+            if account.breaker.record(failed, now):
+                logger.warning(
+                    "Account %s keeps failing, pausing it for %ss",
+                    account.name,
+                    account.breaker.cooldown,
+                )
+            if outcome == THROTTLE:
+                account.throttles += 1
+                cooldown = min(self.cooldown * 2**account.streak, 8 * self.cooldown)
+                account.cooldown_until = now + cooldown
+                account.streak += 1
+                logger.warning(
+                    "Account %s throttled, cooling down for %.0fs",
+                    account.name,
+                    cooldown,
+                )
+            elif outcome is None:
+                account.streak = 0
+            self._cond.notify_all()
+
+    def _abandon(self, account: Account) -> None:
+        """
+        Free the slot of a call interrupted (e.g. by KeyboardInterrupt) without
+        counting it as a success or failure.
+        """
+        with self._cond:
+            account.in_flight -= 1
+            self._cond.notify_all()
+
+    def _call(self, method: str, *args, **kwargs):
+        attempt = 0
+        while True:
+            account = self._acquire()
+            start = time.monotonic()
+            try:
+                result = getattr(account.api, method)(*args, **kwargs)
+            except Exception as e:
+                latency = time.monotonic() - start
+                outcome = classify(e)
+                self._release(account, outcome, latency)
+                self._observe(method, account, outcome, latency)
+                if outcome == PERMANENT or attempt >= self.retries:
+                    raise
+                if outcome == TRANSIENT:
+                    delay = self.backoff.delay(attempt)
+                    logger.info(
+                        "%s failed on %s (%r), retrying in %.1fs",
+                        method,
+                        account.name,
+                        e,
+                        delay,
+                    )
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._abandon(account)
+                raise
+            latency = time.monotonic() - start
+            self._release(account, None, latency)
+            self._observe(method, account, "ok", latency)
+            return result
+
+    def _observe(
+        self, method: str, account: Account, outcome: str, latency: float
+    ) -> None:
+        metrics.requests.inc(method, account.name, outcome)
+        metrics.request_seconds.observe(method, account.name, outcome, value=latency)
+
+    def stats(self) -> dict[str, dict]:
+        with self._cond:
+            return {
+                a.name: {
+                    "requests": a.requests,
+                    "throttles": a.throttles,
+                    "errors": a.errors,
+                    "limit": round(a.limiter.limit, 2),
+                    "breaker_trips": a.breaker.trips,
+                }
+                for a in self.accounts
+            }
+
+    def search_companies(self, *args, **kwargs) -> list:
+        return self._call("search_companies", *args, **kwargs)
+
+    def get_company(self, *args, **kwargs) -> dict:
+        return self._call("get_company", *args, **kwargs)
+
+    def search_people(self, *args, **kwargs) -> list:
+        return self._call("search_people", *args, **kwargs)
+
+    def get_profile(self, *args, **kwargs) -> dict:
+        return self._call("get_profile", *args, **kwargs)
@@ -0,0 +1,162 @@
+import json
+import zlib
+from collections.abc import Iterator
+
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import crawler
+from linkedin import models
+
+logger = get_logger("archive")
+
+COMPANY = "get_company"
+PROFILE = "get_profile"
+
+# Tables rebuilt by `reprocess`, every row of them comes from a payload. Insert
+# order, parents before the tables referencing them.
+TABLES = [
+    models.Company,
+    models.Locations,
+    models.People,
+    models.Education,
+    models.Experience,
+]
+
+
+class IncompleteArchiveError(Exception):
+    pass
+
+
+def compress(payload) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def decompress(data: bytes):
+    return json.loads(zlib.decompress(data))
+
+
+def row(endpoint: str, key: str, payload: dict, **meta) -> tuple[type, dict]:
+    """
+    The archive row of a raw response, for `persist.BulkWriter`. The payload is
+    stored zlib compressed: Postgres only compresses values of over 2KB itself.
+
+    Args:
+        key: what the response was requested for (urn id)
+
+        meta: the crawl context the rows are built with besides the payload,
+            e.g. the symbol of a company
+    """
+    return (
+        models.RawPayload,
+        dict(endpoint=endpoint, key=str(key), meta=meta, payload=compress(payload)),
+    )
+
+
+def latest(db: Session, endpoint: str, batch_size: int = 1000) -> Iterator[tuple]:
+    """
+    Yield `(key, meta, payload)` of the last archived response per key, streamed
+    from a server-side cursor `batch_size` rows at a time.
+    """
+    table = models.RawPayload
+    statement = (
+        select(table.key, table.meta, table.payload)
+        .where(table.endpoint == endpoint)
+        .distinct(table.key)
+        .order_by(table.key, table.id.desc())
+        .execution_options(stream_results=True)
+    )
+    for rows in db.execute(statement).partitions(batch_size):
+        for key, meta, payload in rows:
+            yield key, meta, decompress(payload)
+
+
+def counts(db: Session) -> dict[str, int]:
+    """Archived keys per endpoint."""
+    table = models.RawPayload
+    return dict(
+        db.execute(
+            select(table.endpoint, func.count(table.key.distinct())).group_by(
+                table.endpoint
+            )
+        ).all()
+    )
+
+
+def reprocess(
+    db: Session, batch_size: int = 1000, force: bool = False
+) -> dict[str, int]:
+    """
+    Rebuild the company, location, people, education and experience tables from
+    the archive with the current `crawler` parsers, without any request.
+
+    Everything runs in one transaction, so the tables are only replaced once every
+    payload is parsed and written. People counts and check times of companies are
+    not in any payload and are kept. Rows that were crawled before payloads were
+    archived can't be rebuilt, so if fewer people or companies are archived than
+    stored this raises `IncompleteArchiveError` unless `force` is set. The tables
+    are locked meanwhile, so no crawl should be running.
+
+    Returns the rows written per table and the payloads that failed to parse.
+    """
+    archived = counts(db)
+    stored = {
+        COMPANY: db.execute(select(func.count()).select_from(models.Company)).scalar(),
+        PROFILE: db.execute(select(func.count()).select_from(models.People)).scalar(),
+    }
+    for endpoint, count in stored.items():
+        if archived.get(endpoint, 0) < count and not force:
+            raise IncompleteArchiveError(
+                f"{archived.get(endpoint, 0)} {endpoint} payloads archived "
+                f"but {count} rows stored"
+            )
+    kept = {
+        urn_id: (people_count, checked_at)
+        for urn_id, people_count, checked_at in db.execute(
+            select(
+                models.Company.urn_id,
+                models.Company.people_count,
+                models.Company.checked_at,
+            )
+        )
+    }
+    db.execute(text(f"TRUNCATE {', '.join(m.__tablename__ for m in TABLES)}"))
+    written = {model.__tablename__: 0 for model in TABLES}
+    written["failed"] = 0
+    by_table: dict[type, list[dict]] = {model: [] for model in TABLES}
+    buffered = 0
+
+    def flush() -> None:
+        for model, rows in by_table.items():
+            if rows:
+                db.execute(model.__table__.insert(), rows)
+                written[model.__tablename__] += len(rows)
+                rows.clear()
+
+    for endpoint in (COMPANY, PROFILE):
+        for key, meta, payload in latest(db, endpoint, batch_size):
+            try:
+                if endpoint == COMPANY:
+                    rows = crawler.company_rows(key, meta["symbol"], payload)
+                    people_count, checked_at = kept.get(int(key), (None, None))
+                    rows[0][1].update(people_count=people_count, checked_at=checked_at)
+                else:
+                    rows = crawler.profile_rows(payload, key)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Could not parse %s %s: %r", endpoint, key, e)
+                written["failed"] += 1
+                continue
+            for model, values in rows:
+                by_table[model].append(values)
+            buffered += len(rows)
+            if buffered >= batch_size:
+                flush()
+                buffered = 0
+        flush()
+        buffered = 0
+    db.commit()
+    logger.info("Reprocessed the archive: %s", written)
+    return written
@@ -0,0 +1,732 @@
+import argparse
+import asyncio
+import csv
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from linkedin import accounts
+from linkedin import archive
+from linkedin import crawler
+from linkedin import database
+from linkedin import engine
+from linkedin import export
+from linkedin import fake
+from linkedin import jobs
+from linkedin import mock_server
+from linkedin import names
+from linkedin import persist
+from linkedin import raw_stocks
+from linkedin import resolve
+from linkedin import schedule
+from linkedin import tracing
+
+
+def bench_engine(args: argparse.Namespace) -> None:
+    stocks = raw_stocks.get_raw_stocks()[: args.stocks]
+
+    api = fake.FakeLinkedin(args.latency, args.people)
+    db = fake.FakeSession()
+    start = time.perf_counter()
+    for symbol, name in stocks:
+        crawler.handle_stock(db, api, symbol, name)
+    serial = time.perf_counter() - start
+    serial_rows = len(db.added)
+
+    api = fake.FakeLinkedin(args.latency, args.people)
+    db = fake.FakeSession()
+    queue = fake.FakeQueue()
+    queue.seed([([symbol], name) for symbol, name in stocks])
+    start = time.perf_counter()
+    engine.Engine(
+        fake.FakeDatabase(db),
+        api,
+        queue,
+        company_workers=args.company_workers,
+        person_workers=args.person_workers,
+        archive_payloads=False,
+    ).run()
+    concurrent = time.perf_counter() - start
+    assert len(db.added) == serial_rows, "engine must add the same rows"
+
+    print(f"stocks: {len(stocks)}, requests: {api.requests}, rows: {serial_rows}")
+    print(f"serial:     {serial:.2f}s")
+    print(f"concurrent: {concurrent:.2f}s")
+    print(f"speedup:    {serial / concurrent:.1f}x")
+
+
+def bench_accounts(args: argparse.Namespace) -> None:
+    calls = 100
+    for n in (1, 2, 4, 8):
+        pool = accounts.AccountPool(
+            [
+                accounts.Account(
+                    f"account-{i}",
+                    fake.FakeLinkedin(args.latency),
+                    accounts.TokenBucket(rate=args.rate, capacity=1),
+                )
+                for i in range(n)
+            ]
+        )
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.person_workers) as executor:
+            list(executor.map(lambda i: pool.get_profile(urn_id=str(i)), range(calls)))
+        elapsed = time.perf_counter() - start
+        print(f"accounts: {n}, requests/s: {calls / elapsed:.1f}")
+
+
+def bench_control(args: argparse.Namespace) -> None:
+    """
+    Call a throttling fake LinkedIn from `--person-workers` threads through two
+    accounts, without and with the retry and concurrency control.
+    """
+    calls = args.profiles
+    uncontrolled = dict(
+        limiter=lambda: accounts.AIMD(initial=1000, minimum=1000, maximum=1000),
+        breaker=lambda: accounts.CircuitBreaker(error_rate=2),
+        retries=0,
+    )
+    controlled = dict(
+        limiter=lambda: accounts.AIMD(latency_target=4 * args.latency),
+        breaker=lambda: accounts.CircuitBreaker(cooldown=1),
+        retries=5,
+    )
+    for label, control in (("uncontrolled", uncontrolled), ("controlled", controlled)):
+        servers = [
+            fake.ThrottlingLinkedin(args.latency, capacity=4, error_rate=0.02, seed=i)
+            for i in range(2)
+        ]
+        pool = accounts.AccountPool(
+            [
+                accounts.Account(
+                    f"account-{i}",
+                    server,
+                    accounts.TokenBucket(rate=1000, capacity=1000),
+                    control["limiter"](),
+                    control["breaker"](),
+                )
+                for i, server in enumerate(servers)
+            ],
+            cooldown=0.2,
+            retries=control["retries"],
+            backoff=accounts.Backoff(base=args.latency, cap=1),
+        )
+
+        def call(i: int) -> bool:
+            try:
+                pool.get_profile(urn_id=str(i))
+            except Exception:
+                return False
+            return True
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.person_workers) as executor:
+            ok = sum(executor.map(call, range(calls)))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label + ':':13} {ok}/{calls} ok, "
+            f"{sum(s.throttled for s in servers)} throttled, "
+            f"{sum(s.errors for s in servers)} errors, "
+            f"{ok / elapsed:.1f} calls/s"
+        )
+        print(f"{'':13} {pool.stats()}")
+
+
+def connect(url: str) -> database.Database:
+    return database.Database(url)
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    threads = args.company_workers + args.person_workers + args.persist_workers + 2
+    connections = database.Database(args.db, pool_size=threads)
+    engine.Engine(
+        connections,
+        fake.FakeLinkedin(args.latency, args.people),
+        jobs.JobQueue(connections.session()),
+        company_workers=args.company_workers,
+        person_workers=args.person_workers,
+        poll=0.1,
+        batch=args.batch,
+    ).run()
+
+
+def bench_workers(args: argparse.Namespace) -> None:
+    """
+    Crawl the same stocks with 1, 2 and 4 worker processes sharing one queue and
+    check every job ran once and produced its rows once. Needs a migrated `--db`,
+    whose crawl tables are emptied.
+    """
+    stocks = raw_stocks.get_raw_stocks()[: args.stocks]
+    db = connect(args.db).session()
+    base = None
+    for processes in (1, 2, 4):
+        tables = ("job", "raw_payload", "locations", "education", "experience")
+        for table in tables + ("people",):
+            db.execute(f"DELETE FROM {table}")
+        db.execute("DELETE FROM company")
+        db.commit()
+        jobs.JobQueue(db).seed(raw_stocks.by_issuer(stocks))
+
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(args,))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+
+        retried = db.execute("SELECT count(*) FROM job WHERE attempts <> 1").scalar()
+        undone = db.execute("SELECT count(*) FROM job WHERE state <> 'done'").scalar()
+        profiles = db.execute("SELECT count(*) FROM job WHERE kind = 'profile'")
+        people = db.execute("SELECT count(*) FROM people").scalar()
+        assert retried == 0 and undone == 0, "every job must run exactly once"
+        assert people == profiles.scalar(), "every profile must be stored once"
+        print(
+            f"processes: {processes}, time: {elapsed:.2f}s, "
+            f"speedup: {base / elapsed:.1f}x, people: {people}"
+        )
+
+
+class CompleteAll:
+    """Stands in for a `jobs.JobQueue` whose every job is still held."""
+
+    def using(self, db: Session) -> "CompleteAll":
+        return self
+
+    def complete_many(self, job_ids: list[int]) -> set[int]:
+        return set(job_ids)
+
+
+def bench_persist(args: argparse.Namespace) -> None:
+    """
+    Store `--profiles` synthetic profiles through the ORM, committing once per
+    company, and through `persist.BulkWriter`. Needs a migrated `--db`, whose people
+    tables are emptied.
+    """
+    api = fake.FakeLinkedin(latency=0)
+    profiles = [api.get_profile(urn_id=str(i)) for i in range(args.profiles)]
+    connections = connect(args.db)
+    db = connections.session()
+
+    def reset():
+        for table in ("people", "education", "experience"):
+            db.execute(f"DELETE FROM {table}")
+        db.commit()
+
+    reset()
+    start = time.perf_counter()
+    for i, profile in enumerate(profiles):
+        crawler.add_profile(db, profile, f"orm-{i}")
+        if i % args.people == args.people - 1:
+            db.commit()
+    db.commit()
+    orm = time.perf_counter() - start
+    rows = sum(len(crawler.profile_rows(profile)) for profile in profiles)
+
+    reset()
+    writer = persist.BulkWriter(connections, CompleteAll(), args.write_batch)
+    start = time.perf_counter()
+    for i, profile in enumerate(profiles):
+        writer.write(i, crawler.profile_rows(profile, f"bulk-{i}"))
+    writer.flush()
+    bulk = time.perf_counter() - start
+
+    print(f"profiles: {len(profiles)}, rows: {rows}")
+    print(f"orm:  {orm:.2f}s, {rows / orm:.0f} rows/s")
+    print(f"bulk: {bulk:.2f}s, {rows / bulk:.0f} rows/s")
+
+
+def bench_reprocess(args: argparse.Namespace) -> None:
+    """
+    Archive `--stocks` companies with `--people` profiles each, rebuild the crawl
+    tables from them with `archive.reprocess` and check the rows match what
+    crawling stored. Needs a migrated `--db`, whose crawl tables are emptied.
+    """
+    api = fake.FakeLinkedin(latency=0)
+    connections = connect(args.db)
+    db = connections.session()
+    tables = ("raw_payload", "locations", "education", "experience", "people")
+    for table in tables:
+        db.execute(f"DELETE FROM {table}")
+    db.execute("DELETE FROM company")
+    db.commit()
+    writer = persist.BulkWriter(connections, CompleteAll(), args.write_batch)
+    payload_bytes = 0
+    for i in range(args.stocks):
+        urn_id = str(1000 + i)
+        data = api.get_company(urn_id)
+        symbol = f"SYM{i}"
+        rows = crawler.company_rows(urn_id, symbol, data)
+        rows.append(archive.row(archive.COMPANY, urn_id, data, symbol=symbol))
+        writer.write(i, rows)
+        payload_bytes += tracing.size(data)
+        for j in range(args.people):
+            key = f"{urn_id}-{j}"
+            profile = api.get_profile(urn_id=key)
+            rows = crawler.profile_rows(profile, key)
+            rows.append(archive.row(archive.PROFILE, key, profile))
+            writer.write(i, rows)
+            payload_bytes += tracing.size(profile)
+    writer.flush()
+
+    tables = [model.__tablename__ for model in archive.TABLES]
+    crawled = {t: db.execute(f"SELECT count(*) FROM {t}").scalar() for t in tables}
+    start = time.perf_counter()
+    written = archive.reprocess(db, batch_size=args.write_batch)
+    elapsed = time.perf_counter() - start
+    rebuilt = {t: db.execute(f"SELECT count(*) FROM {t}").scalar() for t in tables}
+    assert rebuilt == crawled, "reprocessing must rebuild every row"
+    compressed, table_size = db.execute(
+        "SELECT sum(octet_length(payload)), pg_total_relation_size('raw_payload') "
+        "FROM raw_payload"
+    ).one()
+    payloads = args.stocks * (1 + args.people)
+    rows = sum(rebuilt.values())
+    print(f"payloads: {payloads}, rows: {rows}, failed: {written['failed']}")
+    print(
+        f"reprocess: {elapsed:.2f}s, {payloads / elapsed:.0f} payloads/s, "
+        f"{rows / elapsed:.0f} rows/s"
+    )
+    print(
+        f"archive:   {payload_bytes / 1e3:.0f}kB of JSON compressed to "
+        f"{compressed / 1e3:.0f}kB ({payload_bytes / compressed:.2f}x), "
+        f"table with indexes {table_size / 1e3:.0f}kB"
+    )
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, file))
+        for root, _, files in os.walk(path)
+        for file in files
+    )
+
+
+def bench_export(args: argparse.Namespace) -> None:
+    """
+    Store `--profiles` synthetic profiles, then read the crawl tables row by row
+    into CSV files as analysts do, export them to Parquet, and export again
+    incrementally after a tenth more profiles. Needs a migrated `--db`, whose
+    crawl tables are emptied, and pyarrow.
+    """
+    pa = export.arrow()
+    api = fake.FakeLinkedin(latency=0)
+    connections = connect(args.db)
+    db = connections.session()
+    for table in ("raw_payload", "locations", "education", "experience", "people"):
+        db.execute(f"DELETE FROM {table}")
+    db.execute("DELETE FROM company")
+    db.commit()
+    writer = persist.BulkWriter(connections, CompleteAll(), args.write_batch)
+
+    def store(start: int, count: int) -> None:
+        for i in range(start, start + count):
+            rows = crawler.profile_rows(api.get_profile(urn_id=str(i)), str(i))
+            if i % args.people == 0:
+                urn_id = str(1000 + i // args.people)
+                rows += crawler.company_rows(urn_id, "SYM", api.get_company(urn_id))
+            writer.write(i, rows)
+        writer.flush()
+
+    store(0, args.profiles)
+    tables = [model.__tablename__ for model in export.TABLES]
+    rows = sum(db.execute(f"SELECT count(*) FROM {t}").scalar() for t in tables)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        for table in tables:
+            with open(os.path.join(directory, f"{table}.csv"), "w") as f:
+                out = csv.writer(f)
+                for row in db.execute(f"SELECT * FROM {table}"):
+                    out.writerow(row)
+        rowwise = time.perf_counter() - start
+        csv_size = directory_size(directory)
+
+        parquet = os.path.join(directory, "parquet")
+        start = time.perf_counter()
+        export.export(db, parquet, chunk_size=args.write_batch * 10)
+        full = time.perf_counter() - start
+        parquet_size = directory_size(parquet)
+        for table in tables:
+            exported = pa.parquet.read_table(os.path.join(parquet, table)).num_rows
+            stored = db.execute(f"SELECT count(*) FROM {table}").scalar()
+            assert exported == stored, f"every row of {table} must be exported"
+
+        store(args.profiles, args.profiles // 10)
+        start = time.perf_counter()
+        added = export.export(db, parquet, incremental=True, overlap=0)
+        incremental = time.perf_counter() - start
+
+    print(f"rows: {rows}")
+    print(
+        f"row by row: {rowwise:.2f}s, {rows / rowwise:.0f} rows/s, "
+        f"{csv_size / 1e6:.1f}MB of CSV"
+    )
+    print(
+        f"parquet:    {full:.2f}s, {rows / full:.0f} rows/s, "
+        f"{parquet_size / 1e6:.1f}MB"
+    )
+    print(
+        f"incremental: {incremental:.2f}s, "
+        f"{sum(x['rows'] for x in added.values())} new rows"
+    )
+
+
+def bench_db(args: argparse.Namespace) -> None:
+    """
+    Write companies of `--people` profiles from `--person-workers` workers, each
+    fetching for `--latency` seconds before writing: through one session shared
+    behind a lock, through a session per company from the pool, and through the
+    async driver if one is installed. Needs a migrated `--db`, whose people
+    tables are emptied.
+    """
+    api = fake.FakeLinkedin(latency=0)
+    units = [
+        [
+            row
+            for i in range(start, start + args.people)
+            for row in crawler.profile_rows(api.get_profile(urn_id=str(i)), str(i))
+        ]
+        for start in range(0, args.profiles, args.people)
+    ]
+    rows = sum(len(unit) for unit in units)
+    workers = args.person_workers
+
+    def reset(connections: database.Database) -> None:
+        with connections.transaction() as db:
+            for table in ("people", "education", "experience"):
+                db.execute(f"DELETE FROM {table}")
+
+    def report(label: str, elapsed: float) -> None:
+        print(f"{label + ':':16} {elapsed:.2f}s, {rows / elapsed:,.0f} rows/s")
+
+    connections = database.Database(args.db, pool_size=workers, max_overflow=0)
+    reset(connections)
+    shared = connections.session()
+    lock = threading.Lock()
+
+    def write_shared(unit: list) -> None:
+        time.sleep(args.latency)
+        with lock:
+            for statement, params in persist.inserts(unit):
+                shared.execute(statement, params)
+            shared.commit()
+
+    def write_pooled(unit: list) -> None:
+        time.sleep(args.latency)
+        with connections.transaction() as db:
+            for statement, params in persist.inserts(unit):
+                db.execute(statement, params)
+
+    print(f"profiles: {args.profiles}, rows: {rows}, workers: {workers}")
+    for label, write in (
+        ("shared session", write_shared),
+        ("pooled sessions", write_pooled),
+    ):
+        reset(connections)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(write, units))
+        report(label, time.perf_counter() - start)
+    shared.close()
+    print(f"pool: {connections.stats()}")
+
+    try:
+        async_connections = connections.async_database()
+    except ImportError as e:
+        print(f"async: skipped, {e}")
+        return
+
+    async def write_async(unit: list, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            await asyncio.sleep(args.latency)
+            async with async_connections.transaction() as db:
+                for statement, params in persist.inserts(unit):
+                    await db.execute(statement, params)
+
+    async def write_all() -> float:
+        slots = asyncio.Semaphore(workers)
+        start = time.perf_counter()
+        await asyncio.gather(*(write_async(unit, slots) for unit in units))
+        elapsed = time.perf_counter() - start
+        await async_connections.dispose()
+        return elapsed
+
+    reset(connections)
+    report(f"async ({async_connections.driver})", asyncio.run(write_all()))
+    connections.dispose()
+
+
+def bench_names(args: argparse.Namespace) -> None:
+    """Time `names.clean_name` on every stock, see tests/test_names.py for checks."""
+    stock_names = [name for _, name in raw_stocks.get_raw_stocks()]
+    stock_names += [name.upper() for name in stock_names]
+    stock_names += [name.lower() for name in stock_names]
+    names.clean_name.cache_clear()
+    print(f"names: {len(stock_names)}")
+
+    for label, function in (
+        ("compiled", names.clean_name.__wrapped__),
+        ("memoized", names.clean_name),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for name in stock_names:
+                function(name)
+        elapsed = time.perf_counter() - start
+        calls = args.rounds * len(stock_names)
+        print(f"{label + ':':10} {calls / elapsed:,.0f} names/s")
+
+
+def bench_resolve(args: argparse.Namespace) -> None:
+    """Count the searches `resolve.CompanyIndex` saves on a second run of the stocks."""
+    stocks = raw_stocks.get_raw_stocks()
+    api = fake.FakeLinkedin(latency=0)
+    index = resolve.CompanyIndex(threshold=args.threshold)
+    for symbol, name in stocks:
+        if index.lookup(symbol, name) is None:
+            company = crawler.find_company(api, name)
+            if company:
+                index.remember(symbol, name, company["urn_id"])
+    print(f"first run:  {len(stocks)} stocks, {api.requests} searches")
+    stocks = [(symbol, name) for symbol, name in stocks if symbol in index.symbols]
+
+    api.requests = 0
+    start = time.perf_counter()
+    for symbol, name in stocks:
+        assert index.lookup(symbol, name) is not None, symbol
+    elapsed = time.perf_counter() - start
+    print(f"second run: {api.requests} searches, {len(stocks) / elapsed:,.0f} stocks/s")
+
+    wrong = fuzzy = 0
+    by_name = resolve.CompanyIndex(threshold=args.threshold)
+    for symbol, name in stocks:
+        by_name.add(name, None, index.symbols[symbol])
+    for symbol, name in stocks:
+        key = resolve.normalize(name)
+        word = max(key.split(), key=len)
+        urn_id = by_name.lookup(symbol, key.replace(word, word[:3] + word[2:], 1))
+        fuzzy += urn_id is not None
+        wrong += urn_id is not None and urn_id != by_name.names[key]
+    print(f"typos:      {fuzzy} resolved fuzzily, {wrong} to another company")
+
+
+def bench_issuers(args: argparse.Namespace) -> None:
+    """Count the requests crawling each issuer once saves on the stocks."""
+    stocks = raw_stocks.get_raw_stocks()[: args.stocks or None]
+    issuers = raw_stocks.by_issuer(stocks)
+    print(f"stocks: {len(stocks)}, issuers: {len(issuers)}")
+    requests, attached = {}, {}
+    for label, seeds in (
+        ("per stock", [([symbol], name) for symbol, name in stocks]),
+        ("per issuer", issuers),
+    ):
+        api = fake.FakeLinkedin(latency=0, people_per_company=args.people)
+        queue = fake.FakeQueue()
+        queue.seed(seeds)
+        crawl_engine = engine.Engine(fake.FakeDatabase(), api, queue, poll=0.1)
+        crawl_engine.run()
+        requests[label] = api.requests
+        attached[label] = set(crawl_engine.index.symbols)
+        print(f"{label + ':':11} {api.requests:,} requests")
+    assert attached["per issuer"] >= attached["per stock"], "symbols must be kept"
+    saved = requests["per stock"] - requests["per issuer"]
+    print(f"saved:      {saved:,} requests ({saved / requests['per stock']:.0%})")
+
+
+def bench_budget(args: argparse.Namespace) -> None:
+    """
+    Crawl shuffled stocks with a request budget and check the budget went to the
+    largest companies and every job not done was given back.
+    """
+    rows = raw_stocks.get_stock_rows()[: args.stocks]
+    random.Random(0).shuffle(rows)
+    priorities = schedule.priorities("market_cap", rows)
+    stocks = [(row["symbol"], row["name"]) for row in rows]
+    api = fake.FakeLinkedin(args.latency, args.people)
+    queue = fake.FakeQueue()
+    queue.seed(raw_stocks.by_issuer(stocks), priorities)
+    budget = schedule.Budget(requests=args.budget)
+    engine.Engine(
+        fake.FakeDatabase(),
+        schedule.BudgetedApi(api, budget),
+        queue,
+        poll=0.1,
+        batch=args.batch,
+        budget=budget,
+    ).run()
+
+    assert api.requests == args.budget, "the budget must not be overspent"
+    assert not any(job["state"] == jobs.IN_PROGRESS for job in queue.jobs.values())
+    crawled = {
+        job["payload"]["symbol"]
+        for (kind, _), job in queue.jobs.items()
+        if kind == jobs.COMPANY and job["state"] == jobs.DONE
+    }
+    ranked = sorted(priorities, key=priorities.get, reverse=True)
+    top = set(ranked[: len(crawled)])
+    print(f"stocks: {len(stocks)}, budget: {args.budget} requests")
+    print(
+        f"companies crawled: {len(crawled)}, {len(crawled & top)} of them the largest"
+    )
+    print(f"summary: {budget.summary()}")
+    print(f"pending: {({kind: queue.pending(kind) for kind in jobs.KINDS})}")
+
+
+def bench_e2e(args: argparse.Namespace) -> None:
+    """
+    Crawl `--stocks` stocks end to end against a local mock LinkedIn server,
+    through the real client, account pool and engine, into `--db` when given (a
+    migrated database whose crawl tables are emptied) or an in-memory session.
+    """
+    server = mock_server.MockLinkedinServer(
+        data=mock_server.MockLinkedinData(max_people=args.people),
+        latency=mock_server.Latency(args.latency_dist, args.latency),
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+    )
+    server.start()
+    pool = accounts.AccountPool(
+        [
+            accounts.Account(
+                f"account-{i}",
+                mock_server.MockLinkedin(server.url),
+                accounts.TokenBucket(rate=args.rate, capacity=args.rate),
+                accounts.AIMD(maximum=args.person_workers, latency_target=1),
+                accounts.CircuitBreaker(cooldown=1),
+            )
+            for i in range(args.accounts)
+        ],
+        cooldown=0.5,
+        backoff=accounts.Backoff(base=args.latency, cap=1),
+    )
+    stocks = raw_stocks.get_raw_stocks()[: args.stocks]
+    if args.db:
+        connections = connect(args.db)
+        db = connections.session()
+        tables = ("job", "raw_payload", "locations", "education", "experience")
+        for table in tables + ("people",):
+            db.execute(f"DELETE FROM {table}")
+        db.execute("DELETE FROM company_alias")
+        db.execute("DELETE FROM company")
+        db.commit()
+        queue = jobs.JobQueue(db)
+    else:
+        db = fake.FakeSession()
+        connections = fake.FakeDatabase(db)
+        queue = fake.FakeQueue()
+    queue.seed(raw_stocks.by_issuer(stocks))
+
+    if args.trace:
+        tracing.tracer.start()
+    start = time.perf_counter()
+    crawl_engine = engine.Engine(
+        connections,
+        pool,
+        queue,
+        company_workers=args.company_workers,
+        person_workers=args.person_workers,
+        poll=0.1,
+        batch=args.batch,
+        write_batch=args.write_batch,
+        parse_workers=args.parse_workers,
+        persist_workers=args.persist_workers,
+        async_writes=args.async_writes,
+    )
+    crawl_engine.run()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    if args.trace:
+        tracing.tracer.stop()
+        tracing.tracer.write(args.trace)
+
+    if args.db:
+        done = {
+            kind: count
+            for kind, count in db.execute(
+                "SELECT kind, count(*) FROM job WHERE state = 'done' GROUP BY kind"
+            )
+        }
+        tables = ("company", "locations", "people", "education", "experience")
+        rows = sum(db.execute(f"SELECT count(*) FROM {t}").scalar() for t in tables)
+    else:
+        done = Counter(
+            kind for (kind, _), job in queue.jobs.items() if job["state"] == jobs.DONE
+        )
+        rows = len(db.added)
+    minutes = elapsed / 60
+    print(f"stocks: {len(stocks)}, accounts: {args.accounts}, time: {elapsed:.1f}s")
+    print(f"server: {server.stats()}")
+    print(f"pool:   {pool.stats()}")
+    print(f"companies/min: {done.get(jobs.COMPANY, 0) / minutes:.0f}")
+    print(f"profiles/min:  {done.get(jobs.PROFILE, 0) / minutes:.0f}")
+    print(f"rows/s:        {rows / elapsed:.0f} ({rows} rows)")
+    for stage, stats in crawl_engine.stats().items():
+        print(f"{stage + ':':8} {stats}")
+
+
+BENCHMARKS = {
+    "engine": bench_engine,
+    "accounts": bench_accounts,
+    "control": bench_control,
+    "workers": bench_workers,
+    "persist": bench_persist,
+    "names": bench_names,
+    "resolve": bench_resolve,
+    "issuers": bench_issuers,
+    "budget": bench_budget,
+    "e2e": bench_e2e,
+    "db": bench_db,
+    "reprocess": bench_reprocess,
+    "export": bench_export,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run crawler benchmarks")
+    parser.add_argument("benchmark", choices=list(BENCHMARKS))
+    parser.add_argument("--stocks", type=int, default=10)
+    parser.add_argument("--people", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--company-workers", type=int, default=4)
+    parser.add_argument("--person-workers", type=int, default=16)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--persist-workers", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=20, help="Requests/s per account")
+    parser.add_argument("--batch", type=int, default=2, help="Jobs claimed at once")
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--write-batch", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--budget", type=int, default=100, help="Requests")
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument(
+        "--latency-dist",
+        choices=["fixed", "uniform", "exponential", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--trace", type=str, help="Chrome trace file of the e2e run")
+    parser.add_argument("--db", type=str, help="Database url for the workers benchmark")
+    parser.add_argument(
+        "--async-writes",
+        action="store_true",
+        help="Persist through the async driver in the e2e benchmark",
+    )
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from collections import OrderedDict
+
+from linkedin_api import Linkedin
+
+from glogger import getLogger as get_logger
+from linkedin import metrics
+
+logger = get_logger("cache")
+
+DAY = 24 * 60 * 60
+DEFAULT_TTLS = {
+    "search_companies": 30 * DAY,
+    "get_company": 7 * DAY,
+    "search_people": 7 * DAY,
+    "get_profile": 30 * DAY,
+}
+
+
+# What `ResponseCache.get` returns on a miss, so empty and None responses can be
+# cached too.
+MISSING = object()
+
+
+class CacheMissError(Exception):
+    pass
+
+
+class ResponseCache:
+    """
+    Gzipped JSON responses on disk, addressed by the hash of the call.
+
+    Entries older than the TTL of their endpoint are treated as misses. When the
+    cache grows beyond `max_bytes` the least recently used entries are removed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttls: dict[str, int] | None = None,
+        max_bytes: int = 2 * 1024**3,
+    ):
+        self.directory = directory
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+        # path -> size, ordered from least to most recently used
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                if file.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._entries[path] = size
+            self._size += size
+        logger.info(
+            "Loaded %d cache entries (%d bytes) from %s",
+            len(self._entries),
+            self._size,
+            self.directory,
+        )
+
+    def path(self, endpoint: str, args: tuple, kwargs: dict) -> str:
+        key = json.dumps([endpoint, args, kwargs], sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def get(self, endpoint: str, args: tuple, kwargs: dict):
+        """The cached value of a call, `MISSING` if there is none."""
+        path = self.path(endpoint, args, kwargs)
+        with self._lock:
+            if path not in self._entries:
+                self.misses[endpoint] += 1
+                return MISSING
+            self._entries.move_to_end(path)
+        try:
+            with gzip.open(path, "rt") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Dropping unreadable cache entry %s", path)
+            self._remove(path)
+            return self._miss(endpoint)
+        if time.time() - entry["time"] > self.ttls[endpoint]:
+            self._remove(path)
+            return self._miss(endpoint)
+        os.utime(path)
+        with self._lock:
+            self.hits[endpoint] += 1
+        return entry["value"]
+
+    def _miss(self, endpoint: str):
+        with self._lock:
+            self.misses[endpoint] += 1
+        return MISSING
+
+    def put(self, endpoint: str, args: tuple, kwargs: dict, value) -> None:
+        path = self.path(endpoint, args, kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt") as f:
+            json.dump({"time": time.time(), "value": value}, f)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._size += size - self._entries.pop(path, 0)
+            self._entries[path] = size
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            self._size -= self._entries.pop(path, 0)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "hits": self.hits[endpoint],
+                    "misses": self.misses[endpoint],
+                }
+                for endpoint in self.ttls
+            }
+
+
+class CachedApi:
+    """
+    Serves the crawler's `Linkedin` calls from a `ResponseCache`.
+
+    With `api=None` it only crawls from the cache and raises `CacheMissError` on a
+    miss.
+    """
+
+    def __init__(self, api: Linkedin | None, cache: ResponseCache):
+        self.api = api
+        self.cache = cache
+
+    def _call(self, endpoint: str, *args, **kwargs):
+        value = self.cache.get(endpoint, args, kwargs)
+        metrics.cache_lookups.inc(endpoint, "miss" if value is MISSING else "hit")
+        if value is not MISSING:
+            return value
+        if self.api is None:
+            raise CacheMissError(endpoint)
+        value = getattr(self.api, endpoint)(*args, **kwargs)
+        self.cache.put(endpoint, args, kwargs, value)
+        return value
+
+    def search_companies(self, *args, **kwargs) -> list:
+        return self._call("search_companies", *args, **kwargs)
+
+    def get_company(self, *args, **kwargs) -> dict:
+        return self._call("get_company", *args, **kwargs)
+
+    def search_people(self, *args, **kwargs) -> list:
+        return self._call("search_people", *args, **kwargs)
+
+    def get_profile(self, *args, **kwargs) -> dict:
+        return self._call("get_profile", *args, **kwargs)
@@ -0,0 +1,262 @@
+import json
+from collections.abc import Iterator
+
+from linkedin_api import Linkedin
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from glogger.logger import Lazy
+from glogger.logger import RateLimitFilter
+from linkedin import models
+from linkedin import names
+from linkedin import tracing
+
+
+logger = get_logger("crawler")
+
+
+def limit_logging(rate: float) -> None:
+    """Log at most `rate` payloads a second for each line, all of them with 0."""
+    for limit in [f for f in logger.filters if isinstance(f, RateLimitFilter)]:
+        logger.removeFilter(limit)
+    if rate:
+        logger.addFilter(RateLimitFilter(rate))
+
+
+def dump(payload) -> Lazy:
+    """`payload` as indented JSON, only rendered if its record is logged."""
+    return Lazy(json.dumps, payload, indent=2, default=str)
+
+
+def find_company(api: Linkedin, name: str) -> dict | None:
+    name = names.clean_name(name)
+    companies = api.search_companies(name, limit=10)
+    if not len(companies):
+        logger.error("Could not find company %s", name)
+        return None
+    company = companies[0]
+    logger.info(
+        "Found company (for %s) --- name: %s --- headline: %s --- subline: %s",
+        name,
+        company["name"],
+        company["headline"],
+        company["subline"],
+    )
+    return company
+
+
+def affiliated_urns(urn_id: str, data: dict) -> list[str]:
+    companies_urn = [urn_id]
+    if "affiliatedCompaniesResolutionResults" in data:
+        companies_urn.extend(
+            [
+                x["entityUrn"].split(":")[-1]
+                for x in list(data["affiliatedCompaniesResolutionResults"].values())
+            ]
+        )
+    logger.debug("%d affiliated companies", len(companies_urn))
+    return companies_urn
+
+
+def search_people(api: Linkedin, companies_urn: list[str]) -> list:
+    people = api.search_people(
+        current_company=companies_urn, include_private_profiles=False
+    )
+    logger.info("Found %d people", len(people))
+    return people
+
+
+def find_people(api: Linkedin, urn_id: str, data: dict) -> list:
+    return search_people(api, affiliated_urns(urn_id, data))
+
+
+def iter_people(
+    api: Linkedin, companies_urn: list[str], page: int = 49, limit: int | None = None
+) -> Iterator[list]:
+    """
+    Yield the people `search_people` would find, one search page at a time.
+
+    Private profiles are requested too and dropped here, so a short page reliably
+    means the search is over.
+    """
+    offset = 0
+    while limit is None or offset < limit:
+        count = page if limit is None else min(page, limit - offset)
+        with tracing.span("search_people", "request", offset=offset) as span:
+            people = api.search_people(
+                current_company=companies_urn,
+                include_private_profiles=True,
+                limit=count,
+                offset=offset,
+            )
+            span.set(found=len(people))
+        offset += len(people)
+        public = [x for x in people if x.get("distance") != "OUT_OF_NETWORK"]
+        logger.info("Found %d people (%d so far)", len(public), offset)
+        yield public
+        if len(people) < count:
+            return
+
+
+def location_row(urn_id: str, loc: dict) -> dict:
+    logger.debug("Loc:\n%s", dump(loc))
+    return dict(
+        company_urn_id=urn_id,
+        country=loc["country"],
+        geographic_area=loc.get("geographicArea", None),
+        city=loc["city"],
+        postal_code=loc.get("postalCode", None),
+        line=loc.get("line1", None),
+        headquarter=loc["headquarter"],
+    )
+
+
+def add_locations(db: Session, urn_id: str, locations: list) -> None:
+    logger.debug("Adding locations")
+    for loc in locations:
+        db.add(models.Locations(**location_row(urn_id, loc)))
+    # db.commit()
+
+
+def experience_row(exp: dict) -> dict:
+    tp = exp.get("timePeriod", None)
+    start = tp.get("startDate", {}).get("year", None) if tp else None
+    end = tp.get("endDate", {}).get("year", None) if tp else None
+    logger.debug("Exp:\n%s", dump(exp))
+    return dict(
+        location=exp.get("geoLocationName", None),
+        company_name=exp["companyName"],
+        company_urn=exp["companyUrn"].split(":")[-1] if "companyUrn" in exp else None,
+        title=exp["title"],
+        start=start,
+        end=end,
+    )
+
+
+def handle_experience(db: Session, exp: dict):
+    db.add(models.Experience(**experience_row(exp)))
+
+
+def education_row(edu: dict) -> dict:
+    tp = edu.get("timePeriod", None)
+    start = tp.get("startDate", {}).get("year", None) if tp else None
+    end = tp.get("endDate", {}).get("year", None) if tp else None
+    logger.debug("Edu:\n%s", dump(edu))
+    return dict(
+        degree=edu.get("degree", None),
+        activities=edu.get("activities", None),
+        name=edu["schoolName"],
+        field=edu.get("fieldOfStudy", None),
+        start=start,
+        end=end,
+    )
+
+
+def handle_education(db: Session, edu: dict):
+    db.add(models.Education(**education_row(edu)))
+
+
+def fetch_profile(api: Linkedin, person: dict) -> dict:
+    logger.debug("Getting info of %s", person)
+    profile = api.get_profile(urn_id=person["urn_id"])
+    logger.debug("data:\n%s", dump(profile))
+    return profile
+
+
+def people_row(profile: dict, urn_id: str | None = None) -> dict:
+    return dict(
+        urn_id=urn_id,
+        industry_name=profile.get("industryName", None),
+        first_name=profile["firstName"],
+        last_name=profile["lastName"],
+        student=profile["student"],
+        country=profile["geoCountryName"],
+        city=profile.get("geoLocationName", None),
+    )
+
+
+def add_profile(db: Session, profile: dict, urn_id: str | None = None) -> None:
+    db.add(models.People(**people_row(profile, urn_id)))
+    logger.debug("data: %s", dump(profile["education"]))
+    for edu in profile["education"]:
+        handle_education(db, edu)
+    logger.debug("data: %s", dump(profile["experience"]))
+    for exp in profile["experience"]:
+        handle_experience(db, exp)
+
+
+def profile_rows(profile: dict, urn_id: str | None = None) -> list[tuple[type, dict]]:
+    """The rows `add_profile` would add, for `persist.BulkWriter`."""
+    rows: list[tuple[type, dict]] = [(models.People, people_row(profile, urn_id))]
+    logger.debug("data: %s", dump(profile["education"]))
+    rows.extend((models.Education, education_row(edu)) for edu in profile["education"])
+    logger.debug("data: %s", dump(profile["experience"]))
+    rows.extend(
+        (models.Experience, experience_row(exp)) for exp in profile["experience"]
+    )
+    return rows
+
+
+def handle_person(person: dict, api: Linkedin, db: Session) -> None:
+    add_profile(db, fetch_profile(api, person), person["urn_id"])
+
+
+def company_row(urn_id: str, symbol: str, data: dict) -> dict:
+    return dict(
+        urn_id=urn_id,
+        url=data["url"],
+        staff_count=data["staffCount"],
+        specialities=data["specialities"],
+        name=data["universalName"],
+        display_name=data.get("name"),
+        symbol=symbol,
+    )
+
+
+def add_company(db: Session, urn_id: str, symbol: str, data: dict) -> None:
+    logger.debug("Adding new company")
+    db.add(models.Company(**company_row(urn_id, symbol, data)))
+    # db.commit()
+    add_locations(db, urn_id, data["confirmedLocations"])
+
+
+def company_rows(urn_id: str, symbol: str, data: dict) -> list[tuple[type, dict]]:
+    """The rows `add_company` would add, for `persist.BulkWriter`."""
+    logger.debug("Adding new company")
+    rows: list[tuple[type, dict]] = [
+        (models.Company, company_row(urn_id, symbol, data))
+    ]
+    logger.debug("Adding locations")
+    rows.extend(
+        (models.Locations, location_row(urn_id, loc))
+        for loc in data["confirmedLocations"]
+    )
+    return rows
+
+
+def update_company(company: models.Company, data: dict) -> bool:
+    """Refresh a stored company, returns whether its staff count changed."""
+    logger.debug("Updating company %s", company.urn_id)
+    changed = company.staff_count != data["staffCount"]
+    company.url = data["url"]
+    company.staff_count = data["staffCount"]
+    company.specialities = data["specialities"]
+    company.name = data["universalName"]
+    company.display_name = data.get("name")
+    company.checked_at = func.now()
+    return changed
+
+
+def handle_stock(db: Session, api: Linkedin, symbol: str, name: str) -> None:
+    logger.info("symbol: %s, name: %s", symbol, name)
+    company = find_company(api, name)
+    if not company:
+        return
+    urn_id = company["urn_id"]
+    data = api.get_company(urn_id)
+    add_company(db, urn_id, symbol, data)
+    people = find_people(api, company["urn_id"], data)
+    for person in people:
+        handle_person(person, api, db)
+    # db.commit()
@@ -0,0 +1,197 @@
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+
+from dynaconf import Dynaconf
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import sessionmaker
+
+from glogger import getLogger as get_logger
+
+logger = get_logger("database")
+
+# Async drivers, tried in order, with the package each needs.
+ASYNC_DRIVERS = {"asyncpg": "asyncpg", "psycopg": "psycopg"}
+
+
+def url(settings: Dynaconf) -> str:
+    info = {
+        "host": settings.db_host,
+        "port": settings.db_port,
+        "db": settings.db_name,
+        "user": settings.db_user,
+        "pw": settings.db_password,
+    }
+    return "postgresql://%(user)s:%(pw)s@%(host)s:%(port)s/%(db)s" % info
+
+
+def pool_size(settings: Dynaconf) -> int:
+    """
+    A connection per thread of the crawl that holds one at a time: every company,
+    person and persist worker, the heartbeat and the main thread.
+    """
+    return (
+        settings.company_workers
+        + settings.person_workers
+        + settings.persist_workers
+        + 2
+    )
+
+
+class Database:
+    """
+    The process' connection pool and the sessions handed out from it.
+
+    The engine is created once, with `pool_size` connections kept open plus up to
+    `max_overflow` more under load. Connections are checked with a ping before use,
+    recycled after `pool_recycle` seconds, and every statement is cancelled after
+    `statement_timeout` seconds. A unit of work takes its own session with
+    `transaction`; a long-lived one (e.g. the engine's, guarded by its lock) with
+    `session`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: float = 1800,
+        statement_timeout: float = 60,
+    ):
+        self.url = url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.statement_timeout = statement_timeout
+        self.engine = create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            connect_args={
+                "options": f"-c statement_timeout={int(statement_timeout * 1000)}"
+            },
+        )
+        self.sessions = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Dynaconf) -> "Database":
+        """
+        A `db_pool_size` of 0 sizes the pool from the crawl's threads, see
+        `pool_size`, and a `db_max_overflow` of 0 allows half as many more.
+        """
+        size = settings.db_pool_size or pool_size(settings)
+        return cls(
+            url(settings),
+            pool_size=size,
+            max_overflow=settings.db_max_overflow or size // 2,
+            pool_timeout=settings.db_pool_timeout,
+            statement_timeout=settings.db_statement_timeout,
+        )
+
+    def session(self) -> Session:
+        return self.sessions()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Session]:
+        """A session of its own, committed on success and closed either way."""
+        session = self.sessions()
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def stats(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+
+    def async_database(self, driver: str | None = None) -> "AsyncDatabase":
+        """The same database through an asyncio driver, see `AsyncDatabase`."""
+        return AsyncDatabase(
+            self.url,
+            driver=driver,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            statement_timeout=self.statement_timeout,
+        )
+
+
+def async_driver(driver: str | None = None) -> str:
+    """The asyncio driver to use, `driver` or the first one installed."""
+    import importlib.util
+
+    for name, package in ASYNC_DRIVERS.items():
+        if driver in (None, name) and importlib.util.find_spec(package):
+            return name
+    wanted = driver or " or ".join(ASYNC_DRIVERS)
+    raise ImportError(f"The async database needs the {wanted} package")
+
+
+class AsyncDatabase:
+    """
+    `Database` through an asyncio driver (asyncpg or psycopg 3, whichever is
+    installed), so writes can be awaited while requests are in flight.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        driver: str | None = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: float = 1800,
+        statement_timeout: float = 60,
+    ):
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        self.driver = async_driver(driver)
+        timeout = str(int(statement_timeout * 1000))
+        if self.driver == "asyncpg":
+            connect_args = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            connect_args = {"options": f"-c statement_timeout={timeout}"}
+        self.engine = create_async_engine(
+            make_url(url).set(drivername=f"postgresql+{self.driver}"),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+        )
+        self.sessions = sessionmaker(
+            bind=self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator:
+        async with self.sessions() as session:
+            async with session.begin():
+                yield session
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
@@ -0,0 +1,480 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+from linkedin_api import Linkedin
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import archive
+from linkedin import cache
+from linkedin import crawler
+from linkedin import database
+from linkedin import jobs
+from linkedin import metrics
+from linkedin import models
+from linkedin import persist
+from linkedin import pipeline
+from linkedin import resolve
+from linkedin import schedule
+from linkedin import seen
+from linkedin import tracing
+
+logger = get_logger("engine")
+
+
+def trace_attributes(payload: dict) -> dict:
+    person = payload.get("person")
+    return {
+        "symbol": payload.get("symbol"),
+        "urn": person["urn_id"] if person else payload.get("urn_id"),
+    }
+
+
+class Engine:
+    """
+    Crawls the jobs of a `jobs.JobQueue` concurrently.
+
+    Stock, company and people jobs run on `company_workers` threads and profile
+    jobs on `person_workers` threads, so the number of in-flight requests is
+    bounded per stage. Every unit of work takes a session of its own from the
+    `connections` pool, so database writes overlap network calls. A job's rows,
+    the jobs it enqueues and its completion are committed together: a company in
+    one transaction, profiles in bulk batches of `write_batch` rows. With
+    `async_writes` those batches are written through the asyncio driver instead
+    (see `persist.AsyncBulkWriter`).
+
+    Jobs are claimed `batch` at a time and their leases are renewed by a heartbeat
+    thread, so any number of engines, in this or other processes, can share one
+    queue.
+
+    People already in `seen` are neither enqueued nor fetched again, and a person
+    found under several companies is a single profile job. People are searched page
+    by page and their profile jobs enqueued as each page lands, pausing while
+    `people_window` profile jobs are pending; at most `people_cap` people are
+    taken per company. Stocks already known to `index` are resolved without a
+    search.
+
+    Every job passes its priority on to the jobs it enqueues, so the people of the
+    most valuable companies are crawled first. Once `budget` is exhausted, workers
+    stop claiming jobs and give back the ones they hold, and a job cut short by it
+    is given back too, to be resumed by the next run.
+
+    Job outcomes are counted in `metrics`, and the depth of the queue exported
+    every `metrics_interval` seconds.
+
+    A profile goes through three stages connected by bounded queues of
+    `stage_size`: the person workers fetch it, `parse_workers` threads turn it
+    into rows and `persist_workers` threads hand them to the bulk writer. A slow
+    database then only stalls fetching once the queues are full, and `stats`
+    tells which stage is the bottleneck.
+
+    With `archive_payloads` every company and profile response is also stored
+    as is, with the rows built from it, for `archive.reprocess`.
+    """
+
+    def __init__(
+        self,
+        connections: database.Database,
+        api: Linkedin,
+        queue: jobs.JobQueue,
+        company_workers: int = 4,
+        person_workers: int = 16,
+        poll: float = 5,
+        batch: int = 10,
+        seen_set: seen.SeenSet | None = None,
+        write_batch: int = 1000,
+        people_window: int = 200,
+        people_cap: int | None = None,
+        index: resolve.CompanyIndex | None = None,
+        budget: schedule.Budget | None = None,
+        metrics_interval: float = 15,
+        parse_workers: int = 2,
+        persist_workers: int = 1,
+        stage_size: int = 100,
+        archive_payloads: bool = True,
+        async_writes: bool = False,
+    ):
+        self.connections = connections
+        self.api = api
+        self.queue = queue
+        self.company_workers = company_workers
+        self.person_workers = person_workers
+        self.poll = poll
+        self.batch = batch
+        self.seen = seen_set if seen_set is not None else seen.SeenSet()
+        self.index = index if index is not None else resolve.CompanyIndex()
+        self.budget = budget if budget is not None else schedule.Budget()
+        writer = persist.AsyncBulkWriter if async_writes else persist.BulkWriter
+        self.writer = writer(connections, queue, write_batch, on_flush=self.notify)
+        self.metrics_interval = metrics_interval
+        self.people_window = people_window
+        self.people_cap = people_cap
+        self.archive_payloads = archive_payloads
+        # Guards the claimed jobs and wakes workers up when jobs may be available.
+        self.lock = threading.Condition()
+        self.claimed: dict[tuple[str, ...], deque] = {}
+        self.claiming: dict[tuple[str, ...], threading.Lock] = {}
+        # Counts the wake-ups, so a worker doesn't wait for one it missed.
+        self.changes = 0
+        self.stopped = threading.Event()
+        # Profile workers waiting for a job to claim, see `persist_profile`.
+        self.waiting = 0
+        self.fetched = pipeline.Stage("fetch", None, person_workers)
+        self.persisting = pipeline.Stage(
+            "persist",
+            self.persist_profile,
+            persist_workers,
+            stage_size,
+            on_error=self.stage_failed,
+        )
+        self.stages = pipeline.Pipeline(
+            [
+                pipeline.Stage(
+                    "parse",
+                    self.parse_profile,
+                    parse_workers,
+                    stage_size,
+                    on_error=self.stage_failed,
+                ),
+                self.persisting,
+            ]
+        )
+        self.handlers = {
+            jobs.STOCK: self.handle_stock,
+            jobs.COMPANY: self.handle_company,
+            jobs.PEOPLE: self.handle_people,
+            jobs.PROFILE: self.handle_profile,
+        }
+
+    def run(self) -> None:
+        logger.info(
+            "Crawling with %d company workers and %d person workers",
+            self.company_workers,
+            self.person_workers,
+        )
+        company_kinds = [jobs.PEOPLE, jobs.COMPANY, jobs.STOCK]
+        threads = [
+            threading.Thread(
+                target=self.worker, args=(company_kinds,), name=f"company-{i}"
+            )
+            for i in range(self.company_workers)
+        ] + [
+            threading.Thread(
+                target=self.worker, args=([jobs.PROFILE],), name=f"person-{i}"
+            )
+            for i in range(self.person_workers)
+        ]
+        heartbeat = threading.Thread(target=self.heartbeat, name="heartbeat")
+        self.stopped.clear()
+        heartbeat.start()
+        self.fetched.start()
+        self.stages.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stages.stop()
+        self.writer.close()
+        self.stopped.set()
+        heartbeat.join()
+        logger.info("Profile stages: %s", self.stats())
+
+    def stats(self) -> dict[str, dict]:
+        return {"fetch": self.fetched.stats(), **self.stages.stats()}
+
+    def heartbeat(self) -> None:
+        """Renew the leases of claimed jobs and export the queue depth."""
+        beat = time.monotonic()
+        while not self.stopped.wait(min(self.queue.lease / 3, self.metrics_interval)):
+            try:
+                with self.connections.transaction() as db:
+                    queue = self.queue.using(db)
+                    for kind in jobs.KINDS:
+                        metrics.queue_depth.set(kind, value=queue.pending(kind))
+                    if time.monotonic() - beat >= self.queue.lease / 3:
+                        queue.heartbeat()
+                        beat = time.monotonic()
+            except Exception:
+                logger.exception("Heartbeat failed, retrying")
+
+    def notify(self) -> None:
+        """Wake the waiting workers up, jobs may be available or done."""
+        with self.lock:
+            self.changes += 1
+            self.lock.notify_all()
+
+    def claim(self, kinds: list[str]) -> tuple[int, str, dict] | None:
+        """
+        Pop a claimed job, claiming a batch if none is left. The claim doesn't hold
+        `lock`, only one of the workers of `kinds` claims at a time: concurrent
+        claims would skip each other's locked rows and come back empty.
+        """
+        with self.lock:
+            claimed = self.claimed.setdefault(tuple(kinds), deque())
+            claiming = self.claiming.setdefault(tuple(kinds), threading.Lock())
+        with claiming:
+            with self.lock:
+                if claimed:
+                    return claimed.popleft()
+            with self.connections.transaction() as db:
+                batch = self.queue.using(db).claim(kinds, self.batch)
+            if not batch:
+                return None
+            with self.lock:
+                claimed.extend(batch[1:])
+            return batch[0]
+
+    def stop(self, kinds: list[str]) -> None:
+        """Give back the jobs claimed for `kinds`."""
+        with self.lock:
+            claimed = self.claimed.setdefault(tuple(kinds), deque())
+            job_ids = [job_id for job_id, _, _ in claimed]
+            self.budget.released += len(claimed)
+            claimed.clear()
+        if job_ids:
+            self.settle(job_ids, lambda queue: queue.release(job_ids))
+        try:
+            self.writer.flush()
+        except Exception:
+            logger.exception("Could not write the buffered rows")
+        self.notify()
+
+    def idle(self) -> bool:
+        with self.connections.transaction() as db:
+            return self.queue.using(db).idle()
+
+    def settle(self, job_ids: list[int], outcome: Callable) -> None:
+        """
+        Record what became of jobs with `outcome(queue)` in a transaction of its
+        own. If the database can't be reached the jobs are left to their leases,
+        to be claimed again once they expire.
+        """
+        try:
+            with self.connections.transaction() as db:
+                outcome(self.queue.using(db))
+        except Exception:
+            logger.exception("Could not settle jobs %s, leaving them leased", job_ids)
+        self.notify()
+
+    def worker(self, kinds: list[str]) -> None:
+        while True:
+            if self.budget.exhausted():
+                self.stop(kinds)
+                return
+            changes = self.changes
+            idle = failed = False
+            try:
+                job = self.claim(kinds)
+                if job is None:
+                    # Never flush holding the lock, flushes notify when done.
+                    self.writer.flush()
+                    # Jobs may have come meanwhile, then claim again right away.
+                    idle = self.changes == changes and self.idle()
+            except Exception:
+                logger.exception("Could not claim %s jobs", "/".join(kinds))
+                job, failed = None, True
+            if job is None:
+                with self.lock:
+                    if self.changes != changes and not failed:
+                        continue
+                    if idle:
+                        self.lock.notify_all()
+                        return
+                    waiting = jobs.PROFILE in kinds
+                    self.waiting += waiting
+                    self.lock.wait(self.poll)
+                    self.waiting -= waiting
+                continue
+            job_id, kind, payload = job
+            try:
+                with tracing.span(kind, job=job_id, **trace_attributes(payload)):
+                    self.handlers[kind](job_id, payload)
+                metrics.job_outcomes.inc(kind, "done")
+            except schedule.BudgetExhaustedError as e:
+                metrics.job_outcomes.inc(kind, "released")
+                logger.info("Giving back %s job %s: %s", kind, job_id, e)
+                with self.lock:
+                    self.budget.released += 1
+                self.settle([job_id], lambda queue: queue.release([job_id]))
+            except cache.CacheMissError as e:
+                metrics.job_outcomes.inc(kind, "deferred")
+                logger.info("Deferring %s job %s: %s not cached", kind, job_id, e)
+                self.settle([job_id], lambda queue: queue.defer(job_id))
+            except Exception as e:
+                metrics.job_outcomes.inc(kind, "failed")
+                logger.exception("%s job %s failed", kind, payload)
+                self.settle([job_id], lambda queue: queue.fail(job_id, repr(e)))
+
+    def commit(self, db: Session, job_id: int) -> bool:
+        """Mark the job done and commit it with the rest of `db`."""
+        done = self.queue.using(db).complete(job_id)
+        if done:
+            with tracing.span("db.commit", "db"):
+                db.commit()
+        else:
+            logger.warning("Job %s was reclaimed, dropping its rows", job_id)
+            db.rollback()
+        self.notify()
+        return done
+
+    def handle_stock(self, job_id: int, payload: dict) -> None:
+        symbol, name = payload["symbol"], payload["name"]
+        logger.info("symbol: %s, name: %s", symbol, name)
+        with tracing.span("index.lookup") as span:
+            urn_id = self.index.lookup(symbol, name)
+            span.set(hit=urn_id is not None)
+        if urn_id is None:
+            with tracing.span("find_company", "request"):
+                company = crawler.find_company(self.api, name)
+            urn_id = company["urn_id"] if company else None
+        with self.connections.transaction() as db:
+            if urn_id:
+                for other in payload.get("symbols", [symbol]):
+                    self.index.remember(other, name, urn_id, db)
+                self.queue.using(db).enqueue(
+                    jobs.COMPANY,
+                    urn_id,
+                    {
+                        "urn_id": urn_id,
+                        "symbol": symbol,
+                        "priority": payload.get("priority", 0),
+                    },
+                )
+            self.commit(db, job_id)
+
+    def handle_company(self, job_id: int, payload: dict) -> None:
+        urn_id = payload["urn_id"]
+        with tracing.span("get_company", "request", urn=urn_id) as span:
+            data = self.api.get_company(urn_id)
+            if span:
+                span.set(bytes=tracing.size(data))
+        archived = self.archived(
+            archive.COMPANY, urn_id, data, symbol=payload["symbol"]
+        )
+        with self.connections.transaction() as db:
+            company = db.get(models.Company, urn_id)
+            if company is not None:
+                for model, row in archived:
+                    db.add(model(**row))
+            if company is not None and not crawler.update_company(company, data):
+                logger.info("Staff count of %s did not change", urn_id)
+                self.commit(db, job_id)
+                return
+            self.queue.using(db).enqueue(
+                jobs.PEOPLE,
+                urn_id,
+                {
+                    "urn_id": urn_id,
+                    "companies": crawler.affiliated_urns(urn_id, data),
+                    "priority": payload.get("priority", 0),
+                },
+                requeue=True,
+            )
+            if company is None:
+                persist.insert(
+                    db, crawler.company_rows(urn_id, payload["symbol"], data) + archived
+                )
+            self.commit(db, job_id)
+
+    def handle_people(self, job_id: int, payload: dict) -> None:
+        urn_id = payload["urn_id"]
+        with self.connections.transaction() as db:
+            company = db.get(models.Company, urn_id)
+            stored = company is not None
+            known = company.people_count if stored else None
+        found = 0
+        people = []
+        for page in crawler.iter_people(
+            self.api, payload["companies"], limit=self.people_cap
+        ):
+            found += len(page)
+            if known is None:
+                self.enqueue_people(payload, page)
+            else:
+                people.extend(page)
+        if stored and known == found:
+            logger.info("People of %s did not change", urn_id)
+            people = []
+        self.enqueue_people(payload, people)
+        with self.connections.transaction() as db:
+            company = db.get(models.Company, urn_id)
+            if company is not None:
+                company.people_count = found
+            self.commit(db, job_id)
+
+    def enqueue_people(self, payload: dict, people: list) -> None:
+        """
+        Enqueue the profile jobs of the new `people` of the people job `payload`
+        right away, then wait while more than `people_window` profile jobs are
+        pending.
+        """
+        new = [person for person in people if person["urn_id"] not in self.seen]
+        logger.debug("%d of %d people are new", len(new), len(people))
+        with self.connections.transaction() as db:
+            for person in new:
+                self.queue.using(db).enqueue(
+                    jobs.PROFILE,
+                    person["urn_id"],
+                    {
+                        "company": payload["urn_id"],
+                        "person": person,
+                        "priority": payload.get("priority", 0),
+                    },
+                )
+        self.notify()
+        while not self.budget.exhausted():
+            changes = self.changes
+            with self.connections.transaction() as db:
+                if self.queue.using(db).pending(jobs.PROFILE) < self.people_window:
+                    return
+            with self.lock:
+                if self.changes == changes:
+                    self.lock.wait(self.poll)
+
+    def handle_profile(self, job_id: int, payload: dict) -> None:
+        urn_id = payload["person"]["urn_id"]
+        if self.seen.stored(urn_id):
+            logger.debug("Skipping already stored person %s", urn_id)
+            with self.connections.transaction() as db:
+                self.commit(db, job_id)
+            return
+        start = time.monotonic()
+        with tracing.span("get_profile", "request", urn=urn_id) as span:
+            profile = crawler.fetch_profile(self.api, payload["person"])
+            if span:
+                span.set(bytes=tracing.size(profile))
+        busy = time.monotonic() - start
+        self.fetched.record(busy, self.stages.put((job_id, urn_id, profile)))
+
+    def parse_profile(self, item: tuple[int, str, dict]) -> tuple[int, str, list]:
+        job_id, urn_id, profile = item
+        with tracing.span("parse", urn=urn_id):
+            rows = crawler.profile_rows(profile, urn_id)
+            rows += self.archived(archive.PROFILE, urn_id, profile)
+            return job_id, urn_id, rows
+
+    def persist_profile(self, item: tuple[int, str, list]) -> None:
+        job_id, urn_id, rows = item
+        with tracing.span("persist", urn=urn_id):
+            if self.seen.stored(urn_id):
+                with self.connections.transaction() as db:
+                    self.commit(db, job_id)
+                return
+            self.writer.write(job_id, rows, on_commit=lambda: self.seen.add(urn_id))
+            # Profile workers out of jobs may be waiting for these to be done, so
+            # don't keep them buffered once nothing is queued behind them.
+            if self.waiting and self.persisting.inbox.empty():
+                self.writer.flush()
+
+    def archived(
+        self, endpoint: str, key: str, data: dict, **meta
+    ) -> list[tuple[type, dict]]:
+        if not self.archive_payloads:
+            return []
+        return [archive.row(endpoint, key, data, **meta)]
+
+    def stage_failed(self, item: tuple, error: Exception) -> None:
+        metrics.job_outcomes.inc(jobs.PROFILE, "failed")
+        self.settle([item[0]], lambda queue: queue.fail(item[0], repr(error)))
@@ -0,0 +1,203 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from datetime import timedelta
+
+from sqlalchemy import ARRAY
+from sqlalchemy import Boolean
+from sqlalchemy import DateTime
+from sqlalchemy import Float
+from sqlalchemy import func
+from sqlalchemy import Integer
+from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import models
+
+logger = get_logger("export")
+
+TABLES = [
+    models.Company,
+    models.Locations,
+    models.People,
+    models.Education,
+    models.Experience,
+]
+WATERMARK = "_watermark.json"
+PARTITION = "exported="
+
+
+def arrow():
+    """`pyarrow`, with its parquet module, imported on first use."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Exporting to Parquet needs the pyarrow package") from e
+    return pyarrow
+
+
+def arrow_type(pa, column_type):
+    if isinstance(column_type, ARRAY):
+        return pa.list_(arrow_type(pa, column_type.item_type))
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, String):
+        return pa.string()
+    raise TypeError(f"No Arrow type for {column_type!r}")
+
+
+def schema(model: type):
+    pa = arrow()
+    return pa.schema(
+        [
+            pa.field(column.name, arrow_type(pa, column.type), column.nullable)
+            for column in model.__table__.columns
+        ]
+    )
+
+
+def read_watermark(path: str) -> datetime | None:
+    try:
+        with open(os.path.join(path, WATERMARK)) as f:
+            return datetime.fromisoformat(json.load(f)["watermark"])
+    except FileNotFoundError:
+        return None
+
+
+def write_watermark(path: str, watermark: datetime) -> None:
+    tmp = os.path.join(path, f"{WATERMARK}.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"watermark": watermark.isoformat()}, f)
+    os.replace(tmp, os.path.join(path, WATERMARK))
+
+
+def export_table(
+    db: Session,
+    model: type,
+    directory: str,
+    incremental: bool = False,
+    overlap: float = 60,
+    chunk_size: int = 10_000,
+    row_group_size: int = 100_000,
+    file_rows: int = 1_000_000,
+    compression: str = "zstd",
+) -> dict:
+    """
+    Write the rows of `model` as Parquet files under `directory/<table>`, in a
+    partition `exported=<time>` of this export.
+
+    Rows are streamed from a server-side cursor `chunk_size` at a time and turned
+    into Arrow batches right away, so memory is bounded by the `row_group_size`
+    rows of a Parquet row group, held as columns. A new file is started every
+    `file_rows` rows. String columns are dictionary encoded.
+
+    A full export replaces the earlier partitions. An incremental one adds a
+    partition with the rows created or updated since the last export, starting
+    `overlap` seconds earlier to catch rows of transactions that were still open
+    then, so a row can appear in several partitions and the newest one wins. The
+    partition is renamed into place once complete, so readers never see half of
+    it.
+
+    Returns the rows and files written.
+    """
+    pa = arrow()
+    table = model.__tablename__
+    path = os.path.join(directory, table)
+    os.makedirs(path, exist_ok=True)
+    changed = func.greatest(model.created_at, model.updated_at)
+    watermark = db.execute(select(func.max(changed))).scalar()
+    since = read_watermark(path) if incremental else None
+    statement = select(*model.__table__.columns).where(changed <= watermark)
+    if since is not None:
+        statement = statement.where(changed > since - timedelta(seconds=overlap))
+
+    partition = PARTITION + datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    tmp = os.path.join(path, f".{partition}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    table_schema = schema(model)
+    strings = [
+        field.name
+        for field in table_schema
+        if pa.types.is_string(field.type) or pa.types.is_list(field.type)
+    ]
+    rows = files = 0
+    writer = None
+    batches: list = []
+
+    def write_group() -> None:
+        nonlocal writer, files
+        if writer is None or rows > files * file_rows:
+            if writer is not None:
+                writer.close()
+            writer = pa.parquet.ParquetWriter(
+                os.path.join(tmp, f"part-{files:05d}.parquet"),
+                table_schema,
+                compression=compression,
+                use_dictionary=strings,
+            )
+            files += 1
+        writer.write_table(pa.Table.from_batches(batches, schema=table_schema))
+        batches.clear()
+
+    result = db.execute(statement.execution_options(stream_results=True))
+    for chunk in result.partitions(chunk_size):
+        batches.append(
+            pa.RecordBatch.from_arrays(
+                [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(zip(*chunk), table_schema)
+                ],
+                schema=table_schema,
+            )
+        )
+        rows += len(chunk)
+        if sum(batch.num_rows for batch in batches) >= row_group_size:
+            write_group()
+    if batches:
+        write_group()
+    if writer is not None:
+        writer.close()
+
+    if files:
+        os.replace(tmp, os.path.join(path, partition))
+    else:
+        os.rmdir(tmp)
+    if not incremental:
+        for old in os.listdir(path):
+            if old.startswith(PARTITION) and old != partition:
+                shutil.rmtree(os.path.join(path, old))
+    if watermark is not None:
+        write_watermark(path, watermark)
+    logger.info("Exported %d rows of %s in %d files", rows, table, files)
+    return {"rows": rows, "files": files}
+
+
+def export(
+    db: Session,
+    directory: str,
+    incremental: bool = False,
+    chunk_size: int = 10_000,
+    **kwargs,
+) -> dict[str, dict]:
+    """
+    Export every crawled table to `directory` with `export_table`. Needs the
+    `pyarrow` package.
+    """
+    arrow()
+    return {
+        model.__tablename__: export_table(
+            db, model, directory, incremental, chunk_size=chunk_size, **kwargs
+        )
+        for model in TABLES
+    }
@@ -0,0 +1,343 @@
+import heapq
+import random
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import requests
+from sqlalchemy import inspect
+
+from linkedin import accounts
+from linkedin import jobs
+
+
+def _seed(text: str) -> int:
+    return zlib.adler32(text.encode())
+
+
+class FakeLinkedin:
+    """
+    In-memory stand-in for `linkedin_api.Linkedin` used by benchmarks.
+
+    Every call sleeps `latency` seconds to imitate an HTTP round-trip and returns a
+    deterministic payload shaped like the real one, so crawls are reproducible.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        people_per_company: int = 10,
+        shared_people: int = 0,
+    ):
+        """
+        Args:
+            latency: seconds every call takes
+
+            people_per_company: number of people `search_people` finds per company
+
+            shared_people: how many of them work for every company
+        """
+        self.latency = latency
+        self.people_per_company = people_per_company
+        self.shared_people = shared_people
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self) -> None:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    def search_companies(self, keywords: str | None = None, **kwargs) -> list:
+        self._request()
+        if not keywords:
+            return []
+        urn_id = str(_seed(keywords) % 10_000_000)
+        return [
+            {
+                "urn_id": urn_id,
+                "name": keywords,
+                "headline": f"{keywords} headline",
+                "subline": f"{keywords} subline",
+            }
+        ]
+
+    def get_company(self, public_id: str) -> dict:
+        self._request()
+        return {
+            "url": f"https://www.linkedin.com/company/{public_id}",
+            "staffCount": self.people_per_company,
+            "specialities": ["fake"],
+            "name": f"Company {public_id}",
+            "universalName": f"company-{public_id}",
+            "confirmedLocations": [
+                {
+                    "country": "US",
+                    "geographicArea": "NY",
+                    "city": "New York",
+                    "postalCode": "10001",
+                    "line1": "1 Fake St",
+                    "headquarter": True,
+                }
+            ],
+        }
+
+    def search_people(
+        self,
+        current_company: list | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        **kwargs,
+    ) -> list:
+        self._request()
+        company = (current_company or [""])[0]
+        end = self.people_per_company if limit is None else offset + limit
+        return [
+            {
+                "urn_id": f"shared-{i}" if i < self.shared_people else f"{company}-{i}",
+                "distance": "DISTANCE_3",
+                "name": f"Person {i}",
+            }
+            for i in range(offset, min(end, self.people_per_company))
+        ]
+
+    def get_profile(
+        self, public_id: str | None = None, urn_id: str | None = None
+    ) -> dict:
+        self._request()
+        seed = _seed(public_id or urn_id or "")
+        return {
+            "industryName": "Software",
+            "firstName": f"First{seed % 97}",
+            "lastName": f"Last{seed % 89}",
+            "student": False,
+            "geoCountryName": "United States",
+            "geoLocationName": "New York",
+            "education": [
+                {
+                    "schoolName": "Fake University",
+                    "degree": "BSc",
+                    "fieldOfStudy": "Computer Science",
+                    "timePeriod": {
+                        "startDate": {"year": 2000 + seed % 10},
+                        "endDate": {"year": 2004 + seed % 10},
+                    },
+                }
+            ],
+            "experience": [
+                {
+                    "companyName": "Fake Corp",
+                    "companyUrn": "urn:li:fs_miniCompany:1",
+                    "title": "Engineer",
+                    "geoLocationName": "New York",
+                    "timePeriod": {"startDate": {"year": 2005 + seed % 10}},
+                }
+            ],
+        }
+
+
+class ThrottlingLinkedin(FakeLinkedin):
+    """
+    `FakeLinkedin` that throttles like LinkedIn: calls slow down as more are in
+    flight, more than `capacity` at once get a 429 (`accounts.ThrottledError`),
+    and `error_rate` of the calls fail with a dropped connection.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        capacity: int = 4,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(latency, **kwargs)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.in_flight = 0
+        self.throttled = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+
+    def _request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.in_flight >= self.capacity:
+                self.throttled += 1
+                raise accounts.ThrottledError("429 Too Many Requests")
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                raise requests.ConnectionError("Connection reset by peer")
+            self.in_flight += 1
+            latency = self.latency * (1 + self.in_flight / self.capacity)
+        try:
+            time.sleep(latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeSession:
+    """Collects added objects instead of talking to a database."""
+
+    def __init__(self):
+        self.added: list = []
+
+    def add(self, instance) -> None:
+        self.added.append(instance)
+
+    def execute(self, statement, params: list[dict] | None = None) -> None:
+        self.added.extend(params or [])
+
+    def get(self, model, key):
+        column = inspect(model).primary_key[0].name
+        for instance in self.added:
+            if isinstance(instance, model) and getattr(instance, column) == key:
+                return instance
+        return None
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FakeDatabase:
+    """`database.Database` whose every session is the same `FakeSession`."""
+
+    def __init__(self, session: FakeSession | None = None):
+        self.fake = session if session is not None else FakeSession()
+
+    def session(self) -> FakeSession:
+        return self.fake
+
+    @contextmanager
+    def transaction(self) -> Iterator[FakeSession]:
+        yield self.fake
+
+
+class FakeQueue:
+    """In-memory, thread safe `jobs.JobQueue` without leases, for benchmarks."""
+
+    def __init__(self, max_attempts: int = 3, lease: int = 600):
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.jobs: dict[tuple[str, str], dict] = {}
+        self.by_id: dict[int, dict] = {}
+        # Ids of the pending jobs of each kind.
+        self.queued: dict[str, dict[int, None]] = {}
+        self.active = 0
+        self._lock = threading.RLock()
+
+    def _set_state(self, job: dict, state: str) -> None:
+        finished = (jobs.DONE, jobs.FAILED, jobs.DEFERRED)
+        self.active += (job["state"] in finished) - (state in finished)
+        self.queued.setdefault(job["kind"], {}).pop(job["id"], None)
+        if state == jobs.PENDING:
+            self.queued[job["kind"]][job["id"]] = None
+        job["state"] = state
+
+    def using(self, db) -> "FakeQueue":
+        return self
+
+    def enqueue(
+        self, kind: str, key: str, payload: dict, requeue: bool = False
+    ) -> None:
+        with self._lock:
+            if (kind, key) not in self.jobs:
+                job = {
+                    "id": len(self.jobs),
+                    "kind": kind,
+                    "payload": payload,
+                    "priority": payload.get("priority", 0),
+                    "state": jobs.DONE,
+                    "attempts": 0,
+                }
+                self.jobs[kind, key] = self.by_id[job["id"]] = job
+                self._set_state(job, jobs.PENDING)
+                return
+            job = self.jobs[kind, key]
+            if requeue and job["state"] != jobs.IN_PROGRESS:
+                job.update(
+                    payload=payload, priority=payload.get("priority", 0), attempts=0
+                )
+                self._set_state(job, jobs.PENDING)
+
+    def seed(
+        self,
+        issuers: list[tuple[list[str], str]],
+        priorities: dict[str, float] | None = None,
+    ) -> None:
+        priorities = priorities or {}
+        for symbols, name in issuers:
+            self.enqueue(
+                jobs.STOCK,
+                symbols[0],
+                {
+                    "symbol": symbols[0],
+                    "symbols": symbols,
+                    "name": name,
+                    "priority": max(priorities.get(s, 0) for s in symbols),
+                },
+            )
+
+    def claim(self, kinds: list[str], limit: int = 1) -> list[tuple[int, str, dict]]:
+        with self._lock:
+            for kind in kinds:
+                claimed = []
+                for job_id in heapq.nsmallest(
+                    limit,
+                    self.queued.get(kind, {}),
+                    key=lambda job_id: (-self.by_id[job_id]["priority"], job_id),
+                ):
+                    job = self.by_id[job_id]
+                    self._set_state(job, jobs.IN_PROGRESS)
+                    job["attempts"] += 1
+                    claimed.append((job["id"], job["kind"], job["payload"]))
+                if claimed:
+                    return claimed
+            return []
+
+    def heartbeat(self) -> None:
+        pass
+
+    def complete(self, job_id: int) -> bool:
+        with self._lock:
+            self._set_state(self.by_id[job_id], jobs.DONE)
+            return True
+
+    def complete_many(self, job_ids: list[int]) -> set[int]:
+        return {job_id for job_id in job_ids if self.complete(job_id)}
+
+    def fail(self, job_id: int, error: str) -> None:
+        with self._lock:
+            job = self.by_id[job_id]
+            failed = job["attempts"] >= self.max_attempts
+            self._set_state(job, jobs.FAILED if failed else jobs.PENDING)
+
+    def defer(self, job_id: int) -> None:
+        with self._lock:
+            job = self.by_id[job_id]
+            self._set_state(job, jobs.DEFERRED)
+            job["attempts"] -= 1
+
+    def release(self, job_ids: list[int]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                job = self.by_id[job_id]
+                self._set_state(job, jobs.PENDING)
+                job["attempts"] -= 1
+
+    def pending(self, kind: str) -> int:
+        with self._lock:
+            return len(self.queued.get(kind, {}))
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self.active == 0
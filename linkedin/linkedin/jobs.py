@@ -0,0 +1,284 @@
+import copy
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import models
+
+logger = get_logger("jobs")
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DEFERRED = "deferred"
+DONE = "done"
+FAILED = "failed"
+
+STOCK = "stock"
+COMPANY = "company"
+PEOPLE = "people"
+PROFILE = "profile"
+KINDS = [STOCK, COMPANY, PEOPLE, PROFILE]
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """
+    Durable crawl queue backed by the `job` table.
+
+    A stock job resolves the company, a company job stores it, a people job
+    searches its employees and a profile job stores one person. Each job enqueues
+    the next stage, so the crawl can be resumed from the table at any point. Jobs
+    are claimed in batches with `SELECT ... FOR UPDATE SKIP LOCKED`, so several
+    processes or hosts can share the table without claiming the same job. A
+    claimed job is leased to `worker` until `heartbeat` stops renewing it; a job
+    whose lease expired (its worker died) can be claimed again, and a failed job is
+    retried until `max_attempts`. A deferred job could not run without network
+    access (see `cache.CachedApi`) and is only claimed when `claim_deferred` is set.
+    Jobs are claimed highest `priority` first, taken from their payload.
+
+    `enqueue`, `complete` and `complete_many` don't commit, so callers can commit
+    them together with the rows the job produced, in a session of their own bound
+    with `using`. `requeue`, `seed`, `claim`, `heartbeat`, `fail`, `defer` and
+    `release` commit their session themselves: a claim must not hold its row locks
+    any longer, and the others settle jobs whatever the caller does next. Anything
+    else pending in that session is committed with them, so call them on a session
+    of their own too.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        lease: int = 600,
+        max_attempts: int = 3,
+        worker: str | None = None,
+        claim_deferred: bool = True,
+    ):
+        self.db = db
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.worker = worker or worker_id()
+        self.claimable = [PENDING, DEFERRED] if claim_deferred else [PENDING]
+
+    def using(self, db: Session) -> "JobQueue":
+        """This worker's queue through `db`, e.g. the session of a unit of work."""
+        queue = copy.copy(self)
+        queue.db = db
+        return queue
+
+    def enqueue(
+        self, kind: str, key: str, payload: dict, requeue: bool = False
+    ) -> None:
+        """
+        Args:
+            requeue: run the job again if it already exists, instead of ignoring it
+        """
+        priority = payload.get("priority", 0)
+        statement = insert(models.Job).values(
+            kind=kind,
+            key=key,
+            payload=payload,
+            state=PENDING,
+            attempts=0,
+            priority=priority,
+        )
+        if requeue:
+            statement = statement.on_conflict_do_update(
+                index_elements=["kind", "key"],
+                set_={
+                    "payload": payload,
+                    "state": PENDING,
+                    "attempts": 0,
+                    "priority": priority,
+                },
+                where=models.Job.state != IN_PROGRESS,
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=["kind", "key"])
+        self.db.execute(statement)
+
+    def requeue(self, kind: str, keys: list[str]) -> None:
+        self.db.query(models.Job).filter(
+            models.Job.kind == kind,
+            models.Job.key.in_(keys),
+            models.Job.state != IN_PROGRESS,
+        ).update({"state": PENDING, "attempts": 0}, synchronize_session=False)
+        self.db.commit()
+
+    def seed(
+        self,
+        issuers: list[tuple[list[str], str]],
+        priorities: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Enqueue a stock job per issuer, see `raw_stocks.by_issuer`. An issuer has
+        the highest of its symbols' `priorities`, see `schedule.priorities`.
+        """
+        logger.info("Seeding %d issuers", len(issuers))
+        priorities = priorities or {}
+        for symbols, name in issuers:
+            self.enqueue(
+                STOCK,
+                symbols[0],
+                {
+                    "symbol": symbols[0],
+                    "symbols": symbols,
+                    "name": name,
+                    "priority": max(priorities.get(s, 0) for s in symbols),
+                },
+            )
+        self.db.commit()
+
+    def claim(self, kinds: list[str], limit: int = 1) -> list[tuple[int, str, dict]]:
+        """
+        Claim up to `limit` of the available jobs of the first kind in `kinds` that
+        has any, highest priority then oldest first.
+        """
+        for kind in kinds:
+            claimed = (
+                self.db.query(models.Job)
+                .filter(
+                    models.Job.kind == kind,
+                    or_(
+                        models.Job.state.in_(self.claimable),
+                        (models.Job.state == IN_PROGRESS)
+                        & (models.Job.lease_until < func.now()),
+                    ),
+                )
+                .order_by(models.Job.priority.desc(), models.Job.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not claimed:
+                continue
+            for job in claimed:
+                if job.state == IN_PROGRESS:
+                    logger.warning(
+                        "Reclaiming %s job %s from %s", kind, job.key, job.worker
+                    )
+                job.state = IN_PROGRESS
+                job.worker = self.worker
+                job.attempts += 1
+                job.lease_until = func.now() + timedelta(seconds=self.lease)
+            result = [(job.id, job.kind, job.payload) for job in claimed]
+            self.db.commit()
+            logger.debug("Claimed %d %s jobs", len(result), kind)
+            return result
+        return []
+
+    def heartbeat(self) -> None:
+        """Renew the lease of every job this worker holds."""
+        self.db.query(models.Job).filter(
+            models.Job.worker == self.worker, models.Job.state == IN_PROGRESS
+        ).update(
+            {"lease_until": func.now() + timedelta(seconds=self.lease)},
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+    def complete(self, job_id: int) -> bool:
+        """
+        Returns:
+            False if the job was reclaimed by another worker meanwhile, in which case
+            the caller should roll back instead of committing.
+        """
+        return job_id in self.complete_many([job_id])
+
+    def complete_many(self, job_ids: list[int]) -> set[int]:
+        """Returns the ids of the jobs still held by this worker and now done."""
+        return {job_id for job_id, in self.db.execute(self.completing(job_ids))}
+
+    def completing(self, job_ids: list[int]):
+        """
+        The statement of `complete_many`, returning the ids of the completed jobs,
+        for a session of the async driver.
+        """
+        return (
+            update(models.Job)
+            .where(
+                models.Job.id.in_(job_ids),
+                models.Job.worker == self.worker,
+                models.Job.state == IN_PROGRESS,
+            )
+            .values(state=DONE, lease_until=None, error=None)
+            .returning(models.Job.id)
+        )
+
+    def fail(self, job_id: int, error: str) -> None:
+        job = self.db.get(models.Job, job_id)
+        if job.worker != self.worker or job.state != IN_PROGRESS:
+            logger.warning("Lost %s job %s to %s", job.kind, job.key, job.worker)
+            return
+        job.state = FAILED if job.attempts >= self.max_attempts else PENDING
+        job.lease_until = None
+        job.error = error
+        self.db.commit()
+        logger.warning("%s job %s failed (%s): %s", job.kind, job.key, job.state, error)
+
+    def defer(self, job_id: int) -> None:
+        """Put the job aside without counting the attempt."""
+        updated = (
+            self.db.query(models.Job)
+            .filter(
+                models.Job.id == job_id,
+                models.Job.worker == self.worker,
+                models.Job.state == IN_PROGRESS,
+            )
+            .update(
+                {
+                    "state": DEFERRED,
+                    "lease_until": None,
+                    "attempts": models.Job.attempts - 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            self.db.commit()
+
+    def release(self, job_ids: list[int]) -> None:
+        """Give claimed jobs back to the queue without counting the attempt."""
+        updated = (
+            self.db.query(models.Job)
+            .filter(
+                models.Job.id.in_(job_ids),
+                models.Job.worker == self.worker,
+                models.Job.state == IN_PROGRESS,
+            )
+            .update(
+                {
+                    "state": PENDING,
+                    "lease_until": None,
+                    "attempts": models.Job.attempts - 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            self.db.commit()
+
+    def pending(self, kind: str) -> int:
+        return (
+            self.db.query(models.Job.id)
+            .filter(models.Job.kind == kind, models.Job.state.in_(self.claimable))
+            .count()
+        )
+
+    def idle(self) -> bool:
+        return (
+            self.db.query(models.Job.id)
+            .filter(models.Job.state.in_([*self.claimable, IN_PROGRESS]))
+            .first()
+            is None
+        )
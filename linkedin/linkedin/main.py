@@ -1,110 +1,30 @@
 import argparse
-from logging import DEBUG
+from datetime import timedelta
 
 from dynaconf import Dynaconf
 from dynaconf import Validator
 from linkedin_api import Linkedin
-from requests.cookies import cookiejar_from_dict
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-from sqlalchemy.orm import sessionmaker
 
 from glogger import getLogger as get_logger
-from linkedin import models
+from linkedin import accounts
+from linkedin import archive
+from linkedin import cache
+from linkedin import crawler
+from linkedin import database
+from linkedin import engine
+from linkedin import export
+from linkedin import jobs
+from linkedin import metrics
+from linkedin import mock_server
 from linkedin import raw_stocks
+from linkedin import refresh
+from linkedin import resolve
+from linkedin import schedule
+from linkedin import seen
+from linkedin import tracing
 
 
-def get_db(settings: Dynaconf) -> Session:
-    info = {
-        "host": settings.db_host,
-        "port": settings.db_port,
-        "db": settings.db_name,
-        "user": settings.db_user,
-        "pw": settings.db_password,
-    }
-    sqlalchemy_database_url = (
-        "postgresql://%(user)s:%(pw)s@%(host)s:%(port)s/%(db)s" % info
-    )
-    engine = create_engine(sqlalchemy_database_url)
-    local_session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return local_session()
-
-
-logger = get_logger("main", level=DEBUG)
-
-suffix = [
-    "Class A",
-    "Global Limited",
-    "Common Stock,",
-    "Class A Common Stock,",
-    "Agile Growth Corp. Warrant.",
-    "Warrant",
-    "Common Shares",
-    "Acquisition",
-    "SAIL Warrant.",
-    "(Canada)",
-    "(Bermuda)",
-    "S.A.",
-    "N.V. Common Stock",
-    "(Holding Company) Common Stock",
-    "Class A Common Stock New",
-    "Class A Ordinary Shares",
-    "PLC Ordinary Shares",
-    "Ordinary Share",
-    "Class A Common Stock",
-    "(The) Common Stock",
-    "Common Stock",
-    "ADS",
-    "ASA",
-    "SE",
-    "SA American Depositary Shares",
-    "SA",
-    "AG",
-    "S.A. Sponsored ADR (Spain)",
-    "Limited American Depositary Shares",
-    "Class A Subordinate Voting Shares",
-    "Depositary Shares",
-    "PLC Common Stock",
-    "(REIT)",
-    "REIT",
-    "American Depositary Shares",
-    "(",
-    "Corporation Class A Common Stock",
-]
-suffix = list(sorted(suffix, key=lambda x: len(x), reverse=True))
-# to_del = list(map(str.lower, to_del))
-# suffix = list(map(str.lower, suffix))
-
-puncs = [
-    ",",
-    ".",
-    "(",
-    ")",
-]
-
-
-def clean(name: str) -> str:
-    name = name.strip()
-    for p in puncs:
-        name = name.replace(p, "").strip()
-    return name
-
-
-def clean_name(name: str) -> str:
-    name = clean(name)
-    for s in suffix:
-        idx = name.find(s)
-        if idx != -1:
-            name = clean(name[:idx])
-    name = name.lower()
-    for s in suffix:
-        s = s.lower()
-        if len(s) >= 5:
-            idx = name.find(s)
-            if idx != -1:
-                name = clean(name[:idx])
-    name = clean(name)
-    return name
+logger = get_logger("main")
 
 
 def parse() -> tuple[argparse.Namespace, Dynaconf]:
@@ -115,6 +35,57 @@ def parse() -> tuple[argparse.Namespace, Dynaconf]:
     parser.add_argument(
         "--cookie", action="store_true", help="Just show cookie and exit", default=False
     )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Only work on already queued jobs, don't seed stocks",
+        default=False,
+    )
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="Crawl only from cached responses, without any request",
+        default=False,
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Also refresh companies older than `refresh_age_days`",
+        default=False,
+    )
+    parser.add_argument(
+        "--mock",
+        type=str,
+        help="Crawl a mock LinkedIn server at this url (see `mock_server`)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write a Chrome trace of the crawl (chrome://tracing, Perfetto) here",
+    )
+    parser.add_argument(
+        "--reprocess",
+        action="store_true",
+        help="Rebuild the crawled tables from archived payloads and exit",
+        default=False,
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reprocess even if rows were stored without their payloads",
+        default=False,
+    )
+    parser.add_argument(
+        "--export",
+        type=str,
+        help="Export the crawled tables as Parquet files to this directory and exit",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Export only rows created or updated since the last export",
+        default=False,
+    )
     args = parser.parse_args()
     config_path = args.config
     logger.info("config path: %s", config_path)
@@ -127,10 +98,55 @@ def parse() -> tuple[argparse.Namespace, Dynaconf]:
             Validator("db_name", is_type_of=str),
             Validator("db_user", is_type_of=str),
             Validator("db_password", is_type_of=str),
+            # 0 sizes the pool from the worker counts, see `Database.from_settings`
+            Validator("db_pool_size", is_type_of=int, default=0),
+            Validator("db_max_overflow", is_type_of=int, default=0),
+            Validator("db_pool_timeout", is_type_of=(int, float), default=30),
+            Validator("db_statement_timeout", is_type_of=(int, float), default=60),
+            Validator("db_async", is_type_of=bool, default=False),
             Validator("linkedin_username", is_type_of=str),
             Validator("linkedin_password", is_type_of=str),
             Validator("linkedin_jsessionip", is_type_of=str),
             Validator("linkedin_li_at", is_type_of=str),
+            Validator("company_workers", is_type_of=int, default=4),
+            Validator("person_workers", is_type_of=int, default=16),
+            Validator("parse_workers", is_type_of=int, default=2),
+            Validator("persist_workers", is_type_of=int, default=1),
+            Validator("stage_size", is_type_of=int, default=100),
+            Validator("linkedin_accounts", is_type_of=list, default=[]),
+            Validator("account_rate", is_type_of=(int, float), default=0.5),
+            Validator("account_burst", is_type_of=(int, float), default=5),
+            Validator("account_cooldown", is_type_of=(int, float), default=300),
+            Validator("account_concurrency", is_type_of=int, default=8),
+            Validator("account_retries", is_type_of=int, default=3),
+            Validator("backoff_base", is_type_of=(int, float), default=1),
+            Validator("backoff_cap", is_type_of=(int, float), default=60),
+            Validator("latency_target", is_type_of=(int, float), default=5),
+            Validator("breaker_window", is_type_of=int, default=20),
+            Validator("breaker_error_rate", is_type_of=(int, float), default=0.5),
+            Validator("breaker_cooldown", is_type_of=(int, float), default=120),
+            Validator("job_lease", is_type_of=int, default=600),
+            Validator("job_max_attempts", is_type_of=int, default=3),
+            Validator("job_batch", is_type_of=int, default=10),
+            Validator("cache_dir", is_type_of=str, default="/var/tmp/linkedin-cache"),
+            Validator("cache_size_mb", is_type_of=int, default=2048),
+            Validator("cache_ttl", is_type_of=dict, default={}),
+            Validator("refresh_age_days", is_type_of=(int, float), default=7),
+            Validator("db_batch", is_type_of=int, default=1000),
+            Validator("people_window", is_type_of=int, default=200),
+            Validator("people_cap", is_type_of=int, default=0),
+            Validator("resolve_threshold", is_type_of=(int, float), default=0.8),
+            Validator(
+                "priority",
+                is_in=["market_cap", "staleness", "none"],
+                default="market_cap",
+            ),
+            Validator("request_budget", is_type_of=int, default=0),
+            Validator("deadline_minutes", is_type_of=(int, float), default=0),
+            Validator("metrics_port", is_type_of=int, default=0),
+            Validator("archive_payloads", is_type_of=bool, default=True),
+            Validator("export_chunk", is_type_of=int, default=10_000),
+            Validator("log_rate", is_type_of=(int, float), default=10),
         ],
     )
     settings.validators.validate()
@@ -140,162 +156,65 @@ def parse() -> tuple[argparse.Namespace, Dynaconf]:
 def get_api(settings: Dynaconf) -> Linkedin:
     if settings.get("linkedin_jsessionip", False):
         logger.info("Using cookies")
-        cookies = cookiejar_from_dict(
-            {
-                "liap": "true",
-                "li_at": settings.linkedin_li_at,
-                "JSESSIONID": settings.linkedin_jsessionip,
-            }
-        )
-        api = Linkedin("", "", cookies=cookies)
+        api = accounts.cookie_api(settings.linkedin_li_at, settings.linkedin_jsessionip)
     else:
         logger.info("Using username and pass")
         logger.warning("It's better to use cookie to avoid login multiple times")
         api = Linkedin(settings.linkedin_username, settings.linkedin_password)
-    return api
-
-
-def find_company(api: Linkedin, name: str) -> dict | None:
-    name = clean_name(name)
-    companies = api.search_companies(name, limit=10)
-    if not len(companies):
-        logger.error("Could not find company %s", name)
-        return None
-    company = companies[0]
-    logger.info(
-        "Found company (for %s) --- name: %s --- headline: %s --- subline: %s",
-        name,
-        company["name"],
-        company["headline"],
-        company["subline"],
-    )
-    return company
-
-
-def find_people(api: Linkedin, urn_id: str, data: dict) -> list:
-    companies_urn = [urn_id]
-    if "affiliatedCompaniesResolutionResults" in data:
-        companies_urn.extend(
-            [
-                x["entityUrn"].split(":")[-1]
-                for x in list(data["affiliatedCompaniesResolutionResults"].values())
-            ]
-        )
-    logger.debug("%d affiliated companies", len(companies_urn))
-    people = api.search_people(
-        current_company=companies_urn, include_private_profiles=False
-    )
-    logger.info("Found %d people", len(people))
-    return people
-
-
-def add_locations(db: Session, urn_id: str, locations: list) -> None:
-    logger.debug("Adding locations")
-    for loc in locations:
-        logger.debug("Loc:\n%s", loc)
-        db.add(
-            models.Locations(
-                company_urn_id=urn_id,
-                country=loc["country"],
-                geographic_area=loc.get("geographicArea", None),
-                city=loc["city"],
-                postal_code=loc.get("postalCode", None),
-                line=loc.get("line1", None),
-                headquarter=loc["headquarter"],
+    return accounts.watch_throttle(api)
+
+
+def get_apis(settings: Dynaconf, mock: str | None = None) -> list[Linkedin]:
+    if mock:
+        logger.info("Using the mock LinkedIn at %s", mock)
+        return [mock_server.MockLinkedin(mock)]
+    apis = [get_api(settings)]
+    for cookie in settings.linkedin_accounts:
+        apis.append(accounts.cookie_api(cookie["li_at"], cookie["jsessionip"]))
+    return apis
+
+
+def get_pool(settings: Dynaconf, apis: list[Linkedin]) -> accounts.AccountPool:
+    logger.info("Using %d accounts", len(apis))
+    return accounts.AccountPool(
+        [
+            accounts.Account(
+                f"account-{i}",
+                account_api,
+                accounts.TokenBucket(settings.account_rate, settings.account_burst),
+                accounts.AIMD(
+                    maximum=settings.account_concurrency,
+                    latency_target=settings.latency_target,
+                ),
+                accounts.CircuitBreaker(
+                    window=settings.breaker_window,
+                    error_rate=settings.breaker_error_rate,
+                    cooldown=settings.breaker_cooldown,
+                ),
             )
-        )
-    # db.commit()
-
-
-def handle_experience(db: Session, exp: dict):
-    tp = exp.get("timePeriod", None)
-    start = tp.get("startDate", None) if tp else None
-    end = tp.get("endDate", None) if tp else None
-    logger.debug("Exp:\n%s", exp)
-    db.add(
-        models.Experience(
-            location=exp.get("geoLocationName", None),
-            company_name=exp["companyName"],
-            company_urn=exp["companyUrn"].split(":")[-1]
-            if "companyUrn" in exp
-            else None,
-            title=exp["title"],
-            start=start,
-            end=end,
-        )
-    )
-
-
-def handle_education(db: Session, edu: dict):
-    tp = edu.get("timePeriod", None)
-    start = tp.get("startDate", None) if tp else None
-    end = tp.get("endDate", None) if tp else None
-    logger.debug("Edu:\n%s", edu)
-    db.add(
-        models.Education(
-            degree=edu.get("degree", None),
-            activities=edu.get("activities", None),
-            name=edu["schoolName"],
-            field=edu.get("fieldOfStudy", None),
-            start=start,
-            end=end,
-        )
-    )
-
-
-def handle_person(person: dict, api: Linkedin, db: Session) -> None:
-    logger.debug("Getting info of %s", person)
-    profile = api.get_profile(urn_id=person["urn_id"])
-    logger.debug("data:\n%s", profile)
-    db.add(
-        models.People(
-            industry_name=profile.get("industryName", None),
-            first_name=profile["firstName"],
-            last_name=profile["lastName"],
-            student=profile["student"],
-            country=profile["geoCountryName"],
-            city=profile.get("geoLocationName", None),
-        )
+            for i, account_api in enumerate(apis)
+        ],
+        cooldown=settings.account_cooldown,
+        retries=settings.account_retries,
+        backoff=accounts.Backoff(settings.backoff_base, settings.backoff_cap),
     )
-    logger.debug("data: %s", profile["education"])
-    for edu in profile["education"]:
-        handle_education(db, edu)
-    logger.debug("data: %s", profile["experience"])
-    for exp in profile["experience"]:
-        handle_experience(db, exp)
 
 
-def handle_stock(db: Session, api: Linkedin, symbol: str, name: str) -> None:
-    logger.info("symbol: %s, name: %s", symbol, name)
-    company = find_company(api, name)
-    if not company:
-        return
-    urn_id = company["urn_id"]
-    data = api.get_company(urn_id)
-    logger.debug("Adding new company")
-    db.add(
-        models.Company(
-            urn_id=urn_id,
-            url=data["url"],
-            staff_count=data["staffCount"],
-            specialities=data["specialities"],
-            name=data["universalName"],
-            symbol=symbol,
-        )
+def get_cache(settings: Dynaconf) -> cache.ResponseCache:
+    return cache.ResponseCache(
+        settings.cache_dir,
+        ttls=dict(settings.cache_ttl),
+        max_bytes=settings.cache_size_mb * 1024 * 1024,
     )
-    # db.commit()
-    add_locations(db, urn_id, data["confirmedLocations"])
-    people = find_people(api, company["urn_id"], data)
-    for person in people:
-        handle_person(person, api, db)
-    # db.commit()
 
 
 def main():
     args, settings = parse()
-    db = get_db(settings)
-    api = get_api(settings)
+    crawler.limit_logging(settings.log_rate)
+    connections = database.Database.from_settings(settings)
+    db = connections.session()
     if args.cookie:
+        api = get_api(settings)
         print("-----------------------")
         print(
             f"li_at:      {api.client.session.cookies.get('li_at')}\n"
@@ -303,9 +222,91 @@ def main():
         )
         print("-----------------------")
         exit(0)
-    stocks = raw_stocks.get_raw_stocks()
-    for symbol, name in stocks[30:40]:
-        handle_stock(db, api, symbol, name)
+    if args.reprocess or args.export:
+        if args.reprocess:
+            archive.reprocess(db, batch_size=settings.db_batch, force=args.force)
+        if args.export:
+            export.export(
+                db,
+                args.export,
+                incremental=args.incremental,
+                chunk_size=settings.export_chunk,
+            )
+        db.close()
+        connections.dispose()
+        exit(0)
+    if settings.metrics_port:
+        metrics.serve(settings.metrics_port)
+    response_cache = get_cache(settings)
+    budget = schedule.Budget(
+        requests=settings.request_budget or None,
+        deadline=settings.deadline_minutes * 60 or None,
+    )
+    pool = None
+    if args.cache_only:
+        logger.info("Crawling from cache only")
+        api = cache.CachedApi(None, response_cache)
+    else:
+        pool = get_pool(settings, get_apis(settings, args.mock))
+        api = cache.CachedApi(schedule.BudgetedApi(pool, budget), response_cache)
+    queue = jobs.JobQueue(
+        db,
+        lease=settings.job_lease,
+        max_attempts=settings.job_max_attempts,
+        claim_deferred=not args.cache_only,
+    )
+    if not args.worker:
+        rows = raw_stocks.get_stock_rows()
+        priorities = schedule.priorities(settings.priority, rows, db)
+        queue.seed(raw_stocks.by_issuer(raw_stocks.get_raw_stocks()), priorities)
+        if args.refresh:
+            refresh.requeue_stale(
+                db, queue, timedelta(days=settings.refresh_age_days), priorities
+            )
+    seen_set = seen.SeenSet(connections)
+    seen_set.warm()
+    company_index = resolve.CompanyIndex(
+        connections, threshold=settings.resolve_threshold
+    )
+    company_index.warm()
+    crawl_engine = engine.Engine(
+        connections,
+        api,
+        queue,
+        company_workers=settings.company_workers,
+        person_workers=settings.person_workers,
+        parse_workers=settings.parse_workers,
+        persist_workers=settings.persist_workers,
+        stage_size=settings.stage_size,
+        batch=settings.job_batch,
+        seen_set=seen_set,
+        write_batch=settings.db_batch,
+        people_window=settings.people_window,
+        people_cap=settings.people_cap or None,
+        index=company_index,
+        budget=budget,
+        archive_payloads=settings.archive_payloads,
+        async_writes=settings.db_async,
+    )
+    if args.trace:
+        tracing.tracer.start()
+    try:
+        crawl_engine.run()
+    finally:
+        if args.trace:
+            tracing.tracer.stop()
+            tracing.tracer.write(args.trace)
+    logger.info("Company index hits: %s", company_index.stats())
+    logger.info("Budget: %s", budget.summary())
+    if pool is not None:
+        logger.info("Accounts: %s", pool.stats())
+    logger.info(
+        "Pending jobs: %s",
+        {kind: queue.pending(kind) for kind in jobs.KINDS},
+    )
+    logger.info("Cache stats: %s", response_cache.stats())
+    db.close()
+    connections.dispose()
 
 
 # https://github.com/tomquirk/linkedin-api
@@ -0,0 +1,261 @@
+import bisect
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from glogger import getLogger as get_logger
+
+logger = get_logger("metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """
+    A metric family in the Prometheus text format, one child per combination of
+    `labels` values.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}")
+        values = tuple(str(v) for v in values)
+        with self._lock:
+            if values not in self.children:
+                self.children[values] = self.child()
+            return self.children[values]
+
+    def child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} {self.kind}",
+            ]
+            lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def child(self) -> Value:
+        return Value()
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self.labels(*values).inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self.children.items():
+            labels = _labels(self.label_names, values)
+            yield f"{self.name}_total{labels} {_number(child.value)}"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def child(self) -> Value:
+        return Value()
+
+    def set(self, *values: str, value: float) -> None:
+        self.labels(*values).set(value)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self.children.items():
+            labels = _labels(self.label_names, values)
+            yield f"{self.name}{labels} {_number(child.value)}"
+
+
+class Buckets:
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def child(self) -> Buckets:
+        return Buckets(self.buckets)
+
+    def observe(self, *values: str, value: float) -> None:
+        self.labels(*values).observe(value)
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*values, value=time.perf_counter() - start)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self.children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _labels(self.label_names, values, le=_number(bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_number(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+requests = REGISTRY.register(
+    Counter(
+        "linkedin_requests",
+        "LinkedIn calls by endpoint, account and outcome",
+        ("endpoint", "account", "outcome"),
+    )
+)
+request_seconds = REGISTRY.register(
+    Histogram(
+        "linkedin_request_seconds",
+        "Latency of LinkedIn calls by endpoint, account and outcome",
+        ("endpoint", "account", "outcome"),
+    )
+)
+cache_lookups = REGISTRY.register(
+    Counter(
+        "linkedin_cache_lookups",
+        "Response cache lookups by endpoint and result (hit or miss)",
+        ("endpoint", "result"),
+    )
+)
+job_outcomes = REGISTRY.register(
+    Counter(
+        "linkedin_jobs",
+        "Jobs handled by kind and outcome (done, failed, deferred or released)",
+        ("kind", "outcome"),
+    )
+)
+queue_depth = REGISTRY.register(
+    Gauge("linkedin_queue_depth", "Pending jobs by kind", ("kind",))
+)
+db_rows = REGISTRY.register(
+    Counter("linkedin_db_rows", "Rows written in bulk by table", ("table",))
+)
+db_flush_seconds = REGISTRY.register(
+    Histogram("linkedin_db_flush_seconds", "Latency of bulk writer flushes")
+)
+stage_items = REGISTRY.register(
+    Counter("linkedin_stage_items", "Items through each pipeline stage", ("stage",))
+)
+stage_seconds = REGISTRY.register(
+    Counter(
+        "linkedin_stage_busy_seconds",
+        "Seconds pipeline stage workers spent working",
+        ("stage",),
+    )
+)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `REGISTRY` on `http://host:port/metrics` from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics")
+    thread.daemon = True
+    thread.start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
@@ -0,0 +1,460 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from linkedin_api import Linkedin
+
+from glogger import getLogger as get_logger
+from linkedin import accounts
+
+logger = get_logger("mock_server")
+
+SEARCH_PATH = "/voyager/api/graphql"
+COMPANY_PATH = "/voyager/api/organization/companies"
+PROFILE_PATH = re.compile(r"/voyager/api/identity/profiles/([^/]+)/profileView")
+
+CITIES = [
+    ("United States", "New York", "NY", "10001"),
+    ("United States", "San Francisco", "CA", "94105"),
+    ("United States", "Austin", "TX", "78701"),
+    ("United Kingdom", "London", "England", "EC2A"),
+    ("Germany", "Berlin", "Berlin", "10115"),
+    ("India", "Bengaluru", "Karnataka", "560001"),
+    ("Canada", "Toronto", "Ontario", "M5H"),
+]
+TITLES = ["Software Engineer", "Analyst", "Product Manager", "Sales", "Director"]
+SCHOOLS = ["State University", "Institute of Technology", "Business School"]
+FIELDS = ["Computer Science", "Finance", "Economics", "Marketing", "Physics"]
+FIRST_NAMES = ["Alex", "Sam", "Maria", "Wei", "Priya", "John", "Fatima", "Lukas"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Müller", "Khan", "Brown"]
+
+
+def _seed(text: str) -> int:
+    return zlib.adler32(text.encode())
+
+
+class Latency:
+    """
+    Response time distribution of the mock server, `mean` seconds on average.
+
+    Args:
+        kind: `"fixed"`, `"uniform"` (0 to twice the mean), `"exponential"` or
+            `"lognormal"` (long tailed, with shape `sigma`)
+    """
+
+    def __init__(self, kind: str = "lognormal", mean: float = 0.05, sigma: float = 0.8):
+        if kind not in ("fixed", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        self.kind = kind
+        self.mean = mean
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        if self.mean <= 0:
+            return 0.0
+        if self.kind == "fixed":
+            return self.mean
+        if self.kind == "uniform":
+            return rng.uniform(0, 2 * self.mean)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.mean)
+        mu = math.log(self.mean) - self.sigma**2 / 2
+        return rng.lognormvariate(mu, self.sigma)
+
+
+class MockLinkedinData:
+    """
+    Deterministic synthetic LinkedIn: the same company, people and profiles are
+    generated for the same ids, shaped like the voyager API's responses.
+    """
+
+    def __init__(self, max_people: int = 50, page_size: int = 10):
+        """
+        Args:
+            max_people: most people a company search finds, whatever its staff
+
+            page_size: search results per page
+        """
+        self.max_people = max_people
+        self.page_size = page_size
+
+    def company_urn(self, keywords: str) -> str:
+        return str(_seed(keywords) % 10_000_000)
+
+    def staff_count(self, urn_id: str) -> int:
+        return int(10 ** (1 + _seed(urn_id) % 400 / 100))
+
+    def search_companies(self, keywords: str, start: int) -> list[dict]:
+        names = [keywords] + [f"{keywords} {suffix}" for suffix in ("Group", "Labs")]
+        return [
+            {
+                "_type": "com.linkedin.voyager.dash.search.EntityResultViewModel",
+                "entityUrn": "urn:li:fsd_entityResultViewModel:"
+                f"(urn:li:fsd_company:{self.company_urn(name)},SEARCH_SRP,DEFAULT)",
+                "trackingUrn": f"urn:li:company:{self.company_urn(name)}",
+                "title": {"text": name},
+                "primarySubtitle": {"text": "Financial Services • New York, NY"},
+                "secondarySubtitle": {"text": f"{self.staff_count(name)} followers"},
+            }
+            for name in names[start:]
+        ]
+
+    def people(self, companies: list[str]) -> list[tuple[str, str]]:
+        """The `(company, person id)` of everyone working for `companies`."""
+        people = []
+        for company in companies:
+            count = min(self.staff_count(company), self.max_people)
+            people.extend((company, f"ACoAA{company}x{i}") for i in range(count))
+        return people
+
+    def search_people(self, companies: list[str], start: int) -> list[dict]:
+        page = self.people(companies)[start : start + self.page_size]
+        return [
+            {
+                "_type": "com.linkedin.voyager.dash.search.EntityResultViewModel",
+                "entityUrn": "urn:li:fsd_entityResultViewModel:"
+                f"(urn:li:fsd_profile:{person},SEARCH_SRP,DEFAULT)",
+                "trackingUrn": f"urn:li:member:{_seed(person)}",
+                "title": {"text": self.name(person)},
+                "primarySubtitle": {"text": TITLES[_seed(person) % len(TITLES)]},
+                "secondarySubtitle": {"text": self.city(person)[1]},
+                "entityCustomTrackingInfo": {
+                    "memberDistance": "OUT_OF_NETWORK"
+                    if _seed(person) % 10 == 0
+                    else "DISTANCE_3"
+                },
+            }
+            for _, person in page
+        ]
+
+    def search(self, variables: str) -> dict:
+        start = int(re.search(r"start:(\d+)", variables).group(1))
+        result_type = re.search(r"key:resultType,value:List\((\w+)\)", variables)
+        items = []
+        if result_type and result_type.group(1) == "COMPANIES":
+            keywords = re.search(r"keywords:(.*?),flagshipSearchIntent", variables)
+            if keywords:
+                items = self.search_companies(keywords.group(1), start)
+        elif result_type and result_type.group(1) == "PEOPLE":
+            companies = re.search(
+                r"key:currentCompany,value:List\(([^)]*)\)", variables
+            )
+            if companies:
+                urns = [urn.strip() for urn in companies.group(1).split("|")]
+                items = self.search_people(urns, start)
+        return {
+            "data": {
+                "searchDashClustersByAll": {
+                    "_type": "com.linkedin.restli.common.CollectionResponse",
+                    "elements": [
+                        {
+                            "_type": "com.linkedin.voyager.dash.search."
+                            "SearchClusterViewModel",
+                            "items": [
+                                {
+                                    "_type": "com.linkedin.voyager.dash.search."
+                                    "SearchItem",
+                                    "item": {"entityResult": item},
+                                }
+                                for item in items
+                            ],
+                        }
+                    ],
+                    "paging": {"start": start, "count": len(items)},
+                }
+            }
+        }
+
+    def company(self, urn_id: str) -> dict:
+        seed = _seed(urn_id)
+        locations = [
+            {
+                "country": country,
+                "geographicArea": area,
+                "city": city,
+                "postalCode": postal_code,
+                "line1": f"{100 + i} Main Street",
+                "headquarter": i == 0,
+            }
+            for i, (country, city, area, postal_code) in enumerate(
+                CITIES[seed % len(CITIES) :][: 1 + seed % 3]
+            )
+        ]
+        company = {
+            "entityUrn": f"urn:li:fs_normalized_company:{urn_id}",
+            "name": f"Company {urn_id}",
+            "universalName": f"company-{urn_id}",
+            "url": f"https://www.linkedin.com/company/company-{urn_id}",
+            "staffCount": self.staff_count(urn_id),
+            "staffCountRange": {"start": 1001, "end": 5000},
+            "specialities": ["Finance", "Technology"][: 1 + seed % 2],
+            "companyIndustries": [{"localizedName": "Financial Services"}],
+            "headquarter": {
+                "country": locations[0]["country"],
+                "city": locations[0]["city"],
+            },
+            "confirmedLocations": locations,
+        }
+        if seed % 5 == 0:
+            affiliates = [str((seed + i) % 10_000_000) for i in (1, 2)]
+            company["affiliatedCompaniesResolutionResults"] = {
+                f"urn:li:fs_normalized_company:{a}": {
+                    "entityUrn": f"urn:li:fs_normalized_company:{a}",
+                    "name": f"Company {a}",
+                }
+                for a in affiliates
+            }
+        return {"elements": [company], "paging": {"start": 0, "count": 1}}
+
+    def name(self, person: str) -> str:
+        seed = _seed(person)
+        first = FIRST_NAMES[seed % len(FIRST_NAMES)]
+        return f"{first} {LAST_NAMES[seed // 7 % len(LAST_NAMES)]}"
+
+    def city(self, person: str) -> tuple[str, str, str, str]:
+        return CITIES[_seed(person) // 3 % len(CITIES)]
+
+    def profile(self, person: str) -> dict:
+        seed = _seed(person)
+        first, last = self.name(person).split()
+        country, city, _, _ = self.city(person)
+        company = person.removeprefix("ACoAA").split("x")[0]
+        graduated = 1990 + seed % 30
+        positions = [
+            {
+                "entityUrn": f"urn:li:fs_position:({person},{i})",
+                "companyName": f"Company {company}" if i == 0 else f"Employer {i}",
+                "companyUrn": f"urn:li:fs_miniCompany:{company if i == 0 else i}",
+                "title": TITLES[(seed + i) % len(TITLES)],
+                "geoLocationName": f"{city}, {country}",
+                "locationName": city,
+                "timePeriod": {"startDate": {"month": 1 + i, "year": graduated + i}}
+                | ({"endDate": {"year": graduated + i + 1}} if i else {}),
+                "company": {"employeeCountRange": {"start": 1001, "end": 5000}},
+            }
+            for i in range(1 + seed % 4)
+        ]
+        schools = [
+            {
+                "entityUrn": f"urn:li:fs_education:({person},{i})",
+                "schoolName": SCHOOLS[(seed + i) % len(SCHOOLS)],
+                "degreeName": ["BSc", "MSc", "PhD"][i],
+                "fieldOfStudy": FIELDS[(seed + i) % len(FIELDS)],
+                "timePeriod": {
+                    "startDate": {"year": graduated - 4 + 2 * i},
+                    "endDate": {"year": graduated + 2 * i},
+                },
+            }
+            for i in range(1 + seed % 2)
+        ]
+        return {
+            "profile": {
+                "miniProfile": {
+                    "entityUrn": f"urn:li:fs_miniProfile:{person}",
+                    "objectUrn": f"urn:li:member:{seed}",
+                    "publicIdentifier": f"{first}-{last}-{seed % 1000}".lower(),
+                    "firstName": first,
+                    "lastName": last,
+                },
+                "firstName": first,
+                "lastName": last,
+                "headline": f"{positions[0]['title']} at {positions[0]['companyName']}",
+                "industryName": "Financial Services",
+                "student": seed % 50 == 0,
+                "geoCountryName": country,
+                "geoLocationName": city,
+                "locationName": country,
+                "summary": "",
+                "defaultLocale": {"country": "US", "language": "en"},
+                "supportedLocales": [{"country": "US", "language": "en"}],
+                "versionTag": str(seed),
+                "showEducationOnProfileTopCard": True,
+            },
+            "positionView": {"elements": positions},
+            "educationView": {"elements": schools},
+            "languageView": {
+                "elements": [
+                    {"entityUrn": f"urn:li:fs_language:({person},1)", "name": "English"}
+                ]
+            },
+            "publicationView": {"elements": []},
+            "certificationView": {"elements": []},
+            "volunteerExperienceView": {"elements": []},
+            "honorView": {"elements": []},
+            "projectView": {"elements": []},
+        }
+
+
+class MockLinkedinServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the LinkedIn endpoints the crawler calls: company search,
+    company, people search and profile.
+
+    Every response takes `latency` and is a 429 with probability `throttle_rate`,
+    or whenever more than `capacity` requests are in flight, and a 500 with
+    probability `error_rate`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        data: MockLinkedinData | None = None,
+        latency: Latency | None = None,
+        throttle_rate: float = 0.0,
+        capacity: int | None = None,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(address, MockLinkedinHandler)
+        self.data = data or MockLinkedinData()
+        self.latency = latency or Latency()
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="mock-linkedin")
+        thread.daemon = True
+        thread.start()
+        logger.info("Mock LinkedIn listening on %s", self.url)
+        return thread
+
+    def admit(self) -> tuple[int, float]:
+        """The status to answer the next request with, and how long to take."""
+        with self.lock:
+            self.requests += 1
+            latency = self.latency.sample(self.random)
+            if self.capacity is not None and self.in_flight >= self.capacity:
+                self.throttled += 1
+                return 429, 0
+            if self.random.random() < self.throttle_rate:
+                self.throttled += 1
+                return 429, 0
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return 500, latency
+            self.in_flight += 1
+            return 200, latency
+
+    def done(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "errors": self.errors,
+            }
+
+
+class MockLinkedinHandler(BaseHTTPRequestHandler):
+    server: MockLinkedinServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        status, latency = self.server.admit()
+        if status != 200:
+            time.sleep(latency)
+            return self.reply(status, {"status": status, "message": "mock failure"})
+        try:
+            time.sleep(latency)
+            self.reply(200, self.route())
+        finally:
+            self.server.done()
+
+    def route(self) -> dict:
+        url = urlsplit(self.path)
+        if url.path == SEARCH_PATH:
+            return self.server.data.search(unquote(url.query))
+        if url.path == COMPANY_PATH:
+            (universal_name,) = parse_qs(url.query)["universalName"]
+            return self.server.data.company(universal_name)
+        match = PROFILE_PATH.fullmatch(url.path)
+        if match:
+            return self.server.data.profile(unquote(match.group(1)))
+        return {"status": 404, "message": f"Unknown endpoint {url.path}"}
+
+    def reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class MockLinkedin(Linkedin):
+    """
+    `Linkedin` client of a `MockLinkedinServer` at `url`, without the random
+    2 to 5 seconds `linkedin_api` sleeps before every request.
+    """
+
+    def __init__(self, url: str):
+        super().__init__("", "", authenticate=False)
+        self.client.API_BASE_URL = f"{url}/voyager/api"
+        self.client.LINKEDIN_BASE_URL = url
+        accounts.watch_throttle(self)
+
+    def _fetch(self, uri, evade=None, base_request=False, **kwargs):
+        return super()._fetch(
+            uri, evade=lambda: None, base_request=base_request, **kwargs
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock LinkedIn server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds")
+    parser.add_argument(
+        "--latency-dist",
+        choices=["fixed", "uniform", "exponential", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, help="Requests in flight before 429")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-people", type=int, default=50)
+    args = parser.parse_args()
+    server = MockLinkedinServer(
+        (args.host, args.port),
+        MockLinkedinData(max_people=args.max_people),
+        Latency(args.latency_dist, args.latency),
+        throttle_rate=args.throttle_rate,
+        capacity=args.capacity,
+        error_rate=args.error_rate,
+    )
+    logger.info("Mock LinkedIn listening on %s", server.url)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
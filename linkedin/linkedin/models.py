@@ -2,10 +2,15 @@ from sqlalchemy import ARRAY
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DateTime
+from sqlalchemy import Float
 from sqlalchemy import ForeignKey
 from sqlalchemy import func
+from sqlalchemy import Index
 from sqlalchemy import Integer
+from sqlalchemy import LargeBinary
+from sqlalchemy import UniqueConstraint
 from sqlalchemy import VARCHAR
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -21,7 +26,20 @@ class Company(Base):
     staff_count = Column(Integer, nullable=False)
     specialities = Column(ARRAY(VARCHAR()), nullable=False)
     name = Column(VARCHAR(), nullable=False)
+    display_name = Column(VARCHAR(), nullable=True)
     symbol = Column(VARCHAR(), nullable=False)
+    people_count = Column(Integer, nullable=True)
+    checked_at = Column(DateTime, nullable=True)
+
+
+class CompanyAlias(Base):
+    __tablename__ = "company_alias"
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    symbol = Column(VARCHAR(), primary_key=True, nullable=False)
+    name = Column(VARCHAR(), nullable=False, index=True)
+    urn_id = Column(Integer, nullable=False)
 
 
 class People(Base):
@@ -30,6 +48,7 @@ class People(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
 
+    urn_id = Column(VARCHAR(), nullable=True, unique=True)
     industry_name = Column(VARCHAR(), nullable=True)  # TODO
     first_name = Column(VARCHAR(), nullable=False)
     last_name = Column(VARCHAR(), nullable=False)
@@ -79,3 +98,40 @@ class Locations(Base):
     postal_code = Column(VARCHAR(), nullable=False)  # TODO
     line = Column(VARCHAR(), nullable=True)  # TODO
     headquarter = Column(Boolean(), nullable=False)
+
+
+class Job(Base):
+    __tablename__ = "job"
+    __table_args__ = (
+        UniqueConstraint("kind", "key"),
+        Index("ix_job_kind_state", "kind", "state"),
+        Index("ix_job_worker", "worker"),
+        Index("ix_job_kind_state_priority", "kind", "state", "priority"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement="auto")
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    kind = Column(VARCHAR(), nullable=False)
+    key = Column(VARCHAR(), nullable=False)
+    payload = Column(JSONB(), nullable=False)
+    state = Column(VARCHAR(), nullable=False)
+    attempts = Column(Integer(), nullable=False)
+    lease_until = Column(DateTime, nullable=True)
+    worker = Column(VARCHAR(), nullable=True)
+    error = Column(VARCHAR(), nullable=True)
+    priority = Column(Float(), nullable=False, server_default="0")
+
+
+class RawPayload(Base):
+    __tablename__ = "raw_payload"
+    __table_args__ = (Index("ix_raw_payload_endpoint_key", "endpoint", "key"),)
+    id = Column(Integer, primary_key=True, autoincrement="auto")
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, onupdate=func.now())
+
+    endpoint = Column(VARCHAR(), nullable=False)
+    key = Column(VARCHAR(), nullable=False)
+    meta = Column(JSONB(), nullable=False)
+    # zlib compressed JSON, see `archive.compress`
+    payload = Column(LargeBinary(), nullable=False)
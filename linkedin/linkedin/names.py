@@ -0,0 +1,187 @@
+import re
+from functools import lru_cache
+
+suffix = [
+    "Class A",
+    "Global Limited",
+    "Common Stock,",
+    "Class A Common Stock,",
+    "Agile Growth Corp. Warrant.",
+    "Warrant",
+    "Common Shares",
+    "Acquisition",
+    "SAIL Warrant.",
+    "(Canada)",
+    "(Bermuda)",
+    "S.A.",
+    "N.V. Common Stock",
+    "(Holding Company) Common Stock",
+    "Class A Common Stock New",
+    "Class A Ordinary Shares",
+    "PLC Ordinary Shares",
+    "Ordinary Share",
+    "Class A Common Stock",
+    "(The) Common Stock",
+    "Common Stock",
+    "ADS",
+    "ASA",
+    "SE",
+    "SA American Depositary Shares",
+    "SA",
+    "AG",
+    "S.A. Sponsored ADR (Spain)",
+    "Limited American Depositary Shares",
+    "Class A Subordinate Voting Shares",
+    "Depositary Shares",
+    "PLC Common Stock",
+    "(REIT)",
+    "REIT",
+    "American Depositary Shares",
+    "(",
+    "Corporation Class A Common Stock",
+]
+suffix = list(sorted(suffix, key=lambda x: len(x), reverse=True))
+# to_del = list(map(str.lower, to_del))
+# suffix = list(map(str.lower, suffix))
+
+puncs = [
+    ",",
+    ".",
+    "(",
+    ")",
+]
+
+
+def clean(name: str) -> str:
+    for p in puncs:
+        name = name.replace(p, "")
+    return name.strip()
+
+
+def trie_pattern(words: list[str]) -> str:
+    """Regex matching any of `words`, longest first, with shared prefixes merged."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        return "(?:%s)?" % body if "" in node else body
+
+    return build(trie)
+
+
+class SuffixCutter:
+    """
+    Cuts a name before the first occurrence of each suffix, suffix after suffix,
+    like `str.find`-ing every one of them in turn would.
+
+    All occurrences are found in one pass of a precompiled regex. A lookahead on
+    the suffixes' trie gives the longest suffix starting at each position, and
+    every shorter suffix starting there is one of its prefixes. A suffix is then
+    found in the already cut name exactly when its first occurrence still fits.
+    """
+
+    def __init__(self, suffixes: list[str]):
+        self.suffixes = suffixes
+        alternatives = sorted(set(suffixes), key=len, reverse=True)
+        pattern = trie_pattern(alternatives)
+        self.any_suffix = re.compile(pattern)
+        self.every_suffix = re.compile("(?=(%s))" % pattern)
+        self.prefixes = {
+            s: [t for t in alternatives if s.startswith(t)] for s in alternatives
+        }
+
+    def cut(self, name: str) -> str:
+        match = self.any_suffix.search(name)
+        if match is None:
+            return name
+        first: dict[str, int] = {}
+        for match in self.every_suffix.finditer(name, match.start()):
+            for s in self.prefixes[match.group(1)]:
+                first.setdefault(s, match.start())
+        end = len(name)
+        for s in self.suffixes:
+            idx = first.get(s, -1)
+            if idx != -1 and idx + len(s) <= end:
+                end = len(name[:idx].rstrip())
+        return name[:end]
+
+
+# Suffixes with punctuation never match a `clean`-ed name.
+_cut_suffix = SuffixCutter([s for s in suffix if clean(s) == s])
+_cut_lower_suffix = SuffixCutter(
+    [s.lower() for s in suffix if clean(s) == s and len(s) >= 5]
+)
+
+
+@lru_cache(maxsize=65536)
+def clean_name(name: str) -> str:
+    name = _cut_suffix.cut(clean(name))
+    name = _cut_lower_suffix.cut(name.lower())
+    return clean(name)
+
+
+# Words starting the description of a security rather than its issuer.
+securities = [
+    "Class",
+    "Series",
+    "Common",
+    "Ordinary",
+    "Warrant",
+    "Warrants",
+    "Right",
+    "Rights",
+    "Unit",
+    "Units",
+    "American Depositary",
+    "Depositary",
+    "Depository",
+    "ADS",
+    "ADR",
+    "Sponsored",
+    "Registered",
+    "Preferred Stock",
+    "Preferred Shares",
+    "Preferred Securities",
+    "Notes",
+    "Debentures",
+    "Shares",
+]
+_security = re.compile(
+    r"\s(?:\(|\d[\d.,]*%%|(?:%s)\b)" % trie_pattern(sorted(securities, reverse=True))
+)
+
+
+def issuer(name: str) -> str:
+    """
+    The issuer of a security, for grouping its share classes, warrants, units,
+    depositary shares, notes and preferreds: `"Zoom Video Communications, Inc.
+    Class A Common Stock"` is `"zoom video communications inc"`.
+    """
+    match = _security.search(name)
+    if match is not None:
+        name = name[: match.start()]
+    return " ".join(re.sub(r"[\W_]+", " ", clean(name).lower()).split())
+
+
+# The common units of a partnership are its shares.
+_not_shares = re.compile(
+    r"\b(?:Notes?|Debentures?|Preferred|Warrants?|Rights?|(?<!Common )Units?)\b"
+)
+
+
+def shares(name: str) -> bool:
+    """
+    Whether a security is shares of its issuer rather than notes, preferreds,
+    warrants, rights or units, whose names describe the issuer less well.
+    """
+    return _not_shares.search(name) is None
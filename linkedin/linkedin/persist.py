@@ -0,0 +1,254 @@
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent import futures
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import database
+from linkedin import jobs
+from linkedin import metrics
+from linkedin import models
+from linkedin import tracing
+
+logger = get_logger("persist")
+
+# Insert order, parents before the tables referencing them.
+TABLES = [
+    models.Company,
+    models.Locations,
+    models.People,
+    models.Education,
+    models.Experience,
+    models.RawPayload,
+]
+
+
+def inserts(rows: list[tuple[type, dict]]) -> list:
+    """One multi-row INSERT statement and its rows per table, in `TABLES` order."""
+    by_table: dict[type, list[dict]] = {model: [] for model in TABLES}
+    for model, row in rows:
+        by_table[model].append(row)
+    return [
+        (model.__table__.insert(), rows) for model, rows in by_table.items() if rows
+    ]
+
+
+def insert(db: Session, rows: list[tuple[type, dict]]) -> None:
+    """Insert `(model, row)` pairs, the caller commits `db`."""
+    for statement, params in inserts(rows):
+        db.execute(statement, params)
+
+
+class BulkWriter:
+    """
+    Buffers the rows of finished jobs and writes them with one multi-row INSERT
+    per table, completing the jobs in the same transaction.
+
+    `write` flushes on its own once `batch_size` rows are buffered; callers flush
+    whenever the rows must be durable (e.g. before waiting for work). Every flush
+    is a transaction of its own from `connections`, so flushes of several threads
+    run concurrently, and `on_flush` is called after each. If a batch is rejected
+    by the database each job is retried alone so only the faulty job fails.
+    """
+
+    def __init__(
+        self,
+        connections: database.Database,
+        queue: jobs.JobQueue,
+        batch_size: int = 1000,
+        on_flush: Callable[[], None] | None = None,
+    ):
+        self.connections = connections
+        self.queue = queue
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.pending: list[tuple[int, list[tuple[type, dict]], Callable | None]] = []
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def write(
+        self,
+        job_id: int,
+        rows: list[tuple[type, dict]],
+        on_commit: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            rows: `(model, row)` pairs, as built by `crawler.profile_rows`
+
+            on_commit: called once the rows are committed
+        """
+        with self._lock:
+            self.pending.append((job_id, rows, on_commit))
+            self.rows += len(rows)
+            if self.rows < self.batch_size:
+                return
+            pending = self.take()
+        self.write_batch(pending)
+
+    def take(self) -> list:
+        """The buffered jobs, which are no longer buffered, must hold `_lock`."""
+        pending, self.pending, self.rows = self.pending, [], 0
+        return pending
+
+    def flush(self) -> bool:
+        """Returns whether there was anything to write."""
+        with self._lock:
+            pending = self.take()
+        if not pending:
+            return False
+        self.write_batch(pending)
+        return True
+
+    def close(self) -> None:
+        self.flush()
+
+    def write_batch(self, pending: list) -> None:
+        try:
+            with metrics.db_flush_seconds.time(), tracing.span(
+                "db.flush",
+                "db",
+                jobs=len(pending),
+                rows=sum(len(rows) for _, rows, _ in pending),
+            ), self.connections.transaction() as db:
+                done = self.queue.using(db).complete_many(
+                    [job_id for job_id, _, _ in pending]
+                )
+                written = self.held(pending, done)
+                insert(db, written)
+        except DBAPIError as e:
+            if len(pending) == 1:
+                self.reject(pending[0][0], e)
+            else:
+                self.retry(pending)
+                for entry in pending:
+                    self.write_batch([entry])
+            return
+        self.committed(pending, done, written)
+
+    def held(self, pending: list, done: set[int]) -> list[tuple[type, dict]]:
+        """The rows of the jobs in `done`, those of the others are dropped."""
+        if len(done) != len(pending):
+            logger.warning(
+                "%d jobs were reclaimed, dropping their rows", len(pending) - len(done)
+            )
+        return [row for job_id, rows, _ in pending if job_id in done for row in rows]
+
+    def reject(self, job_id: int, error: DBAPIError) -> None:
+        logger.error("Could not write rows of job %s: %s", job_id, error)
+        with self.connections.transaction() as db:
+            self.queue.using(db).fail(job_id, repr(error))
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def retry(self, pending: list) -> None:
+        logger.warning("Batch of %d jobs rejected, retrying one by one", len(pending))
+
+    def committed(
+        self, pending: list, done: set[int], written: list[tuple[type, dict]]
+    ) -> None:
+        by_table = {model.__tablename__: 0 for model in TABLES}
+        for model, _ in written:
+            by_table[model.__tablename__] += 1
+        for table, rows in by_table.items():
+            metrics.db_rows.inc(table, amount=rows)
+        logger.debug("Wrote %d jobs: %s", len(done), by_table)
+        for job_id, _, on_commit in pending:
+            if job_id in done and on_commit is not None:
+                on_commit()
+        if self.on_flush is not None:
+            self.on_flush()
+
+
+class AsyncBulkWriter(BulkWriter):
+    """
+    `BulkWriter` whose batches are written through the asyncio driver of
+    `connections` (see `database.AsyncDatabase`), on an event loop of its own
+    thread.
+
+    A batch filled by `write` is handed to the loop without waiting for it, so up
+    to `concurrency` flushes are awaited at once while the callers go on buffering
+    rows; `flush` waits for every one of them. Jobs whose rows are rejected are
+    failed through `connections`.
+    """
+
+    def __init__(
+        self,
+        connections: database.Database,
+        queue: jobs.JobQueue,
+        batch_size: int = 1000,
+        on_flush: Callable[[], None] | None = None,
+        concurrency: int = 4,
+        driver: str | None = None,
+    ):
+        super().__init__(connections, queue, batch_size, on_flush)
+        self.async_connections = connections.async_database(driver)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.running: set[futures.Future] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.thread: threading.Thread | None = None
+
+    def write_batch(self, pending: list) -> None:
+        self.slots.acquire()
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(
+                    target=self.loop.run_forever, name="async-writer", daemon=True
+                )
+                self.thread.start()
+            future = asyncio.run_coroutine_threadsafe(
+                self.write_async(pending), self.loop
+            )
+            self.running.add(future)
+        future.add_done_callback(self.finished)
+
+    def finished(self, future: futures.Future) -> None:
+        with self._lock:
+            self.running.discard(future)
+        self.slots.release()
+        if future.exception() is not None:
+            logger.error("Async flush failed: %r", future.exception())
+
+    def flush(self) -> bool:
+        wrote = super().flush()
+        with self._lock:
+            running = list(self.running)
+        futures.wait(running)
+        return wrote or bool(running)
+
+    def close(self) -> None:
+        self.flush()
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(
+            self.async_connections.dispose(), self.loop
+        ).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = self.thread = None
+
+    async def write_async(self, pending: list) -> None:
+        try:
+            with metrics.db_flush_seconds.time():
+                async with self.async_connections.transaction() as db:
+                    result = await db.execute(
+                        self.queue.completing([job_id for job_id, _, _ in pending])
+                    )
+                    done = {job_id for job_id, in result}
+                    written = self.held(pending, done)
+                    for statement, params in inserts(written):
+                        await db.execute(statement, params)
+        except DBAPIError as e:
+            if len(pending) == 1:
+                await asyncio.to_thread(self.reject, pending[0][0], e)
+            else:
+                self.retry(pending)
+                for entry in pending:
+                    await self.write_async([entry])
+            return
+        self.committed(pending, done, written)
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from glogger import getLogger as get_logger
+from linkedin import metrics
+
+logger = get_logger("pipeline")
+
+_STOP = object()
+
+
+class Stage:
+    """
+    `workers` threads applying `func` to the items of `inbox` and putting what it
+    returns on `outbox` (nothing is passed on when it returns None).
+
+    Queues are bounded, so a slow stage blocks the ones feeding it instead of
+    buffering without limit. An item `func` raises on goes to `on_error` and is
+    not passed on.
+
+    A stage without `func` runs no thread, it only keeps the stats of work done
+    elsewhere (see `record`), e.g. by the crawl engine's fetch workers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable | None,
+        workers: int = 1,
+        size: int = 100,
+        outbox: "Stage | None" = None,
+        on_error: Callable[[object, Exception], None] | None = None,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox: queue.Queue = queue.Queue(size)
+        self.outbox = outbox
+        self.on_error = on_error
+        self.threads: list[threading.Thread] = []
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.started = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+        if self.func is None:
+            return
+        self.threads = [
+            threading.Thread(target=self.work, name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, item) -> float:
+        """Hand `item` to this stage, returns the seconds it waited for room."""
+        start = time.monotonic()
+        self.inbox.put(item)
+        return time.monotonic() - start
+
+    def work(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _STOP:
+                return
+            start = time.monotonic()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.exception("%s stage failed", self.name)
+                if self.on_error is not None:
+                    self.on_error(item, e)
+                continue
+            busy = time.monotonic() - start
+            blocked = 0.0
+            if result is not None and self.outbox is not None:
+                blocked = self.outbox.put(result)
+            self.record(busy, blocked)
+
+    def record(self, busy: float, blocked: float = 0.0) -> None:
+        """Count an item that took `busy` seconds and waited `blocked` to go on."""
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+        metrics.stage_items.inc(self.name)
+        metrics.stage_seconds.inc(self.name, amount=busy)
+
+    def stop(self) -> None:
+        """Let the queued items through, then stop the threads."""
+        for _ in self.threads:
+            self.inbox.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "workers": self.workers,
+                "items": self.items,
+                "errors": self.errors,
+                "items_per_s": round(self.items / elapsed, 1) if elapsed else 0,
+                "busy": round(self.busy / (elapsed * self.workers), 2)
+                if elapsed
+                else 0,
+                "blocked_s": round(self.blocked, 1),
+                "queued": self.inbox.qsize(),
+            }
+
+
+class Pipeline:
+    """
+    Stages started and stopped in order, each feeding the next, so stopping lets
+    every queued item through the whole pipeline.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+        for stage, following in zip(stages, stages[1:]):
+            stage.outbox = following
+
+    def put(self, item) -> float:
+        return self.stages[0].put(item)
+
+    def start(self) -> None:
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self) -> None:
+        for stage in self.stages:
+            stage.stop()
+
+    def stats(self) -> dict[str, dict]:
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -1,7 +1,35 @@
 import json
 
+from linkedin import names
 
-def get_raw_stocks() -> list[tuple[str, str]]:
+
+def get_stock_rows() -> list[dict]:
     with open("stocks.json") as f:
         data = json.load(f)
-    return [(row["symbol"], row["name"]) for row in data["data"]["table"]["rows"]]
+    rows = data["data"]["table"]["rows"]
+    for row in rows:
+        # Some symbols are padded with spaces.
+        row["symbol"] = row["symbol"].strip()
+    return rows
+
+
+def get_raw_stocks() -> list[tuple[str, str]]:
+    return [(row["symbol"], row["name"]) for row in get_stock_rows()]
+
+
+def by_issuer(stocks: list[tuple[str, str]]) -> list[tuple[list[str], str]]:
+    """
+    Group the share classes, warrants, units, notes and preferreds of an issuer,
+    so it is crawled once. Each group is its symbols and the name of the first
+    one, which is searched for the issuer: its shares with the shortest symbol,
+    or the shortest symbol if it has no shares listed.
+    """
+    groups: dict[str, list[tuple[str, str]]] = {}
+    for symbol, name in stocks:
+        symbol = symbol.strip()
+        groups.setdefault(names.issuer(name) or symbol, []).append((symbol, name))
+    issuers = []
+    for group in groups.values():
+        group.sort(key=lambda stock: (not names.shares(stock[1]), len(stock[0])))
+        issuers.append(([symbol for symbol, _ in group], group[0][1]))
+    return issuers
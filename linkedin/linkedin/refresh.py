@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import jobs
+from linkedin import models
+
+logger = get_logger("refresh")
+
+
+def stale_companies(db: Session, max_age: timedelta) -> list[tuple[str, str]]:
+    checked = func.coalesce(models.Company.checked_at, models.Company.created_at)
+    return [
+        (str(urn_id), symbol)
+        for urn_id, symbol in db.query(
+            models.Company.urn_id, models.Company.symbol
+        ).filter(checked < func.now() - max_age)
+    ]
+
+
+def requeue_stale(
+    db: Session,
+    queue: jobs.JobQueue,
+    max_age: timedelta,
+    priorities: dict[str, float] | None = None,
+) -> None:
+    """
+    Run the company job of every company not checked for `max_age` again, with
+    the priority of its symbol in `priorities`.
+
+    A refreshed company only searches its people again when its staff count
+    changed, and only fetches profiles when the number of people found changed
+    (see `engine.Engine.handle_company`).
+    """
+    companies = stale_companies(db, max_age)
+    logger.info("Refreshing %d companies older than %s", len(companies), max_age)
+    priorities = priorities or {}
+    for urn_id, symbol in companies:
+        queue.enqueue(
+            jobs.COMPANY,
+            urn_id,
+            {"urn_id": urn_id, "symbol": symbol, "priority": priorities.get(symbol, 0)},
+            requeue=True,
+        )
+    db.commit()
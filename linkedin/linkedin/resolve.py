@@ -0,0 +1,157 @@
+import re
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import database
+from linkedin import models
+from linkedin import names
+
+logger = get_logger("resolve")
+
+_separators = re.compile(r"[\W_]+")
+_numeral = re.compile(r"[ivxlcdm]+|.*\d.*")
+
+
+def normalize(name: str) -> str:
+    return _separators.sub(" ", names.clean_name(name).lower()).strip()
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def misspelled(key: str, other: str) -> bool:
+    """
+    Whether two names only differ by typos, word by word. A word added, another
+    word or a differing numeral (`Corp II`, `Fund 2021`) is another company.
+    """
+    words, other_words = key.split(), other.split()
+    if len(words) != len(other_words):
+        return False
+    return all(
+        word == other_word
+        or not _numeral.fullmatch(word)
+        and not _numeral.fullmatch(other_word)
+        and SequenceMatcher(None, word, other_word).ratio() >= 0.85
+        for word, other_word in zip(words, other_words)
+    )
+
+
+class CompanyIndex:
+    """
+    Resolves a stock to a company `urn_id` without `search_companies`.
+
+    A symbol is looked up first, then its normalized name, then the known name
+    sharing the most trigrams with it. A fuzzy match only counts when its trigram
+    similarity reaches `threshold`, no other company scores as well and the names
+    only differ by typos (see `misspelled`), anything less is left to the network
+    search.
+
+    It is warmed from the `company_alias` table, where every resolution is
+    stored, and from the names of the `company` table: its `display_name`, which
+    is what stocks are listed by, and its `name`, the universalName slug.
+    """
+
+    def __init__(
+        self, connections: database.Database | None = None, threshold: float = 0.8
+    ):
+        self.connections = connections
+        self.threshold = threshold
+        self.symbols: dict[str, str] = {}
+        self.names: dict[str, str] = {}
+        self.grams: dict[str, set[str]] = {}
+        self.postings: dict[str, set[str]] = {}
+        self.hits = Counter()
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        with self.connections.transaction() as db:
+            for name, display_name, symbol, urn_id in db.query(
+                models.Company.name,
+                models.Company.display_name,
+                models.Company.symbol,
+                models.Company.urn_id,
+            ):
+                self.add(display_name, symbol, str(urn_id))
+                self.add(name, None, str(urn_id))
+            for name, symbol, urn_id in db.query(
+                models.CompanyAlias.name,
+                models.CompanyAlias.symbol,
+                models.CompanyAlias.urn_id,
+            ):
+                self.add(name, symbol, str(urn_id))
+        logger.info(
+            "Warmed company index with %d names and %d symbols",
+            len(self.names),
+            len(self.symbols),
+        )
+
+    def add(self, name: str | None, symbol: str | None, urn_id: str) -> None:
+        with self._lock:
+            if symbol:
+                self.symbols[symbol] = urn_id
+            if not name:
+                return
+            key = normalize(name)
+            if not key or key in self.names:
+                return
+            self.names[key] = urn_id
+            self.grams[key] = trigrams(key)
+            for gram in self.grams[key]:
+                self.postings.setdefault(gram, set()).add(key)
+
+    def fuzzy(self, key: str) -> str | None:
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best, best_key, best_score = None, None, 0.0
+        for candidate, count in shared.items():
+            score = count / (len(grams) + len(self.grams[candidate]) - count)
+            if score > best_score:
+                best, best_key, best_score = self.names[candidate], candidate, score
+            elif score == best_score and self.names[candidate] != best:
+                best = None
+        if best is None or best_score < self.threshold:
+            return None
+        return best if misspelled(key, best_key) else None
+
+    def lookup(self, symbol: str, name: str) -> str | None:
+        key = normalize(name)
+        with self._lock:
+            if symbol in self.symbols:
+                self.hits["symbol"] += 1
+                return self.symbols[symbol]
+            if key in self.names:
+                self.hits["name"] += 1
+                return self.names[key]
+            urn_id = self.fuzzy(key) if key else None
+            self.hits["fuzzy" if urn_id else "miss"] += 1
+        if urn_id:
+            logger.debug("Fuzzy resolved %s (%s) to %s", name, symbol, urn_id)
+        return urn_id
+
+    def remember(
+        self, symbol: str, name: str, urn_id: str, db: Session | None = None
+    ) -> None:
+        """Store a resolution, also in `db` when given, the caller commits it."""
+        self.add(name, symbol, urn_id)
+        if db is None:
+            return
+        db.execute(
+            insert(models.CompanyAlias)
+            .values(name=normalize(name), symbol=symbol, urn_id=int(urn_id))
+            .on_conflict_do_update(
+                index_elements=[models.CompanyAlias.symbol],
+                set_={"name": normalize(name), "urn_id": int(urn_id)},
+            )
+        )
+
+    def stats(self) -> dict:
+        return dict(self.hits)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import Counter
+
+from linkedin_api import Linkedin
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from glogger import getLogger as get_logger
+from linkedin import models
+
+logger = get_logger("schedule")
+
+DAY = 24 * 60 * 60
+# Staleness, in days, of a stock whose company was never crawled.
+NEVER_CRAWLED = 3650.0
+
+
+class BudgetExhaustedError(Exception):
+    pass
+
+
+def market_cap(row: dict) -> float:
+    try:
+        return float(row.get("marketCap", "").replace(",", ""))
+    except ValueError:
+        return 0.0
+
+
+def staleness(db: Session) -> dict[str, float]:
+    """Days since the company of each known symbol was last checked."""
+    checked = func.coalesce(models.Company.checked_at, models.Company.created_at)
+    age = func.extract("epoch", func.now() - checked)
+    ages = {
+        symbol: float(seconds) / DAY
+        for symbol, seconds in db.query(models.Company.symbol, age)
+    }
+    aliases = db.query(models.CompanyAlias.symbol, age).join(
+        models.Company, models.Company.urn_id == models.CompanyAlias.urn_id
+    )
+    ages.update((symbol, float(seconds) / DAY) for symbol, seconds in aliases)
+    return ages
+
+
+def priorities(by: str, rows: list[dict], db: Session | None = None) -> dict:
+    """
+    Priority of each symbol of `rows`, higher is crawled first.
+
+    Args:
+        by: `"market_cap"`, `"staleness"` (days since the company was checked,
+            never crawled ones first) or `"none"` (`stocks.json` order)
+    """
+    if by == "market_cap":
+        return {row["symbol"]: market_cap(row) for row in rows}
+    if by == "staleness":
+        ages = staleness(db)
+        return {row["symbol"]: ages.get(row["symbol"], NEVER_CRAWLED) for row in rows}
+    if by == "none":
+        return {}
+    raise ValueError(f"Unknown priority {by!r}")
+
+
+class Budget:
+    """
+    Requests a run may still send and the time it may still take.
+
+    `requests=None` and `deadline=None` (seconds from now) are unlimited. Once
+    either is reached the budget is exhausted: no new job is started and a
+    request raises `BudgetExhaustedError`.
+    """
+
+    def __init__(self, requests: int | None = None, deadline: float | None = None):
+        self.requests = requests
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.spent = Counter()
+        self.refused = 0
+        self.released = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def stopped_by(self) -> str | None:
+        if self.requests is not None and sum(self.spent.values()) >= self.requests:
+            return "requests"
+        if self.deadline is not None and self.elapsed() >= self.deadline:
+            return "deadline"
+        return None
+
+    def exhausted(self) -> bool:
+        with self._lock:
+            return self.stopped_by() is not None
+
+    def spend(self, endpoint: str) -> None:
+        with self._lock:
+            reason = self.stopped_by()
+            if reason is not None:
+                self.refused += 1
+                raise BudgetExhaustedError(f"{endpoint}: {reason} budget reached")
+            self.spent[endpoint] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            spent = sum(self.spent.values())
+            return {
+                "requests": spent,
+                "by_endpoint": dict(self.spent),
+                "request_budget": self.requests,
+                "remaining": None if self.requests is None else self.requests - spent,
+                "elapsed": round(self.elapsed(), 1),
+                "deadline": self.deadline,
+                "stopped_by": self.stopped_by(),
+                "refused": self.refused,
+                "released_jobs": self.released,
+            }
+
+
+class BudgetedApi:
+    """Charges every call to `api` to a `Budget`, wrap it inside `CachedApi`."""
+
+    def __init__(self, api: Linkedin, budget: Budget):
+        self.api = api
+        self.budget = budget
+
+    def _call(self, endpoint: str, *args, **kwargs):
+        self.budget.spend(endpoint)
+        return getattr(self.api, endpoint)(*args, **kwargs)
+
+    def search_companies(self, *args, **kwargs) -> list:
+        return self._call("search_companies", *args, **kwargs)
+
+    def get_company(self, *args, **kwargs) -> dict:
+        return self._call("get_company", *args, **kwargs)
+
+    def search_people(self, *args, **kwargs) -> list:
+        return self._call("search_people", *args, **kwargs)
+
+    def get_profile(self, *args, **kwargs) -> dict:
+        return self._call("get_profile", *args, **kwargs)
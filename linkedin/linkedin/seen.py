@@ -0,0 +1,56 @@
+import threading
+
+from glogger import getLogger as get_logger
+from linkedin import database
+from linkedin import models
+
+logger = get_logger("seen")
+
+
+class SeenSet:
+    """
+    Urn ids of the people already stored, so a person found again under another
+    company costs neither a `get_profile` request nor a row.
+
+    It is warmed from the `people` table, which is what persists it across runs.
+    Other workers may store people meanwhile, so `stored` also asks the database
+    before a row is written.
+    """
+
+    def __init__(self, connections: database.Database | None = None):
+        self.connections = connections
+        self.urns: set[str] = set()
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        with self.connections.transaction() as db:
+            query = db.query(models.People.urn_id).filter(
+                models.People.urn_id.isnot(None)
+            )
+            with self._lock:
+                self.urns.update(urn_id for urn_id, in query.yield_per(10000))
+        logger.info("Warmed seen set with %d people", len(self.urns))
+
+    def __contains__(self, urn_id: str) -> bool:
+        with self._lock:
+            return urn_id in self.urns
+
+    def add(self, urn_id: str) -> None:
+        with self._lock:
+            self.urns.add(urn_id)
+
+    def stored(self, urn_id: str) -> bool:
+        if urn_id in self:
+            return True
+        if self.connections is None:
+            return False
+        with self.connections.transaction() as db:
+            found = (
+                db.query(models.People.id)
+                .filter(models.People.urn_id == urn_id)
+                .first()
+                is not None
+            )
+        if found:
+            self.add(urn_id)
+        return found
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from glogger import getLogger as get_logger
+
+logger = get_logger("tracing")
+
+
+class NullSpan:
+    """What `span` returns while tracing is off, every method does nothing."""
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, category: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.record(self, end)
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """
+    Records nested spans as Chrome trace events, viewable in chrome://tracing or
+    Perfetto. Spans of one thread nest by time, so a job's span contains the
+    requests and writes made for it.
+
+    While not started, `span` returns `NULL_SPAN` and costs one attribute check.
+    At most `max_events` spans are kept, later ones are counted as dropped.
+    """
+
+    def __init__(self, max_events: int = 1_000_000):
+        self.max_events = max_events
+        self.enabled = False
+        self.events: list[dict] = []
+        self.threads: dict[int, str] = {}
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._handlers: list[logging.Handler] = []
+
+    def start(self, trace_logging: bool = True) -> None:
+        """
+        Args:
+            trace_logging: also record a span for every record each handler of
+                the existing loggers emits
+        """
+        self.events, self.threads, self.dropped = [], {}, 0
+        self.origin = time.perf_counter()
+        self.enabled = True
+        if trace_logging:
+            self._trace_handlers()
+
+    def stop(self) -> None:
+        self.enabled = False
+        for handler in self._handlers:
+            del handler.handle
+        self._handlers = []
+
+    def span(self, name: str, category: str = "crawl", **attributes) -> Span | NullSpan:
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, attributes)
+
+    def record(self, span: Span, end: float) -> None:
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        thread = threading.current_thread()
+        self.threads.setdefault(thread.ident, thread.name)
+        self.events.append(
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": (end - span.start) * 1e6,
+                "pid": self.pid,
+                "tid": thread.ident,
+                "args": span.attributes,
+            }
+        )
+
+    def write(self, path: str) -> None:
+        """Write the spans recorded so far as a Chrome trace JSON file."""
+        names = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self.threads.items())
+        ]
+        with open(path, "w") as f:
+            json.dump(
+                {"traceEvents": names + list(self.events), "displayTimeUnit": "ms"},
+                f,
+                default=str,
+            )
+        logger.info(
+            "Wrote %d spans to %s (%d dropped)", len(self.events), path, self.dropped
+        )
+
+    def _trace_handlers(self) -> None:
+        loggers = [logging.getLogger()] + [
+            x
+            for x in logging.Logger.manager.loggerDict.values()
+            if isinstance(x, logging.Logger)
+        ]
+        for handler in {h for x in loggers for h in x.handlers}:
+            if "handle" in vars(handler):
+                continue
+            handle = handler.handle
+
+            def traced(record, handle=handle, handler=handler):
+                with self.span("log", "logging", handler=type(handler).__name__):
+                    return handle(record)
+
+            handler.handle = traced
+            self._handlers.append(handler)
+
+
+tracer = Tracer()
+
+
+def span(name: str, category: str = "crawl", **attributes) -> Span | NullSpan:
+    """A span of the global `tracer`, use as a context manager."""
+    return tracer.span(name, category, **attributes)
+
+
+def size(data) -> int:
+    """Serialized size of a payload, only worth computing for a live span."""
+    return len(json.dumps(data, default=str))
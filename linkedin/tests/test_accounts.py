@@ -0,0 +1,204 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from linkedin import accounts
+from linkedin import fake
+from linkedin import metrics
+
+
+class InterruptedApi:
+    def get_profile(self, **kwargs) -> dict:
+        raise KeyboardInterrupt
+
+
+def account(api, **kwargs) -> accounts.Account:
+    return accounts.Account(
+        "account", api, accounts.TokenBucket(rate=1000, capacity=1000), **kwargs
+    )
+
+
+def test_interrupted_call_is_neither_success_nor_failure():
+    interrupted = account(InterruptedApi())
+    interrupted.streak = 2
+    pool = accounts.AccountPool([interrupted])
+    with pytest.raises(KeyboardInterrupt):
+        pool.get_profile(urn_id="1")
+    assert interrupted.in_flight == 0
+    assert interrupted.streak == 2
+    assert interrupted.limiter.limit == accounts.AIMD().limit
+    assert not interrupted.breaker.outcomes
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "error, outcome",
+    [
+        (accounts.ThrottledError("429"), accounts.THROTTLE),
+        (http_error(503), accounts.TRANSIENT),
+        (requests.ConnectionError(), accounts.TRANSIENT),
+        (requests.Timeout(), accounts.TRANSIENT),
+        (json.JSONDecodeError("truncated", "{", 1), accounts.TRANSIENT),
+        (http_error(404), accounts.PERMANENT),
+        (KeyError("firstName"), accounts.PERMANENT),
+    ],
+)
+def test_classify(error, outcome):
+    assert accounts.classify(error) == outcome
+
+
+def test_throttled_responses_raise():
+    response = requests.Response()
+    response.status_code = 999
+    with pytest.raises(accounts.ThrottledError):
+        accounts.raise_on_throttle(response)
+
+
+def test_backoff_is_bounded_and_jittered():
+    random.seed(0)
+    backoff = accounts.Backoff(base=1, cap=5)
+    for attempt in range(8):
+        delays = [backoff.delay(attempt) for _ in range(100)]
+        assert all(0 <= delay <= min(5, 2**attempt) for delay in delays)
+        assert len(set(delays)) > 1
+    assert max(backoff.delay(10) for _ in range(100)) > 2.5
+
+
+def test_aimd_shrinks_on_throttle_and_grows_on_success():
+    limiter = accounts.AIMD(initial=4, minimum=1, maximum=5, latency_target=1)
+    limiter.update(accounts.THROTTLE, 0.1)
+    assert limiter.limit == 2
+    limiter.update(accounts.TRANSIENT, 0.1)
+    limiter.update(accounts.THROTTLE, 0.1)
+    assert limiter.limit == 1
+    limiter.update(None, 0.1)
+    assert limiter.limit == 2
+    limiter.update(None, 0.1)
+    assert limiter.limit == 2.5
+    limiter.update(None, 2)
+    assert limiter.limit == 1.25
+    for _ in range(100):
+        limiter.update(None, 0.1)
+    assert limiter.limit == 5
+
+
+def test_circuit_breaker_opens_half_opens_and_closes():
+    breaker = accounts.CircuitBreaker(window=4, error_rate=0.5, cooldown=10)
+    assert not breaker.record(True, 0)
+    assert not breaker.record(False, 0)
+    assert not breaker.record(False, 0)
+    assert breaker.record(True, 0)
+    assert breaker.wait_time(5) == 5
+    # Half open: the first failure after the pause opens it again right away.
+    assert breaker.record(True, 10)
+    assert breaker.wait_time(10) == 10
+    assert breaker.trips == 2
+    # A success closes it, it then takes a full window of failures to open.
+    assert not breaker.record(False, 20)
+    assert breaker.wait_time(20) == 0
+    assert not breaker.record(True, 20)
+    assert not breaker.probing
+
+
+class FlakyApi:
+    def __init__(self, failures: list[Exception]):
+        self.failures = failures
+        self.calls = 0
+
+    def get_profile(self, **kwargs) -> dict:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return {"urn_id": kwargs["urn_id"]}
+
+
+def flaky_pool(api: FlakyApi, retries: int = 3) -> accounts.AccountPool:
+    return accounts.AccountPool(
+        [account(api)], retries=retries, backoff=accounts.Backoff(0.001, 0.001)
+    )
+
+
+def test_pool_retries_transient_errors():
+    api = FlakyApi([requests.ConnectionError(), http_error(502)])
+    pool = flaky_pool(api)
+    assert pool.get_profile(urn_id="1") == {"urn_id": "1"}
+    assert api.calls == 3
+    assert pool.accounts[0].errors == 2
+
+
+def test_pool_gives_up_after_retries():
+    api = FlakyApi([requests.ConnectionError() for _ in range(3)])
+    with pytest.raises(requests.ConnectionError):
+        flaky_pool(api, retries=2).get_profile(urn_id="1")
+    assert api.calls == 3
+
+
+def test_pool_times_failed_calls_too():
+    def timed(outcome: str) -> tuple[int, int]:
+        labels = ("get_profile", "account", outcome)
+        counted = metrics.requests.labels(*labels).value
+        return counted, sum(metrics.request_seconds.labels(*labels).counts)
+
+    before = {outcome: timed(outcome) for outcome in ("transient", "ok")}
+    api = FlakyApi([requests.ConnectionError(), requests.ConnectionError()])
+    flaky_pool(api).get_profile(urn_id="1")
+    for outcome, calls in (("transient", 2), ("ok", 1)):
+        counted, observed = timed(outcome)
+        assert counted - before[outcome][0] == calls
+        assert observed - before[outcome][1] == calls
+
+
+def test_pool_raises_permanent_errors_right_away():
+    api = FlakyApi([http_error(404)])
+    with pytest.raises(requests.HTTPError):
+        flaky_pool(api).get_profile(urn_id="1")
+    assert api.calls == 1
+
+
+def test_throttled_account_cools_down_while_another_serves():
+    throttled = account(fake.ThrottlingLinkedin(latency=0, capacity=0))
+    healthy = account(fake.ThrottlingLinkedin(latency=0, capacity=100))
+    pool = accounts.AccountPool([throttled, healthy], cooldown=60)
+    for i in range(5):
+        pool.get_profile(urn_id=str(i))
+    assert throttled.throttles == 1
+    assert throttled.streak == 1
+    assert throttled.wait_time(time.monotonic()) > 50
+    assert throttled.limiter.limit < accounts.AIMD().limit
+    assert healthy.requests == 5
+
+
+def test_pool_stays_within_simulated_capacity():
+    servers = [
+        fake.ThrottlingLinkedin(0.005, capacity=4, error_rate=0.02, seed=i)
+        for i in range(2)
+    ]
+    pool = accounts.AccountPool(
+        [
+            account(
+                server,
+                limiter=accounts.AIMD(latency_target=0.02),
+                breaker=accounts.CircuitBreaker(cooldown=0.1),
+            )
+            for server in servers
+        ],
+        cooldown=0.05,
+        retries=8,
+        backoff=accounts.Backoff(base=0.005, cap=0.05),
+    )
+    with ThreadPoolExecutor(16) as executor:
+        profiles = list(
+            executor.map(lambda i: pool.get_profile(urn_id=str(i)), range(200))
+        )
+    assert len(profiles) == 200
+    assert all(a.limiter.limit <= 8 for a in pool.accounts)
+    assert sum(s.throttled for s in servers) < 200
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import update
+
+from linkedin import archive
+from linkedin import crawler
+from linkedin import database
+from linkedin import fake
+from linkedin import models
+from linkedin import persist
+
+# A migrated Postgres database whose crawl tables may be emptied.
+DB = os.environ.get("LK_TEST_DB")
+
+pytestmark = pytest.mark.skipif(
+    not DB, reason="LK_TEST_DB is not set to a disposable, migrated database"
+)
+
+TABLES = ["job", "raw_payload", "locations", "education", "experience", "people"]
+
+
+@pytest.fixture
+def db():
+    session = database.Database(DB).session()
+    for table in TABLES + ["company_alias", "company"]:
+        session.execute(text(f"DELETE FROM {table}"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def crawl(db, companies: int, people: int) -> None:
+    """Store and archive what a crawl of `companies` fake companies would."""
+    api = fake.FakeLinkedin(latency=0, people_per_company=people)
+    rows = []
+    for i in range(companies):
+        urn_id = str(1000 + i)
+        data = api.get_company(urn_id)
+        rows += crawler.company_rows(urn_id, f"S{i}", data)
+        rows.append(archive.row(archive.COMPANY, urn_id, data, symbol=f"S{i}"))
+        for person in api.search_people([urn_id]):
+            profile = api.get_profile(urn_id=person["urn_id"])
+            rows += crawler.profile_rows(profile, person["urn_id"])
+            rows.append(archive.row(archive.PROFILE, person["urn_id"], profile))
+    persist.insert(db, rows)
+    db.commit()
+
+
+def snapshot(db) -> dict[str, list[tuple]]:
+    """The rows of every reprocessed table, without their ids and timestamps."""
+    skipped = {"id", "created_at", "updated_at"}
+    tables = {}
+    for model in archive.TABLES:
+        columns = [c for c in model.__table__.columns if c.name not in skipped]
+        tables[model.__tablename__] = sorted(
+            tuple(map(str, row)) for row in db.execute(select(*columns))
+        )
+    return tables
+
+
+def test_reprocess_rebuilds_the_crawled_rows(db):
+    crawl(db, companies=3, people=2)
+    db.execute(
+        update(models.Company)
+        .where(models.Company.urn_id == 1000)
+        .values(people_count=2, checked_at=text("now()"))
+    )
+    db.commit()
+    before = snapshot(db)
+
+    written = archive.reprocess(db, batch_size=4)
+
+    assert snapshot(db) == before
+    assert written == {
+        "company": 3,
+        "locations": 3,
+        "people": 6,
+        "education": 6,
+        "experience": 6,
+        "failed": 0,
+    }
+
+
+def test_reprocess_parses_the_latest_payload(db):
+    crawl(db, companies=1, people=0)
+    data = fake.FakeLinkedin(latency=0).get_company("1000")
+    data["staffCount"] = 42
+    persist.insert(db, [archive.row(archive.COMPANY, "1000", data, symbol="S0")])
+    db.commit()
+
+    archive.reprocess(db)
+
+    assert db.get(models.Company, 1000).staff_count == 42
+
+
+def test_reprocess_keeps_rows_missing_from_the_archive(db):
+    crawl(db, companies=2, people=1)
+    db.execute(text("DELETE FROM raw_payload WHERE key = '1001'"))
+    db.commit()
+    before = snapshot(db)
+
+    with pytest.raises(archive.IncompleteArchiveError):
+        archive.reprocess(db)
+    db.rollback()
+    assert snapshot(db) == before
+
+    archive.reprocess(db, force=True)
+    assert [row[0] for row in db.execute(select(models.Company.urn_id))] == [1000]
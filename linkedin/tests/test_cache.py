@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from linkedin import cache
+
+
+class CountingApi:
+    def __init__(self):
+        self.calls = 0
+
+    def search_people(self, **kwargs) -> list:
+        self.calls += 1
+        return []
+
+    def get_profile(self, **kwargs) -> None:
+        self.calls += 1
+        return None
+
+
+def test_empty_results_are_cached(tmp_path):
+    api = CountingApi()
+    cached = cache.CachedApi(api, cache.ResponseCache(str(tmp_path)))
+    assert cached.search_people(current_company=["1"]) == []
+    assert cached.search_people(current_company=["1"]) == []
+    assert cached.get_profile(urn_id="2") is None
+    assert cached.get_profile(urn_id="2") is None
+    assert api.calls == 2
+
+    offline = cache.CachedApi(None, cache.ResponseCache(str(tmp_path)))
+    assert offline.search_people(current_company=["1"]) == []
+    with pytest.raises(cache.CacheMissError):
+        offline.search_people(current_company=["3"])
+
+
+def test_counts_are_exact_across_threads(tmp_path):
+    response_cache = cache.ResponseCache(str(tmp_path))
+    response_cache.put("get_profile", (), {"urn_id": "hit"}, {"firstName": "a"})
+
+    def lookup() -> None:
+        for _ in range(200):
+            response_cache.get("get_profile", (), {"urn_id": "hit"})
+            response_cache.get("get_profile", (), {"urn_id": "miss"})
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert response_cache.stats()["get_profile"] == {"hits": 1600, "misses": 1600}
@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy.exc import TimeoutError
+
+from linkedin import crawler
+from linkedin import engine
+from linkedin import fake
+from linkedin import jobs
+
+
+def test_idle_workers_are_not_left_waiting_for_the_persist_stage(monkeypatch):
+    profile_rows = crawler.profile_rows
+
+    def slow_profile_rows(*args):
+        time.sleep(0.02)
+        return profile_rows(*args)
+
+    # Profiles are parsed after the workers ran out of jobs and started to wait.
+    monkeypatch.setattr(crawler, "profile_rows", slow_profile_rows)
+    queue = fake.FakeQueue()
+    queue.seed([(["A"], "Alpha"), (["B"], "Beta")])
+    crawl_engine = engine.Engine(
+        fake.FakeDatabase(),
+        fake.FakeLinkedin(latency=0.001, people_per_company=10),
+        queue,
+        company_workers=2,
+        person_workers=4,
+        poll=5,
+    )
+    start = time.perf_counter()
+    crawl_engine.run()
+    assert time.perf_counter() - start < 2
+    done = [job for job in queue.jobs.values() if job["state"] == jobs.DONE]
+    assert len(done) == len(queue.jobs) == 2 + 2 + 2 + 20
+
+
+class FlakyDatabase(fake.FakeDatabase):
+    """Out of connections for its first `failures` transactions."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self.failures -= 1
+            failing = self.failures >= 0
+        if failing:
+            raise TimeoutError("QueuePool limit reached")
+        yield self.fake
+
+
+def test_workers_survive_database_errors():
+    queue = fake.FakeQueue()
+    queue.seed([(["A"], "Alpha"), (["B"], "Beta")])
+    connections = FlakyDatabase(failures=10)
+    crawl_engine = engine.Engine(
+        connections,
+        fake.FakeLinkedin(latency=0.001, people_per_company=5),
+        queue,
+        company_workers=2,
+        person_workers=4,
+        poll=0.05,
+    )
+    crawl_engine.run()
+    assert connections.failures < 0
+    done = [job for job in queue.jobs.values() if job["state"] == jobs.DONE]
+    assert len(done) == len(queue.jobs) == 2 + 2 + 2 + 10
@@ -0,0 +1,110 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from linkedin import database
+from linkedin import export
+from linkedin import models
+
+parquet = pytest.importorskip("pyarrow.parquet")
+
+# A migrated Postgres database whose crawl tables may be emptied.
+DB = os.environ.get("LK_TEST_DB")
+
+pytestmark = pytest.mark.skipif(
+    not DB, reason="LK_TEST_DB is not set to a disposable, migrated database"
+)
+
+
+@pytest.fixture
+def db():
+    session = database.Database(DB).session()
+    for table in ["job", "company_alias", "locations", "company"]:
+        session.execute(text(f"DELETE FROM {table}"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def add_companies(db, urn_ids: range, created_at: datetime) -> None:
+    for urn_id in urn_ids:
+        db.add(
+            models.Company(
+                urn_id=urn_id,
+                url=f"https://www.linkedin.com/company/{urn_id}",
+                staff_count=10,
+                specialities=["fake"],
+                name=f"company-{urn_id}",
+                symbol=f"S{urn_id}",
+                created_at=created_at,
+            )
+        )
+    db.commit()
+
+
+def partitions(path) -> list[str]:
+    return sorted(name for name in os.listdir(path) if name != export.WATERMARK)
+
+
+def exported(path) -> list[int]:
+    return sorted(parquet.read_table(path).column("urn_id").to_pylist())
+
+
+def test_full_export_layout(db, tmp_path):
+    add_companies(db, range(5), datetime(2026, 1, 1))
+
+    written = export.export_table(
+        db, models.Company, str(tmp_path), chunk_size=2, file_rows=2, row_group_size=2
+    )
+
+    assert written == {"rows": 5, "files": 3}
+    company = tmp_path / "company"
+    (partition,) = partitions(company)
+    assert partition.startswith("exported=")
+    assert partitions(company / partition) == [
+        "part-00000.parquet",
+        "part-00001.parquet",
+        "part-00002.parquet",
+    ]
+    assert exported(company / partition) == [0, 1, 2, 3, 4]
+    assert json.loads((company / "_watermark.json").read_text()) == {
+        "watermark": "2026-01-01T00:00:00"
+    }
+
+
+def test_incremental_export_only_writes_rows_past_the_watermark(db, tmp_path):
+    add_companies(db, range(3), datetime(2026, 1, 1))
+    export.export_table(db, models.Company, str(tmp_path))
+    add_companies(db, range(3, 5), datetime(2026, 1, 2))
+    db.execute(text("UPDATE company SET updated_at = '2026-01-03' WHERE urn_id = 0"))
+    db.commit()
+
+    written = export.export_table(
+        db, models.Company, str(tmp_path), incremental=True, overlap=0
+    )
+
+    assert written == {"rows": 3, "files": 1}
+    company = tmp_path / "company"
+    first, second = partitions(company)
+    assert exported(company / first) == [0, 1, 2]
+    assert exported(company / second) == [0, 3, 4]
+    assert export.read_watermark(str(company)) == datetime(2026, 1, 3)
+
+    # Nothing changed since, so no partition is added.
+    written = export.export_table(
+        db, models.Company, str(tmp_path), incremental=True, overlap=0
+    )
+    assert written == {"rows": 0, "files": 0}
+    assert partitions(company) == [first, second]
+
+    # Rows changed within `overlap` of the watermark are exported again.
+    written = export.export_table(db, models.Company, str(tmp_path), incremental=True)
+    assert written == {"rows": 1, "files": 1}
+
+    # A full export replaces the incremental partitions.
+    export.export_table(db, models.Company, str(tmp_path))
+    (partition,) = partitions(company)
+    assert exported(company / partition) == [0, 1, 2, 3, 4]
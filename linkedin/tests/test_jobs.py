@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from linkedin import database
+from linkedin import engine
+from linkedin import fake
+from linkedin import jobs
+
+# A migrated Postgres database whose crawl tables may be emptied.
+DB = os.environ.get("LK_TEST_DB")
+
+pytestmark = pytest.mark.skipif(
+    not DB, reason="LK_TEST_DB is not set to a disposable, migrated database"
+)
+
+TABLES = ["job", "raw_payload", "locations", "education", "experience", "people"]
+
+
+@pytest.fixture
+def db():
+    session = database.Database(DB).session()
+    for table in TABLES + ["company_alias", "company"]:
+        session.execute(text(f"DELETE FROM {table}"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def issuers(count: int) -> list[tuple[list[str], str]]:
+    return [([f"S{i}"], f"Company {i}") for i in range(count)]
+
+
+def test_concurrent_claims_never_overlap(db):
+    jobs.JobQueue(db).seed(issuers(200))
+    claimed: list[list[int]] = []
+
+    def work(worker: int) -> None:
+        session = database.Database(DB, pool_size=1).session()
+        queue = jobs.JobQueue(session, worker=f"worker-{worker}")
+        mine = claimed[worker]
+        while batch := queue.claim([jobs.STOCK], limit=5):
+            mine.extend(queue.complete_many([job_id for job_id, _, _ in batch]))
+            session.commit()
+        session.close()
+
+    threads = []
+    for worker in range(4):
+        claimed.append([])
+        threads.append(threading.Thread(target=work, args=(worker,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    every = [job_id for mine in claimed for job_id in mine]
+    assert len(every) == len(set(every)) == 200
+    retried = db.execute(text("SELECT count(*) FROM job WHERE attempts <> 1"))
+    assert retried.scalar() == 0
+
+
+def test_expired_lease_is_reclaimed(db):
+    jobs.JobQueue(db).seed(issuers(1))
+    dead = jobs.JobQueue(db, lease=0, worker="dead")
+    [(job_id, _, _)] = dead.claim([jobs.STOCK])
+    alive = jobs.JobQueue(db, worker="alive")
+    assert [job_id for job_id, _, _ in alive.claim([jobs.STOCK])] == [job_id]
+    assert not dead.complete(job_id)
+    assert alive.complete(job_id)
+    db.commit()
+
+
+def run_worker() -> None:
+    connections = database.Database(DB)
+    engine.Engine(
+        connections,
+        fake.FakeLinkedin(latency=0.001, people_per_company=5),
+        jobs.JobQueue(connections.session()),
+        company_workers=2,
+        person_workers=4,
+        poll=0.1,
+        batch=2,
+    ).run()
+    connections.dispose()
+
+
+def test_worker_processes_run_every_job_once(db):
+    jobs.JobQueue(db).seed(issuers(10))
+    workers = [multiprocessing.Process(target=run_worker) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    def count(query: str) -> int:
+        return db.execute(text(query)).scalar()
+
+    assert count("SELECT count(*) FROM job WHERE attempts <> 1") == 0
+    assert count("SELECT count(*) FROM job WHERE state <> 'done'") == 0
+    assert count("SELECT count(*) FROM job WHERE kind = 'stock'") == 10
+    assert count("SELECT count(*) FROM people") == count(
+        "SELECT count(*) FROM job WHERE kind = 'profile'"
+    )
+
+
+def test_async_writes_store_every_profile(db):
+    try:
+        database.async_driver()
+    except ImportError as e:
+        pytest.skip(str(e))
+    jobs.JobQueue(db).seed(issuers(5))
+    connections = database.Database(DB)
+    engine.Engine(
+        connections,
+        fake.FakeLinkedin(latency=0.001, people_per_company=5),
+        jobs.JobQueue(connections.session()),
+        poll=0.1,
+        write_batch=10,
+        async_writes=True,
+    ).run()
+    connections.dispose()
+    db.commit()
+
+    def count(query: str) -> int:
+        return db.execute(text(query)).scalar()
+
+    assert count("SELECT count(*) FROM job WHERE state <> 'done'") == 0
+    assert count("SELECT count(*) FROM people") == count(
+        "SELECT count(*) FROM job WHERE kind = 'profile'"
+    )
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from linkedin import names
+from linkedin import raw_stocks
+
+
+def legacy_clean(name: str) -> str:
+    name = name.strip()
+    for p in names.puncs:
+        name = name.replace(p, "").strip()
+    return name
+
+
+def legacy_clean_name(name: str) -> str:
+    """`names.clean_name` before it was compiled, kept as the reference."""
+    name = legacy_clean(name)
+    for s in names.suffix:
+        idx = name.find(s)
+        if idx != -1:
+            name = legacy_clean(name[:idx])
+    name = name.lower()
+    for s in names.suffix:
+        s = s.lower()
+        if len(s) >= 5:
+            idx = name.find(s)
+            if idx != -1:
+                name = legacy_clean(name[:idx])
+    name = legacy_clean(name)
+    return name
+
+
+@pytest.fixture(scope="module")
+def stock_names() -> list[str]:
+    # stocks.json is read from the working directory, the project root.
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(__file__)))
+    try:
+        stock_names = [name for _, name in raw_stocks.get_raw_stocks()]
+    finally:
+        os.chdir(cwd)
+    return (
+        stock_names
+        + [x.upper() for x in stock_names]
+        + [x.lower() for x in stock_names]
+    )
+
+
+@pytest.mark.parametrize("function", [names.clean_name.__wrapped__, names.clean_name])
+def test_clean_name_matches_reference(function, stock_names):
+    mismatches = [
+        (name, function(name), legacy_clean_name(name))
+        for name in stock_names
+        if function(name) != legacy_clean_name(name)
+    ]
+    assert not mismatches
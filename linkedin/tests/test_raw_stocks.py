@@ -0,0 +1,81 @@
+import pytest
+
+from linkedin import raw_stocks
+
+
+@pytest.mark.parametrize(
+    "stocks, expected",
+    [
+        (
+            [
+                ("JSM", "Navient Corporation 6% Senior Notes due December 15, 2043"),
+                ("NAVI", "Navient Corporation Common Stock"),
+            ],
+            (["NAVI", "JSM"], "Navient Corporation Common Stock"),
+        ),
+        (
+            [
+                ("STAR^D", "iStar Inc. Series D Cumulative Redeemable Preferred Stock"),
+                ("STAR          ", "iStar Inc. Common Stock"),
+                ("STAR^G", "iStar Inc. Series G Cumulative Redeemable Preferred Stock"),
+            ],
+            (["STAR", "STAR^D", "STAR^G"], "iStar Inc. Common Stock"),
+        ),
+        (
+            [
+                (
+                    "ECCC",
+                    "Eagle Point Credit Company Inc. 6.50% Series C Term Preferred "
+                    "Stock due 2031",
+                ),
+                ("ECCW", "Eagle Point Credit Company Inc. 6.75% Notes due 2031"),
+                ("ECC           ", "Eagle Point Credit Company Inc. Common Stock"),
+            ],
+            (
+                ["ECC", "ECCC", "ECCW"],
+                "Eagle Point Credit Company Inc. Common Stock",
+            ),
+        ),
+        (
+            [
+                ("ZOOMW", "Zoom Video Communications, Inc. Warrant"),
+                ("ZM", "Zoom Video Communications, Inc. Class A Common Stock"),
+                ("ZOOMB", "Zoom Video Communications, Inc. Class B Common Stock"),
+            ],
+            (
+                ["ZM", "ZOOMB", "ZOOMW"],
+                "Zoom Video Communications, Inc. Class A Common Stock",
+            ),
+        ),
+        (
+            [
+                ("ET^C", "Energy Transfer LP 7.375% Series C Preferred Units"),
+                ("ET", "Energy Transfer LP Common Units"),
+            ],
+            (["ET", "ET^C"], "Energy Transfer LP Common Units"),
+        ),
+    ],
+)
+def test_issuer_is_named_after_its_shares(stocks, expected):
+    assert raw_stocks.by_issuer(stocks) == [expected]
+
+
+def test_issuer_without_shares_is_named_after_its_shortest_symbol():
+    stocks = [
+        ("ECCXX", "Eagle Point Credit Company Inc. 6.6875% Notes due 2028"),
+        ("ECCW", "Eagle Point Credit Company Inc. 6.75% Notes due 2031"),
+    ]
+    assert raw_stocks.by_issuer(stocks) == [
+        (["ECCW", "ECCXX"], "Eagle Point Credit Company Inc. 6.75% Notes due 2031")
+    ]
+
+
+def test_issuers_are_kept_apart():
+    stocks = [
+        ("VZ", "Verizon Communications Inc. Common Stock"),
+        ("NEE", "NextEra Energy, Inc. Common Stock"),
+    ]
+    assert raw_stocks.by_issuer(stocks) == [
+        (["VZ"], "Verizon Communications Inc. Common Stock"),
+        (["NEE"], "NextEra Energy, Inc. Common Stock"),
+    ]
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from linkedin import database
+from linkedin import resolve
+
+# A migrated Postgres database whose crawl tables may be emptied.
+DB = os.environ.get("LK_TEST_DB")
+
+
+def index() -> resolve.CompanyIndex:
+    companies = resolve.CompanyIndex()
+    companies.add("International Business Machines Corporation", "IBM", "1")
+    companies.add("Interpublic Group of Companies, Inc.", "IPG", "2")
+    companies.add("Churchill Capital Corp IV", "CCIV", "3")
+    return companies
+
+
+def test_symbol_is_looked_up_first():
+    companies = index()
+    assert companies.lookup("IPG", "International Business Machines") == "2"
+    assert companies.stats() == {"symbol": 1}
+
+
+def test_name_resolves_another_symbol():
+    companies = index()
+    assert (
+        companies.lookup("IBM.PR", "INTERNATIONAL BUSINESS MACHINES CORPORATION") == "1"
+    )
+    assert companies.stats() == {"name": 1}
+
+
+def test_remembered_alias_resolves_its_symbol_and_name():
+    companies = index()
+    companies.remember("MSFT", "Microsoft Corporation", "4")
+    assert companies.lookup("MSFT", "Microsoft") == "4"
+    assert companies.lookup("MSFT.U", "Microsoft Corporation Common Stock") == "4"
+    assert companies.stats() == {"symbol": 1, "name": 1}
+
+
+def test_misspelled_name_resolves_fuzzily():
+    companies = index()
+    assert companies.lookup("X", "International Busines Machines Corporation") == "1"
+    assert companies.lookup("Y", "Interpublic Grop of Companies, Inc.") == "2"
+    assert companies.stats() == {"fuzzy": 2}
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "Churchill Capital Corp V",
+        "International Business Machines Holdings Corporation",
+        "Microsoft Corporation",
+        "",
+    ],
+)
+def test_other_companies_miss(name):
+    companies = index()
+    assert companies.lookup("X", name) is None
+    assert companies.stats() == {"miss": 1}
+
+
+def test_ambiguous_fuzzy_match_misses():
+    companies = resolve.CompanyIndex()
+    companies.add("Bank of Hawaii Corporation", "BOH", "1")
+    companies.add("Bank of Hawaii Corporatio", None, "2")
+    assert companies.lookup("X", "Bank of Hawaii Corporatoin") is None
+
+
+@pytest.mark.skipif(
+    not DB, reason="LK_TEST_DB is not set to a disposable, migrated database"
+)
+def test_warm_indexes_display_names_and_aliases():
+    connections = database.Database(DB)
+    with connections.transaction() as db:
+        for table in ["job", "company_alias", "locations", "company"]:
+            db.execute(text(f"DELETE FROM {table}"))
+        db.execute(
+            text(
+                "INSERT INTO company (urn_id, url, staff_count, specialities, name,"
+                " display_name, symbol) VALUES (1068, 'url', 1, '{}',"
+                " 'jpmorganchase', 'JPMorgan Chase & Co.', 'JPM')"
+            )
+        )
+        resolve.CompanyIndex().remember(
+            "BAC", "Bank of America Corporation", "1123", db
+        )
+
+    companies = resolve.CompanyIndex(connections)
+    companies.warm()
+    assert companies.lookup("JPM.PRC", "JPMorgan Chase & Co") == "1068"
+    assert companies.lookup("X", "jpmorganchase") == "1068"
+    assert (
+        companies.lookup("BAC.PRB", "Bank of America Corporation Depositary Shares")
+        == "1123"
+    )
+    assert companies.stats() == {"name": 3}
+    connections.dispose()
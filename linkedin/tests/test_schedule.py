@@ -0,0 +1,86 @@
+import pytest
+
+from linkedin import engine
+from linkedin import fake
+from linkedin import jobs
+from linkedin import schedule
+
+
+def test_request_budget_runs_out():
+    budget = schedule.Budget(requests=3)
+    for endpoint in ("search_companies", "get_company", "get_profile"):
+        assert not budget.exhausted()
+        budget.spend(endpoint)
+    assert budget.exhausted()
+    with pytest.raises(schedule.BudgetExhaustedError, match="requests budget"):
+        budget.spend("get_profile")
+    summary = budget.summary()
+    assert summary["requests"] == 3
+    assert summary["remaining"] == 0
+    assert summary["stopped_by"] == "requests"
+    assert summary["refused"] == 1
+
+
+def test_deadline_runs_out(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(schedule.time, "monotonic", lambda: now[0])
+    budget = schedule.Budget(deadline=60)
+    budget.spend("get_company")
+    now[0] += 59.9
+    assert not budget.exhausted()
+    now[0] += 0.1
+    assert budget.exhausted()
+    with pytest.raises(schedule.BudgetExhaustedError, match="deadline budget"):
+        budget.spend("get_company")
+    assert budget.summary()["stopped_by"] == "deadline"
+
+
+def test_unlimited_budget_never_runs_out():
+    budget = schedule.Budget()
+    for _ in range(1000):
+        budget.spend("get_profile")
+    assert not budget.exhausted()
+    assert budget.summary()["remaining"] is None
+
+
+def test_budgeted_api_stops_calling_once_exhausted():
+    api = fake.FakeLinkedin(latency=0)
+    budget = schedule.Budget(requests=2)
+    budgeted = schedule.BudgetedApi(api, budget)
+    budgeted.get_company("1")
+    budgeted.get_profile(urn_id="1")
+    with pytest.raises(schedule.BudgetExhaustedError):
+        budgeted.search_people(["1"])
+    assert api.requests == 2
+    assert budget.spent == {"get_company": 1, "get_profile": 1}
+
+
+def test_engine_releases_jobs_when_the_budget_runs_out():
+    # The stock, company and first people page requests fit the budget, the
+    # second people page doesn't.
+    api = fake.FakeLinkedin(latency=0.001, people_per_company=60)
+    budget = schedule.Budget(requests=3)
+    queue = fake.FakeQueue()
+    queue.seed([(["S"], "Company")])
+    engine.Engine(
+        fake.FakeDatabase(),
+        schedule.BudgetedApi(api, budget),
+        queue,
+        company_workers=2,
+        person_workers=4,
+        poll=0.05,
+        budget=budget,
+    ).run()
+
+    assert api.requests == 3
+    states = {kind: job["state"] for (kind, _), job in queue.jobs.items()}
+    assert states[jobs.STOCK] == states[jobs.COMPANY] == jobs.DONE
+    assert states[jobs.PEOPLE] == jobs.PENDING
+    assert all(job["state"] != jobs.FAILED for job in queue.jobs.values())
+    # Released jobs are left for the next run, their attempts not counted.
+    pending = [job for job in queue.jobs.values() if job["state"] == jobs.PENDING]
+    assert all(job["attempts"] == 0 for job in pending)
+    summary = budget.summary()
+    assert summary["stopped_by"] == "requests"
+    assert summary["refused"] == 1
+    assert summary["released_jobs"] >= 1